@@ -0,0 +1,94 @@
+"""Benchmark file. Times the engines on standard seeded workloads, checks that they agree on the cells each workload
+ends with, and compares them against a saved baseline.
+
+Example: python benchmark.py --engine dense bitpacked --size 256 1024 --save-baseline baseline.json
+         python benchmark.py --engine dense bitpacked --size 256 1024 --baseline baseline.json
+"""
+
+import argparse
+import os
+import sys
+from support.backends import ENGINES
+from support.benchmark import (DEFAULT_THRESHOLD, WORKLOADS, benchmark_key, load_baseline, mismatches, regressions,
+                               run_benchmark, save_baseline)
+
+
+def parse_arguments(argv=None):
+    """Parse the command line arguments of the benchmark.
+
+    :param: argv: The list of arguments to parse. Defaults to the arguments the program was run with.
+
+    :return: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the game of life engines on standard workloads.')
+    parser.add_argument('--engine', nargs='+', choices=sorted(ENGINES), default=sorted(ENGINES),
+                        help='simulation backends to benchmark (default: all)')
+    parser.add_argument('--workload', nargs='+', choices=list(WORKLOADS), default=list(WORKLOADS),
+                        help='workloads to run (default: all)')
+    parser.add_argument('--size', nargs='+', type=int, default=[256, 1024],
+                        help='rows and columns of the boards (default: 256 1024)')
+    parser.add_argument('-n', '--generations', type=int, default=100, help='number of generations to time')
+    parser.add_argument('--seed', type=int, default=0, help='seed the workloads are made from')
+    parser.add_argument('--draw', type=int, metavar='PIXELS',
+                        help='draw every generation onto a display this many pixels wide and high, to time frames as '
+                             'the game shows them. Runs without a window')
+    parser.add_argument('--baseline', help='JSON file of earlier results to compare against')
+    parser.add_argument('--save-baseline', help='JSON file to save the results to')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='fraction by which a measure may get worse before it is flagged (default: {})'.format(
+                            DEFAULT_THRESHOLD))
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run every benchmark asked for, print the results and flag engines disagreeing and regressions.
+
+    :param: argv: The list of command line arguments. Defaults to the arguments the program was run with.
+
+    :return: The exit status: 1 if engines ended a workload with different cells or any measure regressed past the
+    threshold, 0 otherwise.
+    """
+    arguments = parse_arguments(argv)
+    if arguments.draw:
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+    # Run every combination, printing each result as it comes.
+    print('{:<36} {:>12} {:>9} {:>9} {:>9} {:>10}'.format('benchmark', 'gens/s', 'p50 ms', 'p90 ms', 'p99 ms',
+                                                          'peak MB'))
+    results = {}
+    for engine_name in arguments.engine:
+        for workload in arguments.workload:
+            for size in arguments.size:
+                key = benchmark_key(engine_name, workload, size, arguments.draw)
+                result = results[key] = run_benchmark(engine_name, workload, size, arguments.generations,
+                                                      arguments.seed, arguments.draw)
+                print('{:<36} {:>12.1f} {:>9.3f} {:>9.3f} {:>9.3f} {:>10.2f}'.format(
+                    key, result['generations_per_second'], *result['frame_ms'].values(),
+                    result['peak_bytes'] / 2 ** 20))
+                sys.stdout.flush()
+
+    if arguments.save_baseline is not None:
+        save_baseline(arguments.save_baseline, results)
+
+    # Fail if engines which should agree ended a workload with different cells.
+    disagreements = mismatches(results, arguments.generations, arguments.seed)
+    for workload, size, boundary, digests in disagreements:
+        print('mismatch: {} at size {} on a {} board ended differently: {}'.format(
+            workload, size, boundary, ', '.join('{} {}'.format(key, digest[:12]) for key, digest in digests.items())),
+            file=sys.stderr)
+
+    # Compare against the baseline, if any, and fail if anything got worse.
+    if arguments.baseline is None:
+        return 1 if disagreements else 0
+    found = regressions(results, load_baseline(arguments.baseline), arguments.threshold)
+    for key, measure, before, after in found:
+        print('regression: {} {} went from {:.6g} to {:.6g} ({:+.1%})'.format(
+            key, measure, before, after, after / before - 1 if before else float('inf')), file=sys.stderr)
+    if not found:
+        print('no regressions past {:.0%}'.format(arguments.threshold), file=sys.stderr)
+    return 1 if found or disagreements else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,51 +1,136 @@
-"""Main game file. See support folder for supporting files."""
-
-import pygame
-from support.gameLoop import main_game
-
-
-def main():
-    """Main game function, run this file to play the game. This code was written by Mohamed Elyaman.
-
-    This is a personal copy of the game of life created by  the English Mathematician John Conway.
-    The game operates by the following simple rules:
-
-    1. Any live cell with fewer than two live neighbors dies, as if by underpopulation.
-    2. Any live cell with two or three live neighbors lives on to the next generation.
-    3. Any live cell with more than three live neighbors dies as if by overpopulation.
-    4. Any dead cell with exactly three live neighbors becomes a live cell, as if by reproduction.
-
-    To play the game run this file, then select the cells to revive with left click. If you wish to undo a cell,
-    use the right click button on the mouse. Once the selection process is completed, press space bar once to run
-    the game logic.
-
-    If you desire to pause/stop the game logic, simply press space bar a second time. If you would like to restart, either
-    deselect the cells you want to remove using right click or exit the game by clicking the exit button on the top
-    right hand corner of the window and re-run this program.
-
-    To run this program you will need to have a python interpreter installed as well as the pygame package. See online
-    documentation for help installing these.
-
-    """
-    # initiate pygame and give permission
-    # to use pygame's functionality.
-    pygame.init()
-
-    # create the display surface object
-    # of specific dimension.
-    width = 1920
-    height = 1080
-    window = pygame.display.set_mode((width, height))
-
-    # Create a cell size to divide the display into a grid.
-    cell_width = 15
-    cell_height = 15
-
-
-
-    # Run main game logic.
-    main_game(window, cell_width, cell_height)
-
-
-if __name__ == '__main__':
-    main()
+"""Main game file. See support folder for supporting files."""
+
+import argparse
+import os
+import pygame
+from support.backends import ENGINES, BOUNDARIES
+from support.cycles import ACTIONS
+from support.editing import MAX_BRUSH_SIZE, Editor
+from support.gameLoop import main_game
+from support.metrics import SINKS
+from support.patterns import EXTENSIONS, pattern_boundary, pattern_rule, read_pattern
+from support.profiler import DEFAULT_PROFILE_FRAMES, Profiler
+from support.rules import CONWAY, RULES, Rule
+
+
+def main():
+    """Main game function, run this file to play the game. This code was written by Mohamed Elyaman.
+
+    This is a personal copy of the game of life created by  the English Mathematician John Conway.
+    The game operates by the following simple rules:
+
+    1. Any live cell with fewer than two live neighbors dies, as if by underpopulation.
+    2. Any live cell with two or three live neighbors lives on to the next generation.
+    3. Any live cell with more than three live neighbors dies as if by overpopulation.
+    4. Any dead cell with exactly three live neighbors becomes a live cell, as if by reproduction.
+
+    To play the game run this file, then select the cells to revive with left click. If you wish to undo a cell,
+    use the right click button on the mouse. Once the selection process is completed, press space bar once to run
+    the game logic.
+
+    If you desire to pause/stop the game logic, simply press space bar a second time. If you would like to restart, either
+    deselect the cells you want to remove using right click or exit the game by clicking the exit button on the top
+    right hand corner of the window and re-run this program.
+
+    To run this program you will need to have a python interpreter installed as well as the pygame and numpy packages.
+    See online documentation for help installing these.
+
+    """
+    # Read the command line options.
+    parser = argparse.ArgumentParser(description='Play the game of life.')
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='sparse', help='simulation backend to use')
+    parser.add_argument('--boundary', choices=BOUNDARIES, help='boundary policy, defaults to the one of the backend')
+    parser.add_argument('--workers', type=int, help='worker processes of the parallel backend, defaults to the CPUs')
+    parser.add_argument('--rule', help='Life-like rule in B/S notation such as B36/S23, or one of {}. Defaults to the '
+                                       'rule of the pattern, or B3/S23'.format(', '.join(RULES)))
+    parser.add_argument('--jump', type=int, default=1024,
+                        help='number of generations to jump ahead when shift and the right arrow key are pressed')
+    parser.add_argument('--speed', type=float, default=60, help='target number of generations per second')
+    parser.add_argument('--fps', type=int, default=60, help='highest number of frames drawn per second')
+    parser.add_argument('--pattern',
+                        help='pattern file (.cells, .rle, .lif, .ckpt) to start from, placed in the middle')
+    parser.add_argument('--paste',
+                        help='pattern file to paste under the mouse when ctrl and V are pressed, defaults to the '
+                             '--pattern file')
+    parser.add_argument('--brush', type=int, default=1, choices=range(1, MAX_BRUSH_SIZE + 1), metavar='SIZE',
+                        help='diameter of the brush in cells, [ and ] change it (default: 1)')
+    parser.add_argument('--density', type=float, default=0.5,
+                        help='share of cells made alive when ctrl-dragging a random fill (default: 0.5)')
+    parser.add_argument('--save', default='saved.rle',
+                        help='pattern file to save the universe to when ctrl and S are pressed (default: saved.rle)')
+    parser.add_argument('--history', type=float, default=64,
+                        help='megabytes of past generations to remember for rewinding with the left arrow key, 0 to '
+                             'disable (default: 64)')
+    parser.add_argument('--on-cycle', choices=[action for action in ACTIONS if action != 'stop'], default='report',
+                        help='what to do once the board settles into still lifes or oscillators: show the period in '
+                             'the title, pause as well, or skip computing the cycle (default: report)')
+    parser.add_argument('--record', help='file to record the run to, to replay it later (.ckpt)')
+    parser.add_argument('--metrics',
+                        help='file to write the population, births, deaths, bounding box and changes per region of '
+                             'every generation to (.csv, .jsonl)')
+    parser.add_argument('--worker', choices=('thread', 'process'),
+                        help='run the simulation in a thread or a process, defaults to the best one for the engine')
+    parser.add_argument('--hud', action='store_true',
+                        help='show the generations per second, frame rate and frame timings from the start, F3 shows '
+                             'or hides them')
+    parser.add_argument('--trace', help='CSV file to write the timings of every frame to')
+    parser.add_argument('--profile', default='profile.prof',
+                        help='file to save cProfile statistics to when F4 is pressed (default: profile.prof)')
+    parser.add_argument('--profile-frames', type=int, default=DEFAULT_PROFILE_FRAMES,
+                        help='number of frames profiled when F4 is pressed (default: {})'.format(
+                            DEFAULT_PROFILE_FRAMES))
+    arguments = parser.parse_args()
+    if arguments.workers is not None and arguments.engine != 'parallel':
+        parser.error('--workers only applies to the parallel engine')
+    engine_options = {'workers': arguments.workers} if arguments.engine == 'parallel' else {}
+    arguments.paste = arguments.paste or arguments.pattern
+    for path in filter(None, (arguments.pattern, arguments.paste, arguments.save)):
+        if os.path.splitext(path)[1].lower() not in EXTENSIONS:
+            parser.error('{}: unknown pattern format, use one of {}'.format(path, ', '.join(EXTENSIONS)))
+    if arguments.metrics is not None and os.path.splitext(arguments.metrics)[1].lower() not in SINKS:
+        parser.error('{}: unknown metrics format, use one of {}'.format(arguments.metrics, ', '.join(SINKS)))
+    for path in filter(None, (arguments.pattern, arguments.paste)):
+        if not os.path.isfile(path):
+            parser.error('{}: no such file'.format(path))
+    try:
+        # A checkpoint carries on with the boundary policy it was saved with.
+        saved = pattern_boundary(arguments.pattern) if arguments.pattern is not None else None
+        if saved is not None and arguments.boundary not in (None, saved):
+            raise ValueError('{} was saved with the {} boundary, not {}'.format(arguments.pattern, saved,
+                                                                               arguments.boundary))
+        arguments.boundary = arguments.boundary or saved
+        rulestring = arguments.rule or (pattern_rule(arguments.pattern) if arguments.pattern is not None else None)
+        engine_options['rule'] = Rule.parse(rulestring) if rulestring else CONWAY
+        ENGINES[arguments.engine].check(arguments.boundary, engine_options['rule'])
+    except ValueError as error:
+        parser.error(str(error))
+
+    # initiate pygame and give permission
+    # to use pygame's functionality.
+    pygame.init()
+
+    # create the display surface object
+    # of specific dimension.
+    width = 1920
+    height = 1080
+    window = pygame.display.set_mode((width, height))
+
+    # Create a cell size to divide the display into a grid.
+    cell_width = 15
+    cell_height = 15
+
+
+
+    # Run main game logic.
+    main_game(window, cell_width, cell_height, arguments.engine, arguments.jump, arguments.boundary, engine_options,
+              arguments.speed, arguments.fps, arguments.worker, arguments.pattern, arguments.save, arguments.record,
+              int(arguments.history * (1 << 20)), arguments.on_cycle, arguments.hud,
+              Profiler(trace_path=arguments.trace, profile_path=arguments.profile,
+                       profile_frames=arguments.profile_frames),
+              Editor(arguments.brush, arguments.density,
+                     read_pattern(arguments.paste) if arguments.paste is not None else None),
+              arguments.metrics)
+
+
+if __name__ == '__main__':
+    main()
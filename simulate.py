@@ -0,0 +1,134 @@
+"""Headless simulation file. Runs the game without a display and without importing pygame.
+
+Example: python simulate.py seed.rle --generations 1000 --output final.rle
+"""
+
+import argparse
+import os
+import sys
+import time
+from support.backends import ENGINES, BOUNDARIES
+from support.checkpoint import CHECKPOINT_EXTENSION, Recorder, load_checkpoint, restore_checkpoint
+from support.cycles import CycleDetector
+from support.metrics import SINKS, MetricsRecorder, open_sink
+from support.patterns import load_pattern, pattern_bounds, pattern_boundary, pattern_rule, save_pattern, write_plaintext
+from support.rules import CONWAY, RULES, Rule
+
+
+def parse_arguments(argv=None):
+    """Parse the command line arguments of the headless simulation.
+
+    :param: argv: The list of arguments to parse. Defaults to the arguments the program was run with.
+
+    :return: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description='Run the game of life headless from a seed file.')
+    parser.add_argument('seed', help='pattern file (.cells, .rle, .lif) holding the initial state, or a checkpoint '
+                                     '(.ckpt) to resume')
+    parser.add_argument('-n', '--generations', type=int, default=100, help='number of generations to run')
+    parser.add_argument('-o', '--output', default='-',
+                        help='pattern file (.cells, .rle, .lif, .ckpt) to write the final state to, - for plaintext on '
+                             'stdout')
+    parser.add_argument('--on-cycle', choices=('report', 'stop', 'skip'), default='report',
+                        help='what to do once the board settles into still lifes or oscillators: report the period, '
+                             'stop the run, or skip the remaining whole periods (default: report)')
+    parser.add_argument('--record', help='file to record every generation to, to replay the run later (.ckpt)')
+    parser.add_argument('--metrics',
+                        help='file to write the population, births, deaths, bounding box and changes per region of '
+                             'every generation stepped to (.csv, .jsonl), - for JSONL on stdout')
+    parser.add_argument('--rows', type=int,
+                        help='rows of a bounded (torus or dead) board, defaults to the height of the seed')
+    parser.add_argument('--cols', type=int,
+                        help='columns of a bounded (torus or dead) board, defaults to the width of the seed')
+    parser.add_argument('--rule', help='Life-like rule in B/S notation such as B36/S23, or one of {}. Defaults to the '
+                                       'rule of the pattern, or B3/S23'.format(', '.join(RULES)))
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='sparse', help='simulation backend to use')
+    parser.add_argument('--boundary', choices=BOUNDARIES, help='boundary policy, defaults to the one of the backend')
+    parser.add_argument('--workers', type=int, help='worker processes of the parallel backend, defaults to the CPUs')
+    arguments = parser.parse_args(argv)
+    if arguments.workers is not None and arguments.engine != 'parallel':
+        parser.error('--workers only applies to the parallel engine')
+    if arguments.metrics not in (None, '-') and os.path.splitext(arguments.metrics)[1].lower() not in SINKS:
+        parser.error('{}: unknown metrics format, use one of {}'.format(arguments.metrics, ', '.join(SINKS)))
+    try:
+        # A checkpoint carries on with the boundary policy and the rule it was saved with.
+        saved = pattern_boundary(arguments.seed)
+        if saved is not None and arguments.boundary not in (None, saved):
+            raise ValueError('{} was saved with the {} boundary, not {}'.format(arguments.seed, saved,
+                                                                               arguments.boundary))
+        arguments.boundary = arguments.boundary or saved
+        rulestring = arguments.rule or pattern_rule(arguments.seed)
+        arguments.rule = Rule.parse(rulestring) if rulestring else CONWAY
+        if saved is not None and arguments.rule != Rule.parse(pattern_rule(arguments.seed)):
+            raise ValueError('{} was saved with rule {}, not {}'.format(arguments.seed, pattern_rule(arguments.seed),
+                                                                       arguments.rule))
+        ENGINES[arguments.engine].check(arguments.boundary, arguments.rule)
+    except ValueError as error:
+        parser.error(str(error))
+    return arguments
+
+
+def main(argv=None):
+    """Run the seed for the requested number of generations and write out the final state.
+
+    :param: argv: The list of command line arguments. Defaults to the arguments the program was run with.
+
+    :return: Void.
+    """
+    arguments = parse_arguments(argv)
+
+    # Load the seed and centre it on the board. A checkpoint is resumed where it was saved instead.
+    top, left, seed_rows, seed_cols = pattern_bounds(arguments.seed)
+    rows = arguments.rows or seed_rows
+    cols = arguments.cols or seed_cols
+    options = {'workers': arguments.workers} if arguments.engine == 'parallel' else {}
+    engine = ENGINES[arguments.engine](rows, cols, arguments.boundary, rule=arguments.rule, **options)
+    if arguments.seed.lower().endswith(CHECKPOINT_EXTENSION):
+        restore_checkpoint(load_checkpoint(arguments.seed), engine)
+    else:
+        load_pattern(arguments.seed, engine, (rows - seed_rows) // 2 - top, (cols - seed_cols) // 2 - left)
+
+    # Run the simulation and time it, recording every generation and its metrics if asked to and watching for the
+    # board settling.
+    start = time.perf_counter()
+    first, last = engine.generation, engine.generation + arguments.generations
+    detector = CycleDetector(engine)
+    recorder = Recorder(arguments.record, engine) if arguments.record is not None else None
+    meter = MetricsRecorder(engine, [open_sink(arguments.metrics)]) if arguments.metrics is not None else None
+    while engine.generation < last:
+        cells, period = detector.step()
+        if recorder is not None:
+            recorder.record(engine.generation, cells)
+        if meter is not None:
+            meter.step(cells)
+        if period is not None:
+            print('settled into a period {} cycle at generation {}'.format(period, engine.generation), file=sys.stderr)
+            if arguments.on_cycle == 'stop':
+                break
+            elif arguments.on_cycle == 'skip':
+                detector.skip_to(last)
+    if recorder is not None:
+        recorder.close()
+    if meter is not None:
+        meter.close()
+    elapsed = time.perf_counter() - start
+
+    # Write out the final state.
+    if arguments.output == '-' and engine.rows is None:
+        # An unbounded board has no edge to stop at, so show every alive cell wherever the seed has gone.
+        cells = engine.live_cells()
+        row, col = cells.min(axis=0).tolist() if len(cells) else (0, 0)
+        write_plaintext(sys.stdout, engine, row, col)
+    elif arguments.output == '-':
+        write_plaintext(sys.stdout, engine, 0, 0, rows, cols)
+    else:
+        save_pattern(arguments.output, engine)
+    engine.close()
+
+    generations = engine.generation - first
+    print('{} generations in {:.3f}s ({:.1f} generations/s), population {}'.format(
+        generations, elapsed, generations / elapsed if elapsed else float('inf'), engine.population()), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
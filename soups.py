@@ -0,0 +1,81 @@
+"""Soup search file. Runs many random soups headless and writes out how each one settled.
+
+Example: python soups.py --soups 10000 --density 0.3 0.5 --output soups.jsonl
+"""
+
+import argparse
+import os
+import sys
+import time
+from support.cycles import DEFAULT_WINDOW
+from support.rules import CONWAY, RULES, Rule
+from support.soups import DEFAULT_SHARD_SIZE, RESULT_FORMATS, run_batch, write_results
+
+
+def parse_arguments(argv=None):
+    """Parse the command line arguments of the soup search.
+
+    :param: argv: The list of arguments to parse. Defaults to the arguments the program was run with.
+
+    :return: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description='Run random soups of the game of life and census how they settle.')
+    parser.add_argument('-n', '--soups', type=int, default=1000, help='number of soups of each rule and density')
+    parser.add_argument('--rows', type=int, default=64, help='rows of each board')
+    parser.add_argument('--cols', type=int, default=64, help='columns of each board')
+    parser.add_argument('--density', type=float, nargs='+', default=[0.5],
+                        help='densities of alive cells to sweep (default: 0.5)')
+    parser.add_argument('--rule', nargs='+', default=[str(CONWAY)],
+                        help='Life-like rules to sweep, in B/S notation such as B36/S23, or among {} (default: '
+                             'B3/S23)'.format(', '.join(RULES)))
+    parser.add_argument('--boundary', choices=('dead', 'torus'), default='dead', help='boundary policy of the boards')
+    parser.add_argument('-g', '--generations', type=int, default=10000,
+                        help='most generations to run a soup which does not settle for')
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW, help='longest period to look for')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random soups')
+    parser.add_argument('--workers', type=int, help='worker processes, defaults to the CPUs')
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE,
+                        help='soups stepped together by each task (default: {})'.format(DEFAULT_SHARD_SIZE))
+    parser.add_argument('-o', '--output', default='-',
+                        help='file to stream the results to ({}), - for JSONL on stdout'.format(
+                            ', '.join(RESULT_FORMATS)))
+    arguments = parser.parse_args(argv)
+    try:
+        arguments.rule = [Rule.parse(rule) for rule in arguments.rule]
+    except ValueError as error:
+        parser.error(str(error))
+    if arguments.output != '-' and os.path.splitext(arguments.output)[1].lower() not in RESULT_FORMATS:
+        parser.error('output must be one of: {}'.format(', '.join(RESULT_FORMATS)))
+    return arguments
+
+
+def main(argv=None):
+    """Run the soups and stream their results out, then report the throughput and the census of all soups.
+
+    :param: argv: The list of command line arguments. Defaults to the arguments the program was run with.
+
+    :return: Void.
+    """
+    arguments = parse_arguments(argv)
+    results = run_batch(arguments.soups, arguments.rows, arguments.cols, arguments.density, arguments.rule,
+                        arguments.boundary, arguments.generations, arguments.window, arguments.seed, arguments.workers,
+                        arguments.shard_size)
+
+    # Write the results out as the boards finish, timing the whole run.
+    start = time.perf_counter()
+    if arguments.output == '-':
+        boards, board_generations, total = write_results(sys.stdout, results)
+    else:
+        with open(arguments.output, 'w', newline='') as file:
+            result_format = RESULT_FORMATS[os.path.splitext(arguments.output)[1].lower()]
+            boards, board_generations, total = write_results(file, results, result_format)
+    elapsed = time.perf_counter() - start
+
+    print('{} soups, {} board-generations in {:.3f}s ({:.1f} board-generations/s)'.format(
+        boards, board_generations, elapsed, board_generations / elapsed if elapsed else float('inf')), file=sys.stderr)
+    print('census: {}'.format(', '.join('{} {}'.format(count, name) for name, count in list(total.items())[:20])),
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+"""Backends module. Maps the names of the simulation backends to their classes so they can be chosen by name."""
+
+from .bitgrid import BitPackedEngine
+from .engine import DenseEngine, ActiveEngine
+from .hashlife import HashlifeEngine
+from .parallel import ParallelEngine
+from .sparse import SparseEngine
+
+ENGINES = {
+    'dense': DenseEngine,
+    'active': ActiveEngine,
+    'bitpacked': BitPackedEngine,
+    'sparse': SparseEngine,
+    'parallel': ParallelEngine,
+    'hashlife': HashlifeEngine,
+}
+
+# The boundary policies understood by the backends. See the Engine class for their meaning.
+BOUNDARIES = ('infinite', 'torus', 'dead')
@@ -0,0 +1,290 @@
+"""Benchmark module. Measures how fast the engines step and draw standard, seeded workloads.
+
+Nothing in this module needs pygame unless frames are drawn, so that the engines can be benchmarked headless.
+
+Every workload is made from a seed, so two runs with the same seed step the exact same cells. A run reports the
+generations per second, the percentiles of the time taken by each frame, and the peak memory allocated while setting
+the workload up and stepping it. A frame is one generation, plus the redraw of the cells it changed when drawing.
+Results are saved to JSON as a baseline that later runs are compared against.
+
+A run also reports a digest of the cells alive at its end. Engines with the same boundary policy must end a workload
+with the same cells, and unbounded ones with the cells a single Hashlife jump gives, see mismatches.
+"""
+
+import hashlib
+import io
+import json
+import time
+import tracemalloc
+import numpy as np
+from .backends import ENGINES
+from .patterns import read_plaintext
+
+# The generations stepped under tracemalloc to find the peak memory, which would slow down the timed generations.
+MEMORY_GENERATIONS = 10
+
+# The frame time percentiles reported.
+PERCENTILES = (50, 90, 99)
+
+# The default fraction by which a measure may get worse before it counts as a regression.
+DEFAULT_THRESHOLD = 0.1
+
+# The patterns the workloads are built from, in the plaintext format.
+R_PENTOMINO = '.OO\nOO.\n.O.\n'
+ACORN = '.O.....\n...O...\nOO..OOO\n'
+GOSPER_GUN = '\n'.join((
+    '........................O...........',
+    '......................O.O...........',
+    '............OO......OO............OO',
+    '...........O...O....OO............OO',
+    'OO........O.....O...OO..............',
+    'OO........O...O.OO....O.O...........',
+    '..........O.....O.......O...........',
+    '...........O...O....................',
+    '............OO......................',
+)) + '\n'
+
+# The number of cells of the board for each acorn of the acorn field.
+ACORN_SPACING = 64 * 64
+
+
+def _pattern(text):
+    """Read a plaintext pattern given as a string, getting its cells and size."""
+    return read_plaintext(io.StringIO(text))
+
+
+def _centred(text, rows, cols):
+    """Get the cells of a pattern placed in the middle of a board."""
+    cells, (height, width) = _pattern(text)
+    return cells + ((rows - height) // 2, (cols - width) // 2)
+
+
+def soup(rows, cols, rng):
+    """Fill the board at random, with each cell alive one time out of two.
+
+    :param: rows: The number of rows of the board.
+    :param: cols: The number of columns of the board.
+    :param: rng: The NumPy random Generator to draw from.
+
+    :return: An (N, 2) array of the alive cells.
+    """
+    return np.argwhere(rng.random((rows, cols)) < 0.5)
+
+
+def r_pentomino(rows, cols, rng):
+    """Place an R-pentomino in the middle of the board. See soup for the parameters."""
+    return _centred(R_PENTOMINO, rows, cols)
+
+
+def gosper_gun(rows, cols, rng):
+    """Place a Gosper glider gun in the middle of the board. See soup for the parameters."""
+    return _centred(GOSPER_GUN, rows, cols)
+
+
+def acorn_field(rows, cols, rng):
+    """Scatter acorns at random over the board, one for every ACORN_SPACING cells. See soup for the parameters."""
+    cells, (height, width) = _pattern(ACORN)
+    count = max(rows * cols // ACORN_SPACING, 1)
+    corners = np.stack((rng.integers(0, max(rows - height, 1), count), rng.integers(0, max(cols - width, 1), count)), 1)
+    return np.unique((corners[:, np.newaxis] + cells).reshape(-1, 2), axis=0)
+
+
+# The workloads by name, each a function of the board size and a random Generator giving the alive cells.
+WORKLOADS = {
+    'soup': soup,
+    'rpentomino': r_pentomino,
+    'gosper': gosper_gun,
+    'acorns': acorn_field,
+}
+
+
+def percentiles(times):
+    """Get the PERCENTILES of a list of durations, in milliseconds.
+
+    :param: times: The durations in seconds.
+
+    :return: A dictionary from 'p50' and the like to the duration.
+    """
+    values = np.percentile(np.asarray(times) * 1000, PERCENTILES) if len(times) else [0.0] * len(PERCENTILES)
+    return {'p{}'.format(percentile): float(value) for percentile, value in zip(PERCENTILES, values)}
+
+
+def _setup(engine_name, workload, size, seed):
+    """Create an engine of a size holding a workload."""
+    engine = ENGINES[engine_name](size, size)
+    engine.set_cells(WORKLOADS[workload](size, size, np.random.default_rng(seed)), True)
+    return engine
+
+
+def cells_digest(engine):
+    """Get a digest of the alive cells of an engine, the same whatever order the engine lists them in.
+
+    :param: engine: The simulation engine.
+
+    :return: The digest, as a string of hexadecimal digits.
+    """
+    cells = engine.live_cells().astype('<i8')
+    return hashlib.sha1(cells[np.lexsort((cells[:, 1], cells[:, 0]))].tobytes()).hexdigest()
+
+
+def _frames(engine, generations, renderer=None):
+    """Step an engine, drawing every generation if given a renderer, and time each frame."""
+    times = []
+    for _ in range(generations):
+        start = time.perf_counter()
+        cells = engine.step()
+        if renderer is not None:
+            renderer.mark(cells)
+            renderer.render(engine)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def _renderer(size, display_size):
+    """Create a renderer drawing the top left hand corner of a board onto a display, as large cells as fit."""
+    # Only drawing needs pygame. It is imported here so that headless benchmarks never load it.
+    import pygame
+    from .camera import Camera
+    from .renderer import Renderer
+    pygame.display.init()
+    window = pygame.display.set_mode((display_size, display_size))
+    cell_size = max(display_size // size, 1)
+    return Renderer(window, Camera(window.get_size(), cell_size, cell_size))
+
+
+def run_benchmark(engine_name, workload, size, generations=100, seed=0, display_size=None):
+    """Benchmark one engine on one workload.
+
+    :param: engine_name: The name of the simulation backend. See ENGINES in the backends module.
+    :param: workload: The name of the workload. See WORKLOADS.
+    :param: size: The number of rows and columns of the board.
+    :param: generations: The number of generations to time, after a first one which is not.
+    :param: seed: The seed the workload is made from.
+    :param: display_size: The width and height in pixels of a display to draw every generation onto, or None not to
+    draw. Drawing needs pygame and a display, e.g. SDL_VIDEODRIVER=dummy.
+
+    :return: A dictionary of the measures: generations_per_second, frame_ms, the PERCENTILES of the frame times in
+    milliseconds, peak_bytes, the most memory allocated at once, and population, the final population, along with
+    boundary, the boundary policy of the engine, and digest, the cells_digest of the final generation.
+    """
+    # Time the workload without tracing memory, which slows every allocation down. The first frame is left out, as it
+    # pays for one-off work such as starting worker processes or drawing the whole display.
+    engine = _setup(engine_name, workload, size, seed)
+    renderer = _renderer(size, display_size) if display_size else None
+    try:
+        _frames(engine, 1, renderer)
+        times = _frames(engine, generations, renderer)
+        population = engine.population()
+        boundary, digest = engine.boundary, cells_digest(engine)
+    finally:
+        engine.close()
+
+    # Set the workload up again under tracemalloc and step it a little to find the peak memory.
+    tracemalloc.start()
+    try:
+        engine = _setup(engine_name, workload, size, seed)
+        _frames(engine, min(generations, MEMORY_GENERATIONS))
+        engine.close()
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    total = sum(times)
+    return {'generations_per_second': generations / total if total else float('inf'), 'frame_ms': percentiles(times),
+            'peak_bytes': peak_bytes, 'population': population, 'boundary': boundary, 'digest': digest}
+
+
+def mismatches(results, generations=100, seed=0):
+    """Find the engines which ended a workload with different cells from each other.
+
+    Runs of the same workload and size on engines with the same boundary policy are compared with each other. Runs on
+    an unbounded engine are compared with HashlifeEngine jumping straight to their last generation as well.
+
+    :param: results: A dictionary from benchmark_key to the result of run_benchmark.
+    :param: generations: The number of generations timed by each run, see run_benchmark.
+    :param: seed: The seed the workloads were made from.
+
+    :return: A list of (workload, size, boundary, digests) tuples, one per disagreement, where digests is a dictionary
+    from the benchmark_key of each run, or 'jump' for the Hashlife jump, to its digest.
+    """
+    groups = {}
+    for key, result in results.items():
+        _, workload, size = key.split('/')[:3]
+        groups.setdefault((workload, int(size), result['boundary']), {})[key] = result['digest']
+
+    found = []
+    for (workload, size, boundary), digests in sorted(groups.items()):
+        if boundary == 'infinite':
+            # The runs step one generation more than they time, see run_benchmark.
+            engine = _setup('hashlife', workload, size, seed)
+            engine.advance(generations + 1)
+            digests['jump'] = cells_digest(engine)
+        if len(set(digests.values())) > 1:
+            found.append((workload, size, boundary, digests))
+    return found
+
+
+def benchmark_key(engine_name, workload, size, display_size=None):
+    """Get the key a benchmark is saved under in a baseline.
+
+    :param: engine_name: The name of the simulation backend.
+    :param: workload: The name of the workload.
+    :param: size: The number of rows and columns of the board.
+    :param: display_size: The size of the display drawn onto, or None if nothing was drawn.
+
+    :return: The key, e.g. 'dense/soup/256', or 'dense/soup/256/draw800' when drawing onto an 800 pixel display.
+    """
+    key = '{}/{}/{}'.format(engine_name, workload, size)
+    return key if display_size is None else '{}/draw{}'.format(key, display_size)
+
+
+def save_baseline(path, results):
+    """Save benchmark results to a JSON file, to compare later runs against.
+
+    :param: path: The path of the file.
+    :param: results: A dictionary from benchmark_key to the result of run_benchmark.
+
+    :return: Void.
+    """
+    with open(path, 'w') as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def load_baseline(path):
+    """Load benchmark results saved by save_baseline.
+
+    :param: path: The path of the file.
+
+    :return: A dictionary from benchmark_key to result.
+    """
+    with open(path) as file:
+        return json.load(file)
+
+
+def regressions(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Find the measures which got worse than their baseline by more than a threshold.
+
+    Fewer generations per second, longer frames at any percentile and more peak memory are worse. Benchmarks missing
+    from the baseline are not compared.
+
+    :param: results: A dictionary from benchmark_key to the result of run_benchmark.
+    :param: baseline: A dictionary of results to compare against, see load_baseline.
+    :param: threshold: The fraction by which a measure may get worse, e.g. 0.1 for 10%.
+
+    :return: A list of (key, measure, baseline value, new value) tuples, one per regression.
+    """
+    found = []
+    for key, result in sorted(results.items()):
+        if key not in baseline:
+            continue
+        before = baseline[key]
+        if result['generations_per_second'] < before['generations_per_second'] * (1 - threshold):
+            found.append((key, 'generations_per_second', before['generations_per_second'],
+                          result['generations_per_second']))
+        for percentile, value in result['frame_ms'].items():
+            if percentile in before['frame_ms'] and value > before['frame_ms'][percentile] * (1 + threshold):
+                found.append((key, 'frame_ms ' + percentile, before['frame_ms'][percentile], value))
+        if result['peak_bytes'] > before['peak_bytes'] * (1 + threshold):
+            found.append((key, 'peak_bytes', before['peak_bytes'], result['peak_bytes']))
+    return found
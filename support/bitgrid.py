@@ -0,0 +1,181 @@
+"""Bit-packed universe module. Holds a backend storing one bit per cell and stepping 64 cells per machine word.
+
+Each row of the board is stored as an array of uint64 words, where bit b of word w holds column w * 64 + b. The
+neighbors of all 64 cells of a word are counted at once with bitwise full adders, so a generation is a few dozen
+whole-array bitwise operations no matter how many cells are alive.
+"""
+
+import numpy as np
+from .engine import Engine, as_cells
+
+_ONE = np.uint64(1)
+_TOP = np.uint64(63)
+
+# The number of bits set in every possible byte, used to count alive cells.
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def full_add(a, b, c):
+    """Add three bit-planes together.
+
+    :param: a: The first bit-plane.
+    :param: b: The second bit-plane.
+    :param: c: The third bit-plane.
+
+    :return: total, carry: The bit-planes of the ones and the twos of the sum.
+    """
+    partial = a ^ b
+    return partial ^ c, (a & b) | (partial & c)
+
+
+def count_neighbors(words):
+    """Count the alive neighbors of every cell of the inner rows of a block of words.
+
+    :param: words: An (M + 2, W) array of words. The first and last rows only provide neighbors.
+
+    :return: ones, twos, fours, eights: The four bit-planes of the neighbor counts of the M inner rows.
+    """
+    # Line up the west and east neighbor of every cell with the cell, carrying bits across word boundaries.
+    west = words << _ONE
+    west[:, 1:] |= words[:, :-1] >> _TOP
+    east = words >> _ONE
+    east[:, :-1] |= words[:, 1:] << _TOP
+
+    # Add up the three cells of the row above and of the row below, and the two side cells of the middle row.
+    top_ones, top_twos = full_add(west[:-2], words[:-2], east[:-2])
+    bottom_ones, bottom_twos = full_add(west[2:], words[2:], east[2:])
+    middle_ones, middle_twos = west[1:-1] ^ east[1:-1], west[1:-1] & east[1:-1]
+
+    # Add the three partial sums together, one bit position at a time.
+    ones, carry = full_add(top_ones, bottom_ones, middle_ones)
+    partial, partial_carry = full_add(top_twos, bottom_twos, middle_twos)
+    twos = partial ^ carry
+    carry &= partial
+    return ones, twos, partial_carry ^ carry, partial_carry & carry
+
+
+def unpack_words(words, rows, word_columns):
+    """Get the alive cells of a selection of words.
+
+    :param: words: A 1D array of words.
+    :param: rows: The row of each word.
+    :param: word_columns: The word index of each word within its row.
+
+    :return: An (N, 2) array holding the alive cells.
+    """
+    bits = np.flatnonzero(np.unpackbits(words.astype('<u8').view(np.uint8), bitorder='little'))
+    word = bits >> 6
+    cells = np.empty((len(bits), 2), dtype=np.int64)
+    cells[:, 0] = rows[word]
+    cells[:, 1] = (word_columns[word] << 6) + (bits & 63)
+    return cells
+
+
+class BitPackedEngine(Engine):
+    """Backend storing the universe as one bit per cell packed into uint64 words.
+
+    A 10000 x 10000 board takes 12.5MB. Generations are computed in blocks of rows into a second buffer, so the
+    temporary bit-planes never grow past a block.
+    """
+
+    BOUNDARIES = ('dead',)
+
+    def __init__(self, rows, cols, boundary=None, rule=None, block_rows=1024):
+        """Create an empty universe.
+
+        :param: rows: The number of rows of the universe.
+        :param: cols: The number of columns of the universe.
+        :param: boundary: The boundary policy of the universe. Only 'dead' is supported.
+        :param: rule: The Life-like Rule to run. Defaults to Conway's B3/S23.
+        :param: block_rows: The number of rows stepped at once.
+        """
+        super().__init__(rows, cols, boundary, rule)
+        self.block_rows = block_rows
+        self._next_state = self.rule.bitplane_function()
+        word_cols = -(-cols // 64)
+
+        # Keep a dead row above and below the board so every block can read the rows around it.
+        self._buffer = np.zeros((rows + 2, word_cols), dtype=np.uint64)
+        self._next = np.zeros_like(self._buffer)
+        self.words = self._buffer[1:-1]
+
+        # Mask off the bits past the last column so cells there never come alive.
+        self._tail = np.uint64((1 << (cols - (word_cols - 1) * 64)) - 1)
+
+    def step(self):
+        for start in range(0, self.rows, self.block_rows):
+            stop = min(start + self.block_rows, self.rows)
+            alive = self._buffer[start + 1:stop + 1]
+
+            # Apply the rule to the bit-planes of the neighbor counts, e.g. for B3/S23 a cell is alive in the next
+            # generation if it has 3 neighbors, or 2 neighbors and is alive already.
+            ones, twos, fours, eights = count_neighbors(self._buffer[start:stop + 2])
+            self._next[start + 1:stop + 1] = self._next_state(alive, ones, twos, fours, eights)
+        self._next[1:-1, -1] &= self._tail
+
+        # Find the inverted cells from the words that changed, then swap the buffers.
+        inverse = self._next ^ self._buffer
+        rows, word_cols = np.nonzero(inverse)
+        self._buffer, self._next = self._next, self._buffer
+        self.words = self._buffer[1:-1]
+        self.generation += 1
+        return unpack_words(inverse[rows, word_cols], rows - 1, word_cols)
+
+    def _inside(self, cells):
+        """Get a mask of the cells which lie inside of the universe."""
+        return ((cells[:, 0] >= 0) & (cells[:, 0] < self.rows) &
+                (cells[:, 1] >= 0) & (cells[:, 1] < self.cols))
+
+    def get_cells(self, cells):
+        cells = as_cells(cells)
+        inside = self._inside(cells)
+        state = np.zeros(len(cells), dtype=bool)
+        rows, cols = cells[inside, 0], cells[inside, 1]
+        state[inside] = (self.words[rows, cols >> 6] >> (cols & 63).astype(np.uint64)) & _ONE
+        return state
+
+    def set_cells(self, cells, state):
+        cells = as_cells(cells)
+        state = np.broadcast_to(np.asarray(state, dtype=bool), (len(cells),))
+        inside = self._inside(cells)
+        cells, state = cells[inside], state[inside]
+
+        # Keep only the last edit of each cell so that the set and clear passes cannot conflict.
+        _, first = np.unique((cells[:, 0] * self.cols + cells[:, 1])[::-1], return_index=True)
+        cells, state = cells[::-1][first], state[::-1][first]
+        rows, cols = cells[:, 0], cells[:, 1]
+        bits = _ONE << (cols & 63).astype(np.uint64)
+        np.bitwise_and.at(self.words, (rows[~state], cols[~state] >> 6), ~bits[~state])
+        np.bitwise_or.at(self.words, (rows[state], cols[state] >> 6), bits[state])
+
+    def get_region(self, row, col, rows, cols):
+        region = np.zeros((rows, cols), dtype=bool)
+
+        # Clip the region to the universe and unpack only the words that overlap it.
+        top, left = max(row, 0), max(col, 0)
+        bottom, right = min(row + rows, self.rows), min(col + cols, self.cols)
+        if top < bottom and left < right:
+            words = np.ascontiguousarray(self.words[top:bottom, left >> 6:-(-right // 64)]).astype('<u8')
+            bits = np.unpackbits(words.view(np.uint8), axis=1, bitorder='little')
+            region[top - row:bottom - row, left - col:right - col] = bits[:, left & 63:(left & 63) + right - left]
+        return region
+
+    def adopt(self, buffer):
+        """Use an array of words as the board without copying it, e.g. the words of a memory-mapped checkpoint.
+
+        :param: buffer: A writable (rows + 2, word columns) array of words laid out like the board, with a dead row
+        above and below it.
+
+        :return: Void.
+        """
+        if buffer.shape != self._buffer.shape:
+            raise ValueError('expected words of shape {}, got {}'.format(self._buffer.shape, buffer.shape))
+        self._buffer = np.asarray(buffer, dtype=np.uint64)
+        self.words = self._buffer[1:-1]
+
+    def live_cells(self):
+        rows, word_cols = np.nonzero(self.words)
+        return unpack_words(self.words[rows, word_cols], rows, word_cols)
+
+    def population(self):
+        return int(_POPCOUNT[self.words.astype('<u8').view(np.uint8)].sum(dtype=np.int64))
@@ -0,0 +1,109 @@
+"""Camera module. Maps positions on the display to cells of the universe and back."""
+
+
+class Camera:
+    """The part of the universe shown on the display, given by an offset and a scale.
+
+    The universe is laid out on a plane of pixels where cell (row, col) covers the pixels from (col * cell_width,
+    row * cell_height) onwards. The camera shows the window sized part of that plane whose top left hand corner is at
+    (x, y). All positions are whole pixels, so mapping between the display and the cells is plain integer arithmetic,
+    and panning or zooming only changes a few numbers.
+
+    When zoomed out past one pixel per cell, the camera shows blocks of 2 ** level x 2 ** level cells instead of cells,
+    see the lod module, and cell_width and cell_height are the size of a block. Everything but cell_at and
+    cell_position then counts in blocks.
+    """
+
+    def __init__(self, size, cell_width, cell_height, x=0, y=0, level=0):
+        """Create a camera.
+
+        :param: size: The (width, height) of the display.
+        :param: cell_width: The width of a single cell (cell).
+        :param: cell_height: The height of a single cell (cell).
+        :param: x: The position on the plane of the left hand edge of the display.
+        :param: y: The position on the plane of the top edge of the display.
+        :param: level: The level of detail. 0 shows single cells.
+        """
+        self.width, self.height = size
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        self.x = x
+        self.y = y
+        self.level = level
+
+    def state(self):
+        """Get everything that decides what the camera shows, to tell whether it moved.
+
+        :return: A tuple of the position, cell size and level.
+        """
+        return self.x, self.y, self.cell_width, self.cell_height, self.level
+
+    def viewport(self):
+        """Get the region of the universe shown on the display, in blocks of the level of the camera.
+
+        The size of the region only depends on the cell size, so it stays the same while panning.
+
+        :return: row, col, rows, cols: The top left hand cell of the region and its number of rows and columns.
+        """
+        # Round up and add one so that partly visible cells at both edges are always included.
+        return (self.y // self.cell_height, self.x // self.cell_width,
+                -(-self.height // self.cell_height) + 1, -(-self.width // self.cell_width) + 1)
+
+    def offset(self):
+        """Get the position on the display of the top left hand cell of the viewport.
+
+        :return: x, y: The position. Both are zero or negative.
+        """
+        return (self.x // self.cell_width * self.cell_width - self.x,
+                self.y // self.cell_height * self.cell_height - self.y)
+
+    def cell_at(self, position):
+        """Get the cell under a position on the display.
+
+        :param: position: The (x, y) position on the display.
+
+        :return: row, col: The cell under the position. When zoomed out, the top left hand cell of the block under it.
+        """
+        return ((self.y + position[1]) // self.cell_height << self.level,
+                (self.x + position[0]) // self.cell_width << self.level)
+
+    def cell_position(self, cell):
+        """Get the position on the display of the top left hand corner of a cell.
+
+        :param: cell: The (row, col) of the cell.
+
+        :return: x, y: The position on the display. When zoomed out, the position of the block holding the cell.
+        """
+        return (cell[1] >> self.level) * self.cell_width - self.x, (cell[0] >> self.level) * self.cell_height - self.y
+
+    def pan(self, dx, dy):
+        """Move the universe across the display.
+
+        :param: dx: The number of pixels to move the universe to the right.
+        :param: dy: The number of pixels to move the universe down.
+
+        :return: Void.
+        """
+        self.x -= dx
+        self.y -= dy
+
+    def zoom(self, cell_width, cell_height, anchor, level=None):
+        """Change the size of a cell on the display, keeping the point of the universe under the anchor in place.
+
+        :param: cell_width: The new width of a single cell (cell).
+        :param: cell_height: The new height of a single cell (cell).
+        :param: anchor: The (x, y) position on the display to zoom around, e.g. the mouse position.
+        :param: level: The new level of detail. Defaults to the current one.
+
+        :return: Void.
+        """
+        level = self.level if level is None else level
+
+        # Scale the position by the change of the number of pixels per cell, which is the block size over 2 ** level.
+        # Round to the nearest pixel so that zooming out and back in again ends up where it started.
+        width, height = self.cell_width << level, self.cell_height << level
+        self.x = (((self.x + anchor[0]) * cell_width << self.level) + width // 2) // width - anchor[0]
+        self.y = (((self.y + anchor[1]) * cell_height << self.level) + height // 2) // height - anchor[1]
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        self.level = level
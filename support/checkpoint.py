@@ -0,0 +1,263 @@
+"""Checkpoint module. Holds a binary file format that saves and restores the whole state of an engine quickly.
+
+Nothing in this module depends on pygame so that long headless runs can be saved, resumed and recorded.
+
+A checkpoint file starts with a fixed size header followed by the cells of a rectangular region of the universe, one
+bit per cell, laid out exactly like the words of the bit-packed backend: one row of little endian uint64 words after
+another, bit b of word w holding column w * 64 + b, with a row of dead words above and below the region. Loading a
+checkpoint maps the file into memory instead of parsing it, and a bit-packed engine adopts the mapped words as its
+board as they are.
+
+A checkpoint may be followed by delta records, one per generation, each holding the cells which were inverted in that
+generation. Recording a run costs one small write per generation, and replaying it inverts the recorded cells in turn.
+"""
+
+import mmap
+import struct
+import numpy as np
+from .backends import BOUNDARIES
+from .bitgrid import BitPackedEngine, unpack_words
+from .engine import as_cells
+from .rules import Rule
+
+# The extension of checkpoint files.
+CHECKPOINT_EXTENSION = '.ckpt'
+
+# The first bytes of every checkpoint file, and the version of the format.
+MAGIC = b'LIFECKPT'
+VERSION = 2
+
+# The header: magic, version, boundary policy, rule, generation, then the row, col, rows and cols of the stored region
+# and the number of words per row. The rule holds a bit per birth count in its low 16 bits and a bit per survival count
+# in its high 16 bits. The header is 64 bytes long so the words that follow it are aligned.
+_HEADER = struct.Struct('<8sHHI6q')
+
+# The header of a delta record: generation, number of cells and bytes per coordinate.
+_RECORD = struct.Struct('<qqI4x')
+
+# The number of rows of the region read from an engine at a time when saving it.
+_BAND_ROWS = 256
+
+
+class Checkpoint:
+    """A checkpoint file mapped into memory.
+
+    The words are only read from the file as they are used, so opening a checkpoint costs the same whatever its size.
+    """
+
+    def __init__(self, path):
+        """Open a checkpoint file.
+
+        :param: path: The path of the file.
+        """
+        with open(path, 'rb') as file:
+            self._data = np.frombuffer(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY), dtype=np.uint8)
+        if len(self._data) < _HEADER.size:
+            raise ValueError('{} is not a checkpoint file'.format(path))
+        magic, version, boundary, rule, self.generation, self.row, self.col, self.rows, self.cols, word_cols = \
+            _HEADER.unpack_from(self._data)
+        if magic != MAGIC:
+            raise ValueError('{} is not a checkpoint file'.format(path))
+        if version != VERSION:
+            raise ValueError('{} is a version {} checkpoint, only version {} is understood'.format(
+                path, version, VERSION))
+        if not 0 <= boundary < len(BOUNDARIES):
+            raise ValueError('{} has boundary policy {}, only 0 to {} are understood'.format(
+                path, boundary, len(BOUNDARIES) - 1))
+        self.boundary = BOUNDARIES[boundary]
+        if rule & ~0x1ff01ff:
+            raise ValueError('{} has rule {:#x}, only neighbor counts 0 to 8 are understood'.format(path, rule))
+        self.rule = Rule((count for count in range(9) if rule >> count & 1),
+                         (count for count in range(9) if rule >> (16 + count) & 1))
+
+        # Point the words at the body without copying it. Writes to them are private to the process.
+        self._body_end = _HEADER.size + (self.rows + 2) * word_cols * 8
+        if len(self._data) < self._body_end:
+            raise ValueError('{} is truncated'.format(path))
+        self.buffer = self._data[_HEADER.size:self._body_end].view('<u8').reshape(self.rows + 2, word_cols)
+        self.words = self.buffer[1:-1]
+
+    def live_cells(self):
+        """Get the alive cells of the stored region.
+
+        :return: An (N, 2) array holding the alive cells.
+        """
+        rows, word_cols = np.nonzero(self.words)
+        return unpack_words(self.words[rows, word_cols], rows, word_cols) + (self.row, self.col)
+
+    def deltas(self):
+        """Read the delta records that follow the stored region, in the order they were recorded.
+
+        A record cut short, e.g. because the recording was interrupted, ends the records.
+
+        :return: Generator of (generation, cells): The generation reached and an (N, 2) array of the distinct cells
+        which were inverted to reach it.
+        """
+        offset = self._body_end
+        while offset + _RECORD.size <= len(self._data):
+            generation, count, width = _RECORD.unpack_from(self._data, offset)
+            offset += _RECORD.size
+            if offset + count * 2 * width > len(self._data):
+                return
+            cells = self._data[offset:offset + count * 2 * width].view('<i{}'.format(width)).reshape(count, 2)
+            offset += count * 2 * width
+            yield generation, cells.astype(np.int64)
+
+
+def _bounds(engine):
+    """Get the region of an engine to store in a checkpoint: all of a bounded one, or the alive cells of another."""
+    if engine.rows is not None:
+        return 0, 0, engine.rows, engine.cols
+    cells = engine.live_cells()
+    if not len(cells):
+        return 0, 0, 0, 0
+    (top, left), (bottom, right) = cells.min(axis=0).tolist(), cells.max(axis=0).tolist()
+    return top, left, bottom - top + 1, right - left + 1
+
+
+def _pack_rule(rule):
+    """Pack a rule into the 32 bits of the header."""
+    return sum(1 << count for count in rule.birth) | sum(1 << (16 + count) for count in rule.survival)
+
+
+def write_checkpoint(file, engine):
+    """Write the state of an engine to a file as a checkpoint.
+
+    :param: file: The open binary file to write to.
+    :param: engine: The simulation engine that stores the state of each cell.
+
+    :return: Void.
+    """
+    row, col, rows, cols = _bounds(engine)
+    word_cols = -(-cols // 64)
+    file.write(_HEADER.pack(MAGIC, VERSION, BOUNDARIES.index(engine.boundary), _pack_rule(engine.rule),
+                            engine.generation, row, col, rows, cols, word_cols))
+    border = bytes(word_cols * 8)
+    file.write(border)
+
+    if isinstance(engine, BitPackedEngine):
+        # The words of the engine are the body already.
+        file.write(engine.words.astype('<u8').tobytes())
+    else:
+        # Pack the region into words a band of rows at a time, padding every row to a whole number of words.
+        for top in range(row, row + rows, _BAND_ROWS):
+            region = engine.get_region(top, col, min(_BAND_ROWS, row + rows - top), cols)
+            words = np.zeros((len(region), word_cols * 8), dtype=np.uint8)
+            words[:, :-(-cols // 8)] = np.packbits(region, axis=1, bitorder='little')
+            file.write(words.tobytes())
+    file.write(border)
+
+
+def save_checkpoint(path, engine):
+    """Save the state of an engine to a checkpoint file.
+
+    :param: path: The path of the file.
+    :param: engine: The simulation engine that stores the state of each cell.
+
+    :return: Void.
+    """
+    with open(path, 'wb') as file:
+        write_checkpoint(file, engine)
+
+
+def load_checkpoint(path):
+    """Open a checkpoint file without reading its cells.
+
+    :param: path: The path of the file.
+
+    :return: A Checkpoint.
+    """
+    return Checkpoint(path)
+
+
+def restore_checkpoint(checkpoint, engine):
+    """Make an engine hold the state stored in a checkpoint.
+
+    A bit-packed engine of the same size as the stored region adopts the mapped words as they are. Any other engine
+    gets the alive cells of the checkpoint, at the position they were saved at.
+
+    :param: checkpoint: The Checkpoint to restore.
+    :param: engine: The simulation engine to restore into. Its alive cells are replaced. It must have the boundary
+    policy and the rule the checkpoint was saved with, or ValueError is raised.
+
+    :return: Void.
+    """
+    if engine.boundary != checkpoint.boundary:
+        raise ValueError('the checkpoint was saved with the {} boundary, not {}'.format(
+            checkpoint.boundary, engine.boundary))
+    if engine.rule != checkpoint.rule:
+        raise ValueError('the checkpoint was saved with rule {}, not {}'.format(checkpoint.rule, engine.rule))
+    if (isinstance(engine, BitPackedEngine) and (checkpoint.row, checkpoint.col) == (0, 0) and
+            (checkpoint.rows, checkpoint.cols) == (engine.rows, engine.cols)):
+        engine.adopt(checkpoint.buffer)
+    else:
+        engine.set_cells(engine.live_cells(), False)
+        engine.set_cells(checkpoint.live_cells(), True)
+    engine.generation = checkpoint.generation
+
+
+def apply_delta(engine, cells):
+    """Invert the given cells of an engine, e.g. to replay a delta record.
+
+    :param: engine: The simulation engine.
+    :param: cells: An (N, 2) array of distinct cells to invert.
+
+    :return: Void.
+    """
+    engine.set_cells(cells, ~engine.get_cells(cells))
+
+
+def replay(path, engine, generation=None):
+    """Restore the checkpoint of a recording into an engine and replay the recorded generations.
+
+    :param: path: The path of the recording, see Recorder.
+    :param: engine: The simulation engine to replay into. Its alive cells are replaced.
+    :param: generation: The generation to stop at. Defaults to the last one recorded.
+
+    :return: Void.
+    """
+    checkpoint = load_checkpoint(path)
+    restore_checkpoint(checkpoint, engine)
+    for reached, cells in checkpoint.deltas():
+        if generation is not None and reached > generation:
+            break
+        apply_delta(engine, cells)
+        engine.generation = reached
+
+
+class Recorder:
+    """Record a run to a file: a checkpoint of the starting state followed by one delta record per generation.
+
+    Call close when done to flush the file.
+    """
+
+    def __init__(self, path, engine):
+        """Start a recording from the current state of an engine.
+
+        :param: path: The path of the file to record to.
+        :param: engine: The simulation engine to record.
+        """
+        self._file = open(path, 'wb')
+        write_checkpoint(self._file, engine)
+
+    def record(self, generation, cells):
+        """Append a delta record.
+
+        :param: generation: The generation reached.
+        :param: cells: An (N, 2) array of the distinct cells which were inverted to reach it.
+
+        :return: Void.
+        """
+        # Store the coordinates in 32 bits when they fit, which they nearly always do.
+        cells = as_cells(cells)
+        small = not len(cells) or (cells.min() >= -2 ** 31 and cells.max() < 2 ** 31)
+        cells = cells.astype('<i4' if small else '<i8')
+        self._file.write(_RECORD.pack(generation, len(cells), cells.itemsize))
+        self._file.write(cells.tobytes())
+
+    def close(self):
+        """Flush and close the file.
+
+        :return: Void.
+        """
+        self._file.close()
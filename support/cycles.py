@@ -0,0 +1,140 @@
+"""Cycle detection module. Tells when a universe has settled into still lifes or oscillators.
+
+Every cell is given a pseudo-random 64 bit number computed from its position, and the hash of a generation is the XOR
+of the numbers of its alive cells (Zobrist hashing). Inverting a cell XORs its number into the hash, so the hash of the
+next generation follows from the cells a step inverted, at a cost that only depends on how many there are. A
+generation whose hash was seen a few generations before repeats that generation, and the universe cycles from then on
+with the distance between them as its period. A still life, or an empty universe, has period 1.
+
+Cycles only count when every cell is back in the same place, so moving patterns such as gliders never cycle on an
+unbounded universe.
+"""
+
+import collections
+import numpy as np
+from .sparse import pack
+
+# The longest period looked for by default, in generations.
+DEFAULT_WINDOW = 256
+
+# The actions taken when a cycle is found. 'report' only tells, 'pause' pauses an interactive game, 'stop' ends a
+# headless run and 'skip' saves the work of computing the cycle again.
+ACTIONS = ('report', 'pause', 'stop', 'skip')
+
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def zobrist(cells):
+    """Get the pseudo-random number of each cell, by putting its position through the SplitMix64 finalizer.
+
+    :param: cells: An (N, 2) array of cells.
+
+    :return: An array of N uint64 numbers.
+    """
+    keys = pack(cells).astype(np.uint64) + _GOLDEN
+    keys = (keys ^ (keys >> np.uint64(30))) * _MIX_1
+    keys = (keys ^ (keys >> np.uint64(27))) * _MIX_2
+    return keys ^ (keys >> np.uint64(31))
+
+
+def state_hash(cells):
+    """Get the hash of a set of cells.
+
+    :param: cells: An (N, 2) array of distinct cells.
+
+    :return: The hash, as an int.
+    """
+    return int(np.bitwise_xor.reduce(zobrist(cells))) if len(cells) else 0
+
+
+class CycleDetector:
+    """Step an engine while keeping the hashes of its recent generations to find when it starts to cycle.
+
+    Once a cycle is found the detector can skip it. Stepping records the cells inverted by one more period, and from
+    then on plays them back instead of stepping the engine, which only costs as much as the cells that change. Headless
+    runs can skip whole periods at once with skip_to.
+    """
+
+    def __init__(self, engine, window=DEFAULT_WINDOW, skip=False):
+        """Start watching an engine from its current state.
+
+        :param: engine: The simulation engine.
+        :param: window: The number of recent generations to remember, which is the longest period that can be found.
+        :param: skip: Whether to play back a cycle once one is found instead of stepping the engine.
+        """
+        self.engine = engine
+        self.window = window
+        self.skip = skip
+        self.hash = state_hash(engine.live_cells())
+        self.forget()
+
+    def forget(self):
+        """Forget the recent generations and any cycle found, e.g. after the universe was edited.
+
+        :return: Void.
+        """
+        self.period = None
+        self._seen = {self.hash: self.engine.generation}
+        self._order = collections.deque([self.hash])
+        self._cycle = []
+        self._start = None
+
+    def invert(self, cells):
+        """Update the hash after cells were inverted other than by stepping, e.g. by an edit or a jump.
+
+        :param: cells: An (N, 2) array of the distinct cells which were inverted.
+
+        :return: Void.
+        """
+        self.hash ^= state_hash(cells)
+        self.forget()
+
+    def step(self):
+        """Advance the engine by one generation, playing the cycle back if one was found and skipping is on.
+
+        :return: cells, period: An (N, 2) array holding the cells whose state was inverted, and the period of the cycle
+        if one was found at this generation, None otherwise.
+        """
+        if self._start is not None and len(self._cycle) == self.period:
+            # Invert the cells inverted at the same point of the cycle before.
+            cells = self._cycle[(self.engine.generation - self._start) % self.period]
+            self.engine.set_cells(cells, ~self.engine.get_cells(cells))
+            self.engine.generation += 1
+            self.hash ^= state_hash(cells)
+            return cells, None
+
+        cells = self.engine.step()
+        self.hash ^= state_hash(cells)
+        if self._start is not None:
+            self._cycle.append(cells)
+            return cells, None
+
+        # Look the hash up among the recent generations, then remember it in place of the oldest one.
+        generation = self.engine.generation
+        period = None
+        if self.hash in self._seen and self.period is None:
+            period = self.period = generation - self._seen[self.hash]
+            if self.skip:
+                self._start = generation
+        self._seen[self.hash] = generation
+        self._order.append(self.hash)
+        if len(self._order) > self.window:
+            oldest = self._order.popleft()
+            if self._seen.get(oldest, generation) <= generation - self.window:
+                del self._seen[oldest]
+        return cells, period
+
+    def skip_to(self, generation):
+        """Move the engine on by as many whole periods of its cycle as fit before a generation, without stepping it.
+
+        :param: generation: The generation not to go past.
+
+        :return: The number of generations skipped. 0 if no cycle was found yet.
+        """
+        if self.period is None:
+            return 0
+        skipped = (generation - self.engine.generation) // self.period * self.period
+        self.engine.generation += max(skipped, 0)
+        return max(skipped, 0)
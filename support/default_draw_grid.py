@@ -12,7 +12,7 @@ def default_draw_grid(window, block_width, block_height):
     line_color = (180, 180, 180)
 
     # Grab the window dimensions.
-    w, h = pygame.display.get_surface().get_size()
+    w, h = window.get_size()
 
     # Initialise Box position dictionary
 
@@ -22,7 +22,7 @@ def default_draw_grid(window, block_width, block_height):
         x.append(i)
 
     # Draw horizontal lines beginning at the origin and ending at the width of the window
-    for i in range(0, w, block_height):
+    for i in range(0, h, block_height):
         pygame.draw.line(window, line_color, (00, i), (w, i), 1)
         y.append(i)
 
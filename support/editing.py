@@ -0,0 +1,251 @@
+"""Editing module. Turns mouse strokes and region commands into batches of cell edits.
+
+Nothing in this module depends on pygame so that edits can be built and applied headless.
+
+Every shape is computed as a whole array of cells at once. The editor gathers the edits made between two frames and
+hands them over as a single (cells, state) batch, which the game sends to the engine as one write, so the next frame
+redraws all of them in one display update however many cells they cover.
+"""
+
+import numpy as np
+from .engine import as_cells
+
+# The largest brush diameter, in cells.
+MAX_BRUSH_SIZE = 64
+
+# The most cells a rectangle or random fill may cover. The visible part of the universe is well within it whenever
+# single cells are shown.
+MAX_FILL_CELLS = 1 << 22
+
+# The ways the editor applies a drag: painting along the path of the mouse, filling or clearing the rectangle it spans,
+# or filling that rectangle at random.
+MODES = ('draw', 'rectangle', 'random')
+
+
+def line(start, end):
+    """Get the cells of the line between two cells, both included, as Bresenham's algorithm draws it.
+
+    The line takes one cell per step along its longer axis, with the other coordinate rounded to the nearest cell, so
+    consecutive cells always touch and there are no gaps however fast the mouse moves.
+
+    :param: start: The (row, col) cell the line starts at.
+    :param: end: The (row, col) cell the line ends at.
+
+    :return: An (N, 2) array of cells, in order from start to end.
+    """
+    start, end = np.asarray(start, dtype=np.int64), np.asarray(end, dtype=np.int64)
+    delta = end - start
+    steps = int(np.abs(delta).max())
+    if steps == 0:
+        return start.reshape(1, 2)
+
+    # Round step * delta / steps to the nearest integer with integer arithmetic, ties away from the start.
+    step = np.arange(steps + 1)[:, np.newaxis]
+    return start + np.sign(delta) * ((2 * step * np.abs(delta) + steps) // (2 * steps))
+
+
+def brush(size):
+    """Get the cells covered by a round brush, relative to its centre.
+
+    :param: size: The diameter of the brush in cells. 1 covers a single cell.
+
+    :return: An (N, 2) array of offsets.
+    """
+    radius = (size - 1) / 2
+    low = -(size // 2)
+    offsets = np.argwhere(np.ones((size, size), dtype=bool)) + low
+
+    # Keep the cells whose centre lies within the circle, measured from the centre of the brush.
+    centre = low + radius
+    return offsets[((offsets - centre) ** 2).sum(axis=1) <= radius * radius + radius + 0.5]
+
+
+def stroke(points, offsets):
+    """Get the cells painted by dragging a brush along a path.
+
+    :param: points: The (row, col) cells the path goes through, in order. Consecutive points are joined by lines.
+    :param: offsets: The brush, see brush.
+
+    :return: An (N, 2) array of distinct cells.
+    """
+    points = as_cells(points)
+    path = np.concatenate([line(points[index], points[index + 1]) for index in range(len(points) - 1)] or [points])
+    return np.unique((path[:, np.newaxis] + offsets).reshape(-1, 2), axis=0)
+
+
+def _span(corner, other):
+    """Get the top, left, bottom and right of the rectangle spanned by two opposite corners, both included."""
+    (top, bottom), (left, right) = sorted((corner[0], other[0])), sorted((corner[1], other[1]))
+    return top, left, bottom, right
+
+
+def rectangle(corner, other):
+    """Get the cells of the rectangle spanned by two opposite corners, both included.
+
+    :param: corner: A (row, col) corner.
+    :param: other: The opposite (row, col) corner.
+
+    :return: An (N, 2) array of cells.
+    """
+    top, left, bottom, right = _span(corner, other)
+    rows, cols = np.mgrid[top:bottom + 1, left:right + 1]
+    return np.stack((rows.ravel(), cols.ravel()), axis=1).astype(np.int64)
+
+
+class Editor:
+    """Build the edits of the user from mouse presses, drags and releases, and gather them until they are taken.
+
+    A drag in 'draw' mode paints with the brush along the path of the mouse. In 'rectangle' mode it fills or clears the
+    rectangle between where it started and where it ended, and in 'random' mode it makes cells of that rectangle alive
+    at random, each with the given density, leaving the others as they were. Patterns are pasted centred on a cell.
+    """
+
+    def __init__(self, brush_size=1, density=0.5, pattern=None, seed=None):
+        """Create an editor.
+
+        :param: brush_size: The diameter of the brush in cells.
+        :param: density: The probability of a cell being made alive by a random fill.
+        :param: pattern: An (N, 2) array of the cells to paste, e.g. from read_pattern in the patterns module, or None.
+        :param: seed: The seed of the random fills. Defaults to a fresh one.
+        """
+        self.density = density
+        self.set_brush_size(brush_size)
+        self.set_pattern(pattern)
+        self._random = np.random.default_rng(seed)
+        self._edits = []
+        self._mode = None
+        self._alive = True
+        self._anchor = self._last = None
+
+    def set_brush_size(self, size):
+        """Change the diameter of the brush, keeping it between 1 and MAX_BRUSH_SIZE cells.
+
+        :param: size: The diameter in cells.
+
+        :return: Void.
+        """
+        self.brush_size = min(max(int(size), 1), MAX_BRUSH_SIZE)
+        self._brush = brush(self.brush_size)
+
+    def set_pattern(self, cells):
+        """Change the pattern to paste.
+
+        :param: cells: An (N, 2) array of the cells of the pattern, or None to have nothing to paste.
+
+        :return: Void.
+        """
+        if cells is None or not len(cells):
+            self._pattern = None
+            return
+
+        # Keep the pattern with the middle of its bounding box at (0, 0).
+        cells = as_cells(cells)
+        low, high = cells.min(axis=0), cells.max(axis=0)
+        self._pattern = cells - (low + (high - low + 1) // 2)
+
+    def dragging(self):
+        """Check whether a drag is in progress.
+
+        :return: True between a press and its release.
+        """
+        return self._mode is not None
+
+    def last(self):
+        """Get where the mouse was last seen during a drag.
+
+        :return: The (row, col) cell, or None if no drag is in progress.
+        """
+        return self._last
+
+    def press(self, cell, alive=True, mode='draw'):
+        """Start a drag.
+
+        :param: cell: The (row, col) cell under the mouse.
+        :param: alive: True to make cells alive, False to make them dead. A random fill ignores it.
+        :param: mode: One of MODES.
+
+        :return: Void.
+        """
+        if mode not in MODES:
+            raise ValueError('unknown editing mode {!r}, use one of {}'.format(mode, ', '.join(MODES)))
+        self._mode, self._alive = mode, alive
+        self._anchor = self._last = tuple(cell)
+        if mode == 'draw':
+            self._edit(self._brush + cell, alive)
+
+    def drag(self, cell):
+        """Move the mouse during a drag. In 'draw' mode, paints the way from the last position.
+
+        :param: cell: The (row, col) cell under the mouse.
+
+        :return: Void.
+        """
+        if self._mode == 'draw' and tuple(cell) != self._last:
+            self._edit(stroke([self._last, cell], self._brush), self._alive)
+        if self._mode is not None:
+            self._last = tuple(cell)
+
+    def release(self, cell):
+        """End a drag. In 'rectangle' and 'random' mode, applies it to the rectangle it spans.
+
+        :param: cell: The (row, col) cell under the mouse.
+
+        :return: Void. Raises ValueError, after ending the drag, if the rectangle covers more than MAX_FILL_CELLS cells.
+        """
+        if self._mode is None:
+            return
+        self.drag(cell)
+        mode, anchor = self._mode, self._anchor
+        self.cancel()
+        if mode == 'draw':
+            return
+        top, left, bottom, right = _span(anchor, cell)
+        area = (bottom - top + 1) * (right - left + 1)
+        if area > MAX_FILL_CELLS:
+            raise ValueError('cannot fill {} cells, at most {} at once'.format(area, MAX_FILL_CELLS))
+        if mode == 'rectangle':
+            self._edit(rectangle(anchor, cell), self._alive)
+        else:
+            # Pick how many cells come alive, then which ones, rather than drawing a number for every cell.
+            count = self._random.binomial(area, self.density)
+            rows, cols = np.divmod(self._random.choice(area, count, replace=False), right - left + 1)
+            self._edit(np.stack((rows + top, cols + left), axis=1), True)
+
+    def cancel(self):
+        """End a drag without applying it. The cells painted so far stay painted.
+
+        :return: Void.
+        """
+        self._mode = self._anchor = self._last = None
+
+    def paste(self, cell):
+        """Paste the pattern centred on a cell, making its cells alive. Does nothing if there is no pattern.
+
+        :param: cell: The (row, col) cell.
+
+        :return: Void.
+        """
+        if self._pattern is not None:
+            self._edit(self._pattern + cell, True)
+
+    def _edit(self, cells, state):
+        """Gather an edit."""
+        self._edits.append((as_cells(cells), np.broadcast_to(np.asarray(state, dtype=bool), (len(cells),))))
+
+    def take(self):
+        """Take the edits gathered since the last call as one batch. Later edits of a cell win over earlier ones.
+
+        :return: cells, state: An (N, 2) array of cells and the boolean array of their new state, or None if there
+        were no edits.
+        """
+        if not self._edits:
+            return None
+        cells, state = zip(*self._edits)
+        self._edits = []
+        if len(cells) == 1:
+            return cells[0], state[0]
+
+        # Keep the last edit of each cell, so that engines applying the batch in any order agree.
+        cells, state = np.concatenate(cells)[::-1], np.concatenate(state)[::-1]
+        _, last = np.unique(cells, axis=0, return_index=True)
+        return cells[last], state[last]
@@ -0,0 +1,362 @@
+"""Simulation engine module. Holds the rules of the game and the grid backends that apply them.
+
+Nothing in this module depends on pygame so that the simulation can run headless, e.g. on a server without a display.
+Cells are addressed with (row, column) pairs and collections of cells are passed around as NumPy integer arrays of
+shape (N, 2).
+"""
+
+import numpy as np
+from .rules import CONWAY
+
+
+def get_live_neighbors(array, wrap=False):
+    """Get the number of 'alive' neighbors of every cell in the array.
+
+    A neighbor is any cell that is directly adjacent to the cell in question. Diagonals included.
+    All cells have 8 neighbors, cells outside of the array are counted as dead unless the array wraps around.
+
+    :param: array: The boolean array that stores the state of each cell. The last two axes are the rows and columns,
+    any axes before them index separate boards, e.g. a (boards, rows, cols) stack.
+    :param: wrap: Whether opposite edges of the array are joined together, making it a torus.
+
+    :return: count: An array of the same shape as the input holding the number of alive neighbors of each cell.
+    """
+    *boards, rows, cols = array.shape
+
+    # Surround the array with a border so that every cell has 8 neighbors. The border is dead, or a copy of the
+    # opposite edge if the array wraps around.
+    if wrap:
+        padded = np.pad(array.astype(np.uint8), [(0, 0)] * len(boards) + [(1, 1), (1, 1)], mode='wrap')
+    else:
+        padded = np.zeros((*boards, rows + 2, cols + 2), dtype=np.uint8)
+        padded[..., 1:-1, 1:-1] = array
+
+    # Add up the array shifted in each of the 8 directions. Each shifted view lines up a neighbor with the cell.
+    count = np.zeros(array.shape, dtype=np.uint8)
+    for i in range(3):
+        for j in range(3):
+            if (i != 1) or (j != 1):
+                count += padded[..., i:i + rows, j:j + cols]
+    return count
+
+
+def cell_die_or_live(live_neighbors, state, rule=CONWAY):
+    """Determine which cells will die, be revived or remain the same.
+
+    :param: live_neighbors: The number of alive neighbors of each cell.
+    :param: state: current state of each cell. False for dead, True for alive.
+    :param: rule: The Life-like rule to apply. Defaults to Conway's B3/S23.
+
+    :return: A boolean array which is True where a cell will die or be revived and False where it remains the same.
+    """
+    # Look up whether each cell should be inverted in the table of the rule, by its neighbor count and state.
+    return rule.inverted(live_neighbors, state)
+
+
+def as_cells(cells):
+    """Convert any sequence of (row, column) pairs into an (N, 2) integer array.
+
+    :param: cells: The cells to convert.
+
+    :return: The cells as an (N, 2) array of int64.
+    """
+    return np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+
+
+class Engine:
+    """Base class of the simulation backends.
+
+    A backend owns the state of the universe and advances it one generation at a time. The game loop and the headless
+    entry points only ever talk to a backend through the methods below, so backends can be swapped freely.
+
+    The boundary policy decides what happens at the edge of the universe: 'dead' surrounds it with dead cells, 'torus'
+    joins opposite edges together and 'infinite' has no edge at all, in which case rows and cols are None.
+
+    Every backend runs any Life-like rule, see the rules module, but rules under which cells come alive with no alive
+    neighbors (B0) need a bounded universe and a backend which looks at every cell.
+    """
+
+    # The boundary policies the backend supports. The first one is the default.
+    BOUNDARIES = ('dead',)
+
+    # Whether the backend spends its time in NumPy calls that release the GIL, so that it can step in a thread
+    # alongside the display without stalling it. Backends running pure Python code are stepped in a process instead.
+    RELEASES_GIL = True
+
+    # Whether the backend steps dead cells with no alive neighbors, so that it can run B0 rules.
+    STEPS_EVERY_CELL = True
+
+    def __init__(self, rows, cols, boundary=None, rule=None):
+        """Create an empty universe.
+
+        :param: rows: The number of rows of the universe.
+        :param: cols: The number of columns of the universe.
+        :param: boundary: The boundary policy of the universe. Defaults to the first one the backend supports.
+        :param: rule: The Life-like Rule to run. Defaults to Conway's B3/S23.
+        """
+        boundary = boundary or self.BOUNDARIES[0]
+        rule = rule or CONWAY
+        self.check(boundary, rule)
+        if boundary == 'infinite':
+            rows = cols = None
+
+        self.rows = rows
+        self.cols = cols
+        self.boundary = boundary
+        self.rule = rule
+        self.generation = 0
+
+    @classmethod
+    def check(cls, boundary=None, rule=None):
+        """Check that the backend can run a universe with a boundary policy and a rule.
+
+        :param: boundary: The boundary policy. Defaults to the first one the backend supports.
+        :param: rule: The Life-like Rule. Defaults to Conway's B3/S23.
+
+        :return: Void. Raises ValueError if it cannot.
+        """
+        boundary = boundary or cls.BOUNDARIES[0]
+        if boundary not in cls.BOUNDARIES:
+            raise ValueError('{} does not support the {!r} boundary, use one of {}'.format(
+                cls.__name__, boundary, ', '.join(cls.BOUNDARIES)))
+        if rule is not None and rule.births_from_nothing() and (boundary == 'infinite' or not cls.STEPS_EVERY_CELL):
+            raise ValueError('{} cannot run {}: cells with no alive neighbors come alive, which needs a bounded '
+                             'universe and a backend stepping every cell'.format(cls.__name__, rule))
+
+    def step(self):
+        """Advance the universe by one generation.
+
+        :return: An (N, 2) array holding the cells whose state was inverted.
+        """
+        raise NotImplementedError
+
+    def run(self, generations):
+        """Advance the universe by a number of generations.
+
+        :param: generations: The number of generations to run.
+
+        :return: Void.
+        """
+        for _ in range(generations):
+            self.step()
+
+    def generations(self, count=None):
+        """Step the universe and yield the cells that were inverted after every generation.
+
+        :param: count: The number of generations to run. Runs forever if None.
+
+        :return: Generator of (N, 2) arrays of inverted cells.
+        """
+        while count is None or count > 0:
+            yield self.step()
+            if count is not None:
+                count -= 1
+
+    def get_cells(self, cells):
+        """Get the state of the given cells.
+
+        :param: cells: The (row, column) pairs of the cells.
+
+        :return: A boolean array holding the state of each cell. Cells outside of the universe are dead.
+        """
+        raise NotImplementedError
+
+    def set_cells(self, cells, state):
+        """Set the state of the given cells. Cells outside of a bounded universe are ignored.
+
+        :param: cells: The (row, column) pairs of the cells.
+        :param: state: The new state, either a single boolean or one boolean per cell.
+
+        :return: Void.
+        """
+        raise NotImplementedError
+
+    def get_region(self, row, col, rows, cols):
+        """Get the state of a rectangular region of the universe.
+
+        :param: row: The row of the top left hand corner of the region.
+        :param: col: The column of the top left hand corner of the region.
+        :param: rows: The number of rows in the region.
+        :param: cols: The number of columns in the region.
+
+        :return: A rows x cols boolean array. Cells outside of the universe are dead.
+        """
+        raise NotImplementedError
+
+    def live_cells(self):
+        """Get all alive cells.
+
+        :return: An (N, 2) array holding the alive cells.
+        """
+        raise NotImplementedError
+
+    def population(self):
+        """Get the number of alive cells.
+
+        :return: The number of alive cells.
+        """
+        return len(self.live_cells())
+
+    def close(self):
+        """Release any resources held by the backend, such as worker processes.
+
+        :return: Void.
+        """
+
+
+class DenseEngine(Engine):
+    """Backend storing the universe as a boolean NumPy array and stepping it in one vectorized pass."""
+
+    BOUNDARIES = ('dead', 'torus')
+
+    def __init__(self, rows, cols, boundary=None, rule=None):
+        super().__init__(rows, cols, boundary, rule)
+        self.array = np.zeros((rows, cols), dtype=bool)
+
+    def step(self):
+        # Work out which cells need to be inverted and invert them all at once.
+        inverse = cell_die_or_live(get_live_neighbors(self.array, self.boundary == 'torus'), self.array, self.rule)
+        self.array ^= inverse
+        self.generation += 1
+        return np.argwhere(inverse)
+
+    def _inside(self, cells):
+        """Get a mask of the cells which lie inside of the universe."""
+        return ((cells[:, 0] >= 0) & (cells[:, 0] < self.rows) &
+                (cells[:, 1] >= 0) & (cells[:, 1] < self.cols))
+
+    def get_cells(self, cells):
+        cells = as_cells(cells)
+        inside = self._inside(cells)
+        state = np.zeros(len(cells), dtype=bool)
+        state[inside] = self.array[cells[inside, 0], cells[inside, 1]]
+        return state
+
+    def set_cells(self, cells, state):
+        cells = as_cells(cells)
+        inside = self._inside(cells)
+        state = np.broadcast_to(np.asarray(state, dtype=bool), (len(cells),))
+        self.array[cells[inside, 0], cells[inside, 1]] = state[inside]
+
+    def get_region(self, row, col, rows, cols):
+        region = np.zeros((rows, cols), dtype=bool)
+
+        # Clip the region to the universe and copy over the part that overlaps.
+        top, left = max(row, 0), max(col, 0)
+        bottom, right = min(row + rows, self.rows), min(col + cols, self.cols)
+        if top < bottom and left < right:
+            region[top - row:bottom - row, left - col:right - col] = self.array[top:bottom, left:right]
+        return region
+
+    def live_cells(self):
+        return np.argwhere(self.array)
+
+    def population(self):
+        return int(np.count_nonzero(self.array))
+
+
+class ActiveEngine(DenseEngine):
+    """Backend which only re-evaluates the parts of the universe that changed in the previous generation.
+
+    The universe is split into square tiles. A tile is stepped only if a cell in it or in one of its 8 neighboring
+    tiles was inverted in the previous generation (or edited since), so areas which are dead or hold still lifes cost
+    nothing. The tiles that need stepping are gathered into one stacked array and stepped in a single vectorized pass.
+    """
+
+    BOUNDARIES = ('dead',)
+
+    def __init__(self, rows, cols, boundary=None, rule=None, tile_size=32):
+        """Create an empty universe.
+
+        :param: rows: The number of rows of the universe.
+        :param: cols: The number of columns of the universe.
+        :param: boundary: The boundary policy of the universe. Only 'dead' is supported.
+        :param: rule: The Life-like Rule to run. Defaults to Conway's B3/S23.
+        :param: tile_size: The width and height of a tile in cells.
+        """
+        super().__init__(rows, cols, boundary, rule)
+        self.tile_size = tile_size
+        tile_rows = -(-rows // tile_size)
+        tile_cols = -(-cols // tile_size)
+
+        # Store the universe inside a buffer rounded up to whole tiles with a border of dead cells, so that every tile
+        # and its ring of neighboring cells is a plain slice of the buffer. The public array is a view of the buffer.
+        self._buffer = np.zeros((tile_rows * tile_size + 2, tile_cols * tile_size + 2), dtype=bool)
+        self.array = self._buffer[1:rows + 1, 1:cols + 1]
+
+        # Mark which cells of the buffer belong to the universe so cells in the rounding never come alive.
+        valid = np.zeros(self._buffer.shape, dtype=bool)
+        valid[1:rows + 1, 1:cols + 1] = True
+        self._windows = np.lib.stride_tricks.sliding_window_view(
+            self._buffer, (tile_size + 2, tile_size + 2))[::tile_size, ::tile_size]
+        self._valid = np.lib.stride_tricks.sliding_window_view(
+            valid, (tile_size, tile_size), writeable=False)[1::tile_size, 1::tile_size]
+
+        # Every tile is stepped in the first generation.
+        self._dirty = np.ones((tile_rows, tile_cols), dtype=bool)
+
+    def active_tiles(self):
+        """Get the tiles that will be stepped in the next generation.
+
+        :return: A boolean array with one value per tile which is True where the tile will be stepped.
+        """
+        # A change in a tile can affect the cells along the edge of any of its neighbors, so grow the dirty tiles by one.
+        padded = np.zeros((self._dirty.shape[0] + 2, self._dirty.shape[1] + 2), dtype=bool)
+        padded[1:-1, 1:-1] = self._dirty
+        active = np.zeros(self._dirty.shape, dtype=bool)
+        for i in range(3):
+            for j in range(3):
+                active |= padded[i:i + self._dirty.shape[0], j:j + self._dirty.shape[1]]
+        return active
+
+    def step(self):
+        size = self.tile_size
+        active = self.active_tiles()
+        self.generation += 1
+        self._dirty[:] = False
+
+        # When most of the universe is active, gathering tiles costs more than it saves, so step everything at once.
+        if np.count_nonzero(active) > active.size // 2:
+            inverse = np.zeros((self._dirty.shape[0] * size, self._dirty.shape[1] * size), dtype=bool)
+            inverse[:self.rows, :self.cols] = cell_die_or_live(get_live_neighbors(self.array), self.array, self.rule)
+            self.array ^= inverse[:self.rows, :self.cols]
+            self._dirty[:] = inverse.reshape(self._dirty.shape[0], size, self._dirty.shape[1], size).any(axis=(1, 3))
+            return np.argwhere(inverse)
+
+        # Invert the cells. The tiles which changed are the ones to look at in the next generation.
+        inverse_indices = self._step_tiles(*np.nonzero(active))
+        self.array[inverse_indices[:, 0], inverse_indices[:, 1]] ^= True
+        self._dirty[inverse_indices[:, 0] // size, inverse_indices[:, 1] // size] = True
+        return inverse_indices
+
+    def _step_tiles(self, tile_rows, tile_cols):
+        """Work out which cells of the given tiles need to be inverted.
+
+        :param: tile_rows: The row index of each tile to step.
+        :param: tile_cols: The column index of each tile to step.
+
+        :return: An (N, 2) array holding the cells to invert.
+        """
+        size = self.tile_size
+
+        # Gather the tiles along with their ring of neighboring cells and count neighbors in the whole stack.
+        stack = self._windows[tile_rows, tile_cols].astype(np.uint8)
+        count = np.zeros((len(tile_rows), size, size), dtype=np.uint8)
+        for i in range(3):
+            for j in range(3):
+                if (i != 1) or (j != 1):
+                    count += stack[:, i:i + size, j:j + size]
+        state = stack[:, 1:-1, 1:-1].astype(bool)
+        inverse = cell_die_or_live(count, state, self.rule) & self._valid[tile_rows, tile_cols]
+
+        # Convert the positions of the inverted cells back into universe coordinates.
+        tile, row, col = np.nonzero(inverse)
+        return np.stack((tile_rows[tile] * size + row, tile_cols[tile] * size + col), axis=1).astype(np.int64)
+
+    def set_cells(self, cells, state):
+        cells = as_cells(cells)
+        super().set_cells(cells, state)
+
+        # Edited tiles have to be stepped in the next generation.
+        cells = cells[self._inside(cells)]
+        self._dirty[cells[:, 0] // self.tile_size, cells[:, 1] // self.tile_size] = True
@@ -2,28 +2,88 @@
 
 import pygame
 import sys
-import time
-from .drawGrid import draw_grid
-from .default_draw_grid import default_draw_grid
-
-
-def main_game(window, cell_width, cell_height):
+from .camera import Camera
+from .editing import Editor
+from .history import DEFAULT_BUDGET
+from .hud import Hud
+from .lod import LEVELS
+from .profiler import Profiler
+from .renderer import Renderer
+from .worker import SimulationWorker
+
+
+def main_game(window, cell_width, cell_height, engine_name='sparse', jump_generations=1024, boundary=None,
+              engine_options=None, generations_per_second=60, max_fps=60, worker_mode=None, pattern=None,
+              save_path='saved.rle', record_path=None, history_budget=DEFAULT_BUDGET, on_cycle='report', hud=False,
+              profiler=None, editor=None, metrics_path=None):
     """Run the game loop.
 
    :param: window: The pygame window object that display's the game.
    :param: cell_width: The width of a single cell (cell).
    :param: cell_height: The height of a single cell (cell).
+   :param: engine_name: The name of the simulation backend to use. See ENGINES in the backends module.
+   :param: jump_generations: The number of generations to jump ahead when shift and the right arrow key are pressed.
+   :param: boundary: The boundary policy of the universe. Defaults to the one of the backend.
+   :param: engine_options: Extra keyword arguments for the backend, e.g. the number of workers of the parallel one.
+   :param: generations_per_second: The target number of generations to run per second while the game runs.
+   :param: max_fps: The highest number of frames to draw per second.
+   :param: worker_mode: Whether to simulate in a 'thread' or a 'process'. Defaults to the best one for the backend.
+   :param: pattern: The path of a pattern file to load at the centre of the display, or None to start empty.
+   :param: save_path: The path of the pattern file to write the universe to when ctrl and S are pressed.
+   :param: record_path: The path of a file to record the run to, see the checkpoint module, or None not to record.
+   :param: history_budget: The most memory in bytes to spend remembering past generations to rewind to. 0 disables
+   rewinding.
+   :param: on_cycle: What to do once the universe settles into still lifes or oscillators, see ACTIONS in the cycles
+   module: 'report' to show the period in the title of the window, 'pause' to pause the game as well, or 'skip' to
+   play the cycle back instead of computing it. None not to look for cycles.
+   :param: hud: Whether to show the HUD from the start. F3 shows or hides it.
+   :param: profiler: The Profiler timing the phases of each frame, writing them to a trace file or profiling frames
+   with cProfile when F4 is pressed. Defaults to one which only times frames while the HUD is shown.
+   :param: editor: The Editor turning mouse drags into cell edits, holding the brush size, the density of random fills
+   and the pattern to paste. Defaults to a one cell brush with nothing to paste.
+   :param: metrics_path: The path of a .csv or .jsonl file to write the metrics of every generation to, see the metrics
+   module, or None not to write them.
 
    :return: Void.
    """
-    # Initialize a 2D array with False to represent initial state of all cells
-    array = array_init(cell_width, cell_height)
+    # Initialize the camera that decides which part of the universe is shown, the profiler timing each frame, and the
+    # renderer that draws the universe and the grid onto the window.
+    camera = Camera(window.get_size(), cell_width, cell_height)
+    profiler = profiler or Profiler()
+    renderer = Renderer(window, camera, profiler=profiler)
+
+    # Initialize a simulation engine with all cells dead, running in the background.
+    worker = worker_init(window, cell_width, cell_height, engine_name, boundary, engine_options, camera.viewport(),
+                         generations_per_second, worker_mode)
+
+    # Load the starting pattern, if any, in the middle of the display.
+    if pattern is not None:
+        row, col, rows, cols = camera.viewport()
+        worker.load(pattern, row + rows // 2, col + cols // 2)
+
+    # Record the run from the starting pattern onwards, if asked to.
+    if record_path is not None:
+        worker.record(record_path)
+
+    # Write the metrics of every generation from the starting pattern onwards, if asked to.
+    if metrics_path is not None:
+        worker.record_metrics(metrics_path)
+
+    # Remember the generations from the starting pattern onwards so the user can step back.
+    if history_budget:
+        worker.set_history(history_budget)
 
-    # Fill the scree with a grey background color
-    window.fill((128, 128, 128))
+    # Look for the universe settling down.
+    if on_cycle is not None:
+        worker.set_cycle_action(on_cycle)
 
-    # Initialize a 2D array that will hold the x and y positions of the grid on the display.
-    x_grid_position_array, y_grid_position_array = default_draw_grid(window, cell_width, cell_height)
+    # Initialize the editor the user changes cells with.
+    editor = editor or Editor()
+
+    # Initialize the HUD showing how fast the game runs, and have the worker keep the statistics a trace needs.
+    hud = Hud(window, renderer, profiler, worker, hud)
+    if profiler.tracing() and not hud.visible:
+        worker.set_stats(True)
 
     # Initialize a run variable to run game logic when user presses space.
     run = False
@@ -32,271 +92,247 @@ def main_game(window, cell_width, cell_height):
     # game, odd numbers resume.
     space_count = 0
 
-    # Main game while loop.
-    while True:
-        # Check all the events and execute logic.
-        run, space_count, cell_width, cell_height, x_grid_position_array, y_grid_position_array = check_events(window, array,
-                                                                 cell_width, cell_height, run, space_count, x_grid_position_array, y_grid_position_array)
-
-        # Check run variable. If true, run game logic.
-        if run:
-            run_game(window, array, cell_width, cell_height)
-
-        # Update game display with new drawing.
-        pygame.display.update()
-
-
-def check_events(window, array, cell_width, cell_height, run, space_count, x_grid_position_array, y_grid_position_array):
+    # Initialize the clock that caps the frame rate, and the last frame published by the worker.
+    clock = pygame.time.Clock()
+    frame = None
+    period = None
+    show_period(period)
+
+    # Main game while loop. Stop the worker however the loop ends.
+    try:
+        while True:
+            # Check all the events and execute logic. While the game is paused and the worker has nothing left to do,
+            # sleep until the next event arrives.
+            paused = not run
+            run, space_count = check_events(camera, worker, run, space_count, jump_generations,
+                                            block=paused and not worker.busy(), save_path=save_path, hud=hud,
+                                            editor=editor)
+            profiler.mark('events')
+
+            # Tell the worker if the game was paused or resumed, or if the visible part of the universe changed.
+            if run == paused:
+                worker.set_running(run)
+            if (camera.viewport(), camera.level) != (worker.viewport, worker.level):
+                worker.set_viewport(camera.viewport(), camera.level)
+
+            # Pick up the newest generation and draw its changes, updating the game display in one go. Right after
+            # zooming past single cells or back, wait for a frame of the new level of detail.
+            new_frame = show_frame(renderer, worker)
+            hud.update(new_frame)
+            frame = new_frame or frame
+
+            # Tell the user when a command failed in the worker, e.g. saving to a directory which does not exist.
+            error = worker.take_error()
+            if error is not None:
+                show_error(error)
+
+            # Tell the user when the universe settles into a cycle. If the worker paused itself, pause the game too.
+            if frame is not None and frame.period != period:
+                period = frame.period
+                show_period(period)
+                if period is not None and on_cycle == 'pause' and run:
+                    run = False
+                    space_count += 1
+            profiler.mark('frame')
+            drawn = frame is not None and frame.level == camera.level and renderer.render(frame)
+
+            # Lay the HUD over the universe, then wait for the next frame.
+            hud.draw(drawn)
+            profiler.mark('hud')
+            clock.tick(max_fps)
+            profiler.mark('wait')
+            if frame is not None:
+                profiler.end_frame(frame.generation, frame.stats[0] if frame.stats is not None else None,
+                                   len(new_frame.changed) if new_frame is not None else 0)
+    finally:
+        profiler.close()
+        worker.close()
+
+
+def check_events(camera, worker, run, space_count, jump_generations=1024, block=False, save_path='saved.rle',
+                 hud=None, editor=None):
     """Check all game events (user inputs) and handle them as needed.
 
-    :param: window: The pygame window object that display's the game.
-    :param: array: The boolean array that stores the state of each cell.
-    :param: cell_width: The width of a single cell (cell).
-    :param: cell_height: The height of a single cell (cell).
+    :param: camera: The camera deciding which part of the universe is shown.
+    :param: worker: The worker running the simulation engine that stores the state of each cell.
     :param: run: flag variable which stores whether game is in pause or run mode.
     :param: space_count: counter variable which holds how many times the space bar key has been pressed.
+    :param: jump_generations: The number of generations to jump ahead when shift and the right arrow key are pressed.
+    :param: block: Whether to wait for an event if there are none yet instead of returning straight away.
+    :param: save_path: The path of the pattern file to write the universe to when ctrl and S are pressed.
+    :param: hud: The HUD to show or hide when F3 is pressed, and whose profiler profiles frames when F4 is pressed.
+    :param: editor: The Editor turning mouse drags into cell edits. Defaults to a one cell brush.
 
-    :return: Void. No return, set the corresponding array value to True and color the respective cell yellow.
+    :return: run flag and space count.
     """
+    # Gather the pending events (user inputs), waiting for one if asked to.
+    editor = editor or Editor()
+    events = pygame.event.get()
+    if block and not events:
+        events = [pygame.event.wait()]
+
     # Loop through all events (user inputs)
-    for event in pygame.event.get():
+    for event in events:
         # If the user presses the quit button, exit the process.
         if event.type == pygame.QUIT:
             sys.exit()
 
-        # Allow user to select cells to be dead or alive if and only if the game is paused.
+        # Allow user to select cells to be dead or alive if and only if the game is paused. A drag started while
+        # paused is seen through.
+        if not run or editor.dragging():
+            user_select_cells(camera, editor, event, run)
         if not run:
-            user_select_cells(window, array, cell_width, cell_height)
-            user_increment_generation(event, window, array, cell_width, cell_height)
-
-        # Allow the user to scroll to adjust size od the grid.
-        cell_width, cell_height, x_grid_position_array, y_grid_position_array = user_scroll(window, array, event, cell_width, cell_height, x_grid_position_array, y_grid_position_array)
+            user_increment_generation(event, worker, jump_generations)
 
-        # Check space count here and resume/pause game accordingly.
-        run, space_count = check_space(event, space_count, run)
+        # Allow the user to scroll to adjust size od the grid, and to move around the universe.
+        user_scroll(camera, event)
+        user_pan(camera, event)
 
-    return run, space_count, cell_width, cell_height, x_grid_position_array, y_grid_position_array
+        # Allow the user to save the universe to a pattern file.
+        user_save(event, worker, save_path)
 
+        # Allow the user to show how fast the game runs, and to profile it.
+        if hud is not None:
+            user_profile(event, hud)
 
-def to_alive(window, array, cell_width, cell_height,  mouse_position=None, cell_x_position=None, cell_y_position=None):
-    """Switch a cell state from dead to alive.
-
-    :param: window: The pygame window object that display's the game.
-    :param: array: The boolean array that stores the state of each cell.
-    :param: cell_width: The width of a single cell (cell).
-    :param: cell_height: The height of a single cell (cell).
-    :param: mouse_position: The position of the user's mouse where a click has occurred.
-
-    :return: Void. No return, set the corresponding array value to True and color the respective cell yellow.
-    """
-    # Define the cell color when alive.
-    alive_cell_color = (255, 255, 0)
-
-    # If the function is called with no mouse position input, draw the state of the array.
-    if not mouse_position:
-        pygame.draw.rect(window, alive_cell_color,
-                         ((cell_x_position * cell_width) + 1,
-                          (cell_y_position * cell_height) + 1, cell_width - 1, cell_height - 1))
-        return
-
-    # Get the x and y positions of the top left hand corner of the cell or cell.
-    x_position = mouse_position[0] - (mouse_position[0] % cell_width)
-    y_position = mouse_position[1] - (mouse_position[1] % cell_height)
+        # Check space count here and resume/pause game accordingly.
+        run, space_count = check_space(event, space_count, run)
 
-    # Fill the cell with the color representing an alive state.
-    pygame.draw.rect(window, alive_cell_color, (x_position + 1, y_position + 1, cell_width - 1, cell_height -1))
+    # Send all the edits made by the events to the worker at once, so the next frame redraws them in one go.
+    edits = editor.take()
+    if edits is not None:
+        worker.set_cells(*edits)
 
-    # Get the row and column of the cell by dividing the x-position and y-position of the cell
-    # by the width and height of a single cell. Cast to an integer for indexing.
-    col = int(x_position / cell_width)
-    row = int(y_position / cell_height)
+    return run, space_count
 
-    # Set the cell value in the array to True for alive.
-    array[row][col] = True
 
+def worker_init(window, cell_width, cell_height, engine_name='sparse', boundary=None, engine_options=None,
+                viewport=(0, 0, 0, 0), generations_per_second=60, worker_mode=None):
+    """Initialize a simulation engine with all cells dead to represent the state of all cells at the beginning of the game.
 
-def to_dead(window, array, mouse_position, cell_width, cell_height):
-    """Switch a cell state from alive to dead.
+    The engine runs in a background worker so that stepping it never holds up the display.
 
     :param: window: The pygame window object that display's the game.
-    :param: array: The boolean array that stores the state of each cell.
-    :param: cell_width: The width of a single cell (cell).
-    :param: cell_height: The height of a single cell (cell).
-    :param: mouse_position: The position of the Users mouse when a click has occurred (if it has occurred).
-
-    :return: Void. No return, set the corresponding array value to False and color the respective cell yellow.
-    """
-    # Define the cell color when alive.
-    dead_cell_color = (128, 128, 128)
-
-    x_position = mouse_position[0] - (mouse_position[0] % cell_width)
-    y_position = mouse_position[1] - (mouse_position[1] % cell_height)
-
-    pygame.draw.rect(window, dead_cell_color, (x_position + 1, y_position + 1, cell_width - 1, cell_height - 1))
-
-    # Get the row and column of the cell by dividing the x-position and y-position of the cell
-    # by the width and height of a single cell. Cast to an integer for indexing.
-    col = int(x_position / cell_width)
-    row = int(y_position / cell_height)
-
-    # Set the cell value in the array to False for dead.
-    array[row][col] = False
-
-
-def array_init(cell_width, cell_height):
-    """Initialize a 2D array of 'False' values to represent the state of all cells at the beginning of the game.
-
     :param: cell_width: The width of a single cell.
     :param: cell_height: The height of a single cell.
-
-    :return: array: The initialized array.
+    :param: engine_name: The name of the simulation backend to use. See ENGINES in the backends module.
+    :param: boundary: The boundary policy of the universe. Defaults to the one of the backend. Unbounded universes
+    ignore the size of the display.
+    :param: engine_options: Extra keyword arguments for the backend, e.g. the number of workers of the parallel one.
+    :param: viewport: The (row, col, rows, cols) region of the universe shown on the display.
+    :param: generations_per_second: The target number of generations to run per second while the game runs.
+    :param: worker_mode: Whether to simulate in a 'thread' or a 'process'. Defaults to the best one for the backend.
+
+    :return: worker: The worker running the initialized engine.
     """
-    # Get display width and height. 
-    w, h = pygame.display.get_surface().get_size()
-    
-    # Get the total rows and columns of the array by dividing the width and height of the game display
+    # Get display width and height.
+    w, h = window.get_size()
+
+    # Get the total rows and columns of the grid by dividing the width and height of the game display
     # by the width and height of a single cell. Cast to an integer for indexing.
     cols = int(w/cell_width)
     rows = int(h/cell_height)
 
-    # Create an array of size rows x cols and fill it with the value 'False'
-    array = [[False for i in range(cols)] for j in range(rows)]
-
-    return array
-
-
-def game_logic(window, array, cell_width, cell_height):
-    """Check each cell and determine whether it's value should be inverted. invert cell values accordingly.
-
-    :param: window: The pygame window object that display's the game.
-    :param: array: The boolean array that stores the state of each cell.
-    :param: cell_width: The width of a single cell (cell).
-    :param: cell_height: The height of a single cell (cell).
-
-    :return: Void. Invert cell values in the array object where needed.
-    """
-    # Initialize empty array to hold the coordinates of cells whose value needs to be inverted.
-    inverse_indices = []
-
-    # Loop through the entire array, going row by row. Check whether each cell's state should remain the same
-    # or be inverted. If a cell's state should be inverted, store the index of that cell in the initialized array.
-    for i in range(0, len(array) - 1):
-        for j in range(0, len(array[0]) - 1):
-            if cell_die_or_live(get_live_neighbors(array, i, j), i, j, array[i][j]):
-                inverse_indices.append(cell_die_or_live(get_live_neighbors(array, i, j), i, j, array[i][j]))
-
-    # Loop through the array of cell indices and invert the value of each cell.
-    for cell in inverse_indices:
-        inverse_cell_state(cell, window, array, cell_width, cell_height)
-
-
-def get_live_neighbors(array, row, col):
-    """Get the number of 'alive' neighbors of a cell.
-
-    A neighbor is any cell that is directly adjacent to the cell in question. Diagonals included.
-    All cells have 9 neighbors.
+    return SimulationWorker(engine_name, rows, cols, boundary, engine_options, viewport, generations_per_second,
+                            worker_mode)
 
-    :param: row: The row index of the cell.
-    :param: col: The column index of the cell.
 
-    :return: count: The number of alive neighbors the cell has.
-    """
-    # Initialize a count variable to count the number of alive neighbors found.
-    count = 0
-
-    # Loop through the surrounding cells (above, below, to the left and to the right) and check whether each cell is
-    # alive or not. If a neighbor cell is alive, increment count.
-    for i in range(row - 1, row + 2):
-        for j in range(col - 1, col + 2):
-            if (i != row) or (j != col):
-                if array[i][j]:
-                    count += 1
-    return count
-
-
-def cell_die_or_live(live_neighbors, row, column, state):
-    """Determine whether a cell will die, be revived or remain the same.
+def show_frame(renderer, worker):
+    """Pick up the newest frame published by the worker and mark the cells which changed in it to be redrawn.
 
-    :param: live_neighbors: The number of alive neighbors the cell has.
-    :param: row: row value of the cell.
-    :param: row: column value of the cell.
-    :param: state: current state of the cell. False for dead, True for alive.
+    :param: renderer: The renderer that draws the game onto the display.
+    :param: worker: The worker running the simulation engine that stores the state of each cell.
 
-
-    :return: cell index if cell will die or be revived.
-    :return: False if cell is to reman the same.
+    :return: The new frame, or None if the worker has not published one since the last call.
     """
-    # Check whether a cell should be inverted. If a cell's properties falls within any of the rules and needs to be
-    # inverted, return the cell's index along with it's current state.
-    if live_neighbors < 2 and state:
-        return [row, column, state]
-    elif live_neighbors > 3 and state:
-        return [row, column, state]
-    elif live_neighbors == 3 and not state:
-        return [row, column, state]
-
-    return False
+    frame = worker.poll()
+    if frame is not None:
+        if frame.full:
+            renderer.mark_all()
+        else:
+            renderer.mark(frame.changed)
+    return frame
 
 
-def inverse_cell_state(cell, window, array, cell_width, cell_height):
-    """Inverse the state of any given cell.
+def show_period(period):
+    """Show the period of the cycle the universe has settled into in the title of the window.
 
-    :param: cell: The cell position to inverse.
-    :param: window: The pygame window object that display's the game.
-    :param: array: The boolean array that stores the state of each cell.
-    :param: cell_width: The width of a single cell (cell).
-    :param: cell_height: The height of a single cell (cell).
+    :param: period: The period, or None if the universe has not settled.
 
-
-    :return: Void. Draw the reversed state of the cell and update the Array
-    reference to reverse cell state at the given position.
+    :return: Void.
     """
-    # Check the state of a cell. If it is True, invert it and fill in the corresponding cell on the display with
-    # the dead color. If it is False, invert it and fill in the corresponding cell on the display
-    # with the alive color.
-    if cell[2]:
-        color = (128, 128, 128)
-        array[cell[0]][cell[1]] = not cell[2]
+    if period is None:
+        pygame.display.set_caption('Game of Life')
+    elif period == 1:
+        pygame.display.set_caption('Game of Life - settled into still lifes')
     else:
-        color = (255, 255, 0)
-        array[cell[0]][cell[1]] = not cell[2]
+        pygame.display.set_caption('Game of Life - settled into a period {} cycle'.format(period))
 
-    # Fill in the cell on the display.
-    pygame.draw.rect(window, color, (cell[1] * cell_width + 1, cell[0] * cell_height + 1, cell_width - 1,
-                                                cell_height - 1))
 
+def show_error(message):
+    """Tell the user that something went wrong, in the title of the window and on stderr.
 
-def run_game(window, array, cell_width, cell_height):
-    """Run the game logic in a while loop.
+    :param: message: What went wrong.
 
-    :param: window: The pygame window object that display's the game.
-    :param: array: The boolean array that stores the state of each cell.
-    :param: cell_width: The width of a single cell (cell).
-    :param: cell_height: The height of a single cell (cell).
+    :return: Void.
+    """
+    print(message, file=sys.stderr)
+    pygame.display.set_caption('Game of Life - {}'.format(message))
 
-    :return: Void. Run the game logic."""
-    # Run game logic
-    game_logic(window, array, cell_width, cell_height)
 
-    # Sleep for 0.1 seconds to slow down the animation.
-    time.sleep(0.01)
+def user_select_cells(camera, editor, event, run=False):
+    """Allow user to select and deselect cells.
 
+    Dragging with the left mouse button makes the cells under the brush alive, and with the right one makes them dead,
+    with no gaps however fast the mouse moves. Holding shift fills (left) or clears (right) the rectangle dragged over
+    instead, and holding ctrl fills it at random. The [ and ] keys shrink and grow the brush, and ctrl and V pastes the
+    pattern of the editor under the mouse. The edits are gathered by the editor until check_events sends them.
 
-def user_select_cells(window, array, cell_width, cell_height):
-    """Allow user to select and deselect cells.
+    Nothing is edited while zoomed out past single cells, where the mouse points at whole blocks of cells. A drag still
+    in progress when zooming out is ended where it last was.
 
-    :param: window: The pygame window object that display's the game.
-    :param: array: The boolean array that stores the state of each cell.
-    :param: cell_width: The width of a single cell (cell).
-    :param: cell_height: The height of a single cell (cell).
+    :param: camera: The camera deciding which part of the universe is shown.
+    :param: editor: The Editor turning mouse drags into cell edits.
+    :param: event: The event object that keeps track of user inputs.
+    :param: run: Whether the game is running, in which case only a drag in progress carries on.
 
     :return: Void."""
-    # Check if mouse is pressed. If the left click is pressed (0), set the state of the cell under the mouse's position
-    # to alive. If the right click is pressed (2), set the state of the cell under the mouses position to dead.
-    if pygame.mouse.get_pressed()[0]:
-        to_alive(window, array, cell_width, cell_height, pygame.mouse.get_pos())
-    elif pygame.mouse.get_pressed()[2]:
-        to_dead(window, array, pygame.mouse.get_pos(), cell_width, cell_height)
+    # End a drag where it last was once zoomed out, as the mouse no longer points at single cells.
+    if camera.level > 0:
+        if editor.dragging():
+            release(editor, editor.last())
+        return
+
+    # Start a drag with the left (1) or right (3) button, picking the mode from the keys held down.
+    if event.type == pygame.MOUSEBUTTONDOWN and event.button in (1, 3) and not run:
+        modifiers = pygame.key.get_mods()
+        mode = 'random' if modifiers & pygame.KMOD_CTRL else 'rectangle' if modifiers & pygame.KMOD_SHIFT else 'draw'
+        editor.press(camera.cell_at(event.pos), event.button == 1, mode)
+    elif event.type == pygame.MOUSEMOTION and editor.dragging():
+        editor.drag(camera.cell_at(event.pos))
+    elif event.type == pygame.MOUSEBUTTONUP and event.button in (1, 3):
+        release(editor, camera.cell_at(event.pos))
+    elif event.type == pygame.KEYDOWN and not run:
+        if event.key == pygame.K_LEFTBRACKET:
+            editor.set_brush_size(editor.brush_size - 1)
+        elif event.key == pygame.K_RIGHTBRACKET:
+            editor.set_brush_size(editor.brush_size + 1)
+        elif event.key == pygame.K_v and event.mod & pygame.KMOD_CTRL:
+            editor.paste(camera.cell_at(pygame.mouse.get_pos()))
+
+
+def release(editor, cell):
+    """End the drag of the editor, telling the user if the rectangle it spans is too large to fill.
+
+    :param: editor: The Editor turning mouse drags into cell edits.
+    :param: cell: The (row, col) cell the drag ends on.
+
+    :return: Void.
+    """
+    try:
+        editor.release(cell)
+    except ValueError as error:
+        print(error, file=sys.stderr)
 
 
 def check_space(event, space_count, run):
@@ -324,86 +360,121 @@ def check_space(event, space_count, run):
     return run, space_count
 
 
-def user_scroll(window, array, event, cell_width, cell_height, x_grid_position_array, y_grid_position_array):
-    """Adjust the size of cells and redraw the new size if the user uses the mouse scroll.
+def user_scroll(camera, event):
+    """Adjust the size of cells if the user uses the mouse scroll, keeping the cell under the mouse in place.
 
     If the user scrolls in, increase the size of each cell on the display screen. If the user scrolls out, decrease the
-    size of each cell on the display screen.
+    size of each cell on the display screen. Past one pixel per cell, scrolling out shows ever larger blocks of cells
+    per pixel, shaded by how full they are.
 
-    :param: window: The pygame window object that display's the game.
+    :param: camera: The camera deciding which part of the universe is shown.
     :param: event: The event object that keeps track of user inputs.
-    :param: space_count: A variable keeping track of the number of times space has been pressed.
-    :param: array: The boolean array that stores the state of each cell.
-    :param: cell_width: The width of a single cell (cell).
-    :param: cell_height: The height of a single cell (cell).
-
-    :return: New cell width and cell height."""
-
-    def scroll_cell_draw(w, a, cw, ch, i):
-        """
-        Increment the cell width and height and redraw a new grid with the new dimensions.
-        """
-        # Refill the window with the background color before drawing new grid.
-        # If so, increase cell size to zoom out.
-        w.fill((128, 128, 128))
-        # Draw new grid and update the display.
-        cw, ch, x, y = draw_grid(w, cw, ch, pygame.mouse.get_pos(), x_grid_position_array, y_grid_position_array, increment)
-        draw_array_state(window, a, cell_width, cell_height)
-
-        return cw, ch, x, y
 
+    :return: Void."""
     # Check if the current event involved a mouse button.
     if event.type == pygame.MOUSEBUTTONDOWN:
-        # Check if the event that occurred is a mouse scroll in. If so, increase cell size to zoom in.
+        cell_width, cell_height = camera.cell_width, camera.cell_height
+
+        # Check if the event that occurred is a mouse scroll in. If so, show smaller blocks, or increase cell size to
+        # zoom in.
         if event.button == 4:
-            w, h = pygame.display.get_surface().get_size()
-            if (cell_width >= w/3) or (cell_height >= h/3):
-                return cell_width, cell_height, x_grid_position_array, y_grid_position_array
-            increment = 2
-            return scroll_cell_draw(window, array, cell_width, cell_height, increment)
+            if camera.level > 0:
+                camera.zoom(1, 1, event.pos, camera.level - 1)
+            elif (cell_width < camera.width/3) and (cell_height < camera.height/3):
+                camera.zoom(zoom_in_size(cell_width), zoom_in_size(cell_height), event.pos)
 
-        # Check if the event that occurred is a mouse scroll out.
+        # Check if the event that occurred is a mouse scroll out. If so, decrease cell size to zoom out, or show larger
+        # blocks once cells are a single pixel.
         elif event.button == 5:
-            if (cell_width <= 4) or (cell_height <= 4):
-                return cell_width, cell_height, x_grid_position_array, y_grid_position_array
-            increment = -2
-            return scroll_cell_draw(window, array, cell_width, cell_height, increment)
+            if (cell_width > 1) and (cell_height > 1):
+                camera.zoom(zoom_out_size(cell_width), zoom_out_size(cell_height), event.pos)
+            elif camera.level < LEVELS:
+                camera.zoom(1, 1, event.pos, camera.level + 1)
 
-    # If nothing has changed, return original cell width and height.
-    return cell_width, cell_height, x_grid_position_array, y_grid_position_array
 
+def zoom_in_size(size):
+    """Get the next larger cell size. Steps of 2 pixels from 4 pixels up, halving below.
 
-def draw_array_state(window, array, cell_width, cell_height):
-    """Draw the current state of the array onto the display.
+    :param: size: The current width or height of a cell.
 
-    Loop through the current array. Where there is a True, draw a corresponding yellow block on the display to
-    represent an alive cell.
+    :return: The next width or height.
+    """
+    return size + 2 if size >= 4 else size * 2
 
-    :param: window: The pygame window object that display's the game.
-    :param: array: The boolean array that stores the state of each cell.
-    :param: cell_width: The width of a single cell (cell).
-    :param: cell_height: The height of a single cell (cell).
+
+def zoom_out_size(size):
+    """Get the next smaller cell size. Steps of 2 pixels down to 4 pixels, halving below.
+
+    :param: size: The current width or height of a cell.
+
+    :return: The next width or height.
+    """
+    return size - 2 if size > 4 else max(size // 2, 1)
+
+
+def user_pan(camera, event):
+    """Move around the universe if the user drags with the middle mouse button or presses W, A, S or D.
+
+    :param: camera: The camera deciding which part of the universe is shown.
+    :param: event: The event object that keeps track of user inputs.
 
     :return: Void."""
-    for i in range(0, len(array)):
-        for j in range(0, len(array[0])):
-            if array[i][j]:
-                to_alive(window, array, cell_width, cell_height, cell_x_position=j, cell_y_position=i)
-    return
+    # Drag the universe along with the mouse while the middle button is held down.
+    if event.type == pygame.MOUSEMOTION and event.buttons[1]:
+        camera.pan(*event.rel)
+
+    # Move by an eighth of the display for each key press.
+    elif event.type == pygame.KEYDOWN:
+        dx, dy = camera.width // 8, camera.height // 8
+        moves = {pygame.K_a: (dx, 0), pygame.K_d: (-dx, 0), pygame.K_w: (0, dy), pygame.K_s: (0, -dy)}
+        if event.key in moves and not event.mod & pygame.KMOD_CTRL:
+            camera.pan(*moves[event.key])
 
 
-def user_increment_generation(event, window, array, cell_width, cell_height):
-    """Allow user to increment by one generation if left key button is clicked during pause mode.
+def user_increment_generation(event, worker, jump_generations=1024):
+    """Allow user to increment by one generation if right key button is clicked during pause mode.
 
-    Check if left key is down. If true, increment the game by one generation.
+    Check if right key is down. If true, increment the game by one generation. If shift is held down as well, jump
+    ahead by a number of generations at once using Hashlife. The left key goes back in the same way, as far as the
+    history of the game goes.
 
     :param: event: The event object that keeps track of user inputs.
-    :param: window: The pygame window object that display's the game.
-    :param: array: The boolean array that stores the state of each cell.
-    :param: cell_width: The width of a single cell (cell).
-    :param: cell_height: The height of a single cell (cell).
+    :param: worker: The worker running the simulation engine that stores the state of each cell.
+    :param: jump_generations: The number of generations to jump ahead when shift is held down.
 
     :return: Void."""
     if event.type == pygame.KEYDOWN:
         if event.key == pygame.K_RIGHT:
-            run_game(window, array, cell_width, cell_height)
\ No newline at end of file
+            if event.mod & pygame.KMOD_SHIFT:
+                worker.jump(jump_generations)
+            else:
+                worker.step()
+        elif event.key == pygame.K_LEFT:
+            worker.rewind(jump_generations if event.mod & pygame.KMOD_SHIFT else 1)
+
+
+def user_save(event, worker, save_path):
+    """Allow user to save the universe to a pattern file if ctrl and S are pressed.
+
+    :param: event: The event object that keeps track of user inputs.
+    :param: worker: The worker running the simulation engine that stores the state of each cell.
+    :param: save_path: The path of the pattern file. The format is chosen by its extension.
+
+    :return: Void."""
+    if event.type == pygame.KEYDOWN:
+        if event.key == pygame.K_s and event.mod & pygame.KMOD_CTRL:
+            worker.save(save_path)
+
+
+def user_profile(event, hud):
+    """Allow user to show or hide the HUD if F3 is pressed, and to profile the next frames with cProfile if F4 is.
+
+    :param: event: The event object that keeps track of user inputs.
+    :param: hud: The HUD showing how fast the game runs.
+
+    :return: Void."""
+    if event.type == pygame.KEYDOWN:
+        if event.key == pygame.K_F3:
+            hud.toggle()
+        elif event.key == pygame.K_F4:
+            hud.profiler.profile()
@@ -0,0 +1,472 @@
+"""Hashlife module. Holds a quadtree backend that can advance a pattern by huge numbers of generations at once.
+
+The universe is stored as a quadtree of canonical nodes: two nodes with the same contents are always the same object.
+The future of every node is memoised, so repeated structure in space and in time is only ever computed once. See
+Bill Gosper's "Exploiting regularities in large cellular spaces" (1984) for the algorithm.
+"""
+
+import functools
+import numpy as np
+from .engine import Engine, as_cells, cell_die_or_live
+from .rules import CONWAY
+
+
+class Node:
+    """A square block of the universe, 2 ** level cells wide.
+
+    Level 0 nodes are single cells. Every other node is made of four children of the level below.
+    """
+
+    __slots__ = ('nw', 'ne', 'sw', 'se', 'level', 'population', 'bits')
+
+    def __init__(self, nw, ne, sw, se, level, population, bits=0):
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.level = level
+        self.population = population
+
+        # Level 1 nodes keep their four cells packed as bits (nw, ne, sw, se) to speed up the 4x4 base case.
+        self.bits = bits
+
+
+# The two level 0 nodes.
+DEAD = Node(None, None, None, None, 0, 0)
+ALIVE = Node(None, None, None, None, 0, 1)
+
+
+@functools.lru_cache(maxsize=None)
+def _life_4x4_table(rule):
+    """Compute the next state of the centre 2x2 cells of every possible 4x4 block under a rule.
+
+    The 16 cells of a block are packed into an index with the cell at (row, column) on bit row * 4 + column. The
+    result packs the four centre cells into bits in (nw, ne, sw, se) order. The table is computed once per rule.
+
+    :param: rule: The Life-like Rule to apply.
+
+    :return: An array of 65536 results.
+    """
+    index = np.arange(1 << 16)
+    blocks = ((index[:, None] >> np.arange(16)) & 1).astype(bool).reshape(-1, 4, 4)
+
+    # Count the neighbors of the centre cells with shifted views of the blocks and apply the rules.
+    count = np.zeros((len(index), 2, 2), dtype=np.uint8)
+    for i in range(3):
+        for j in range(3):
+            if (i != 1) or (j != 1):
+                count += blocks[:, i:i + 2, j:j + 2]
+    state = blocks[:, 1:3, 1:3]
+    alive = (state ^ cell_die_or_live(count, state, rule)).reshape(-1, 4)
+    return (alive * np.array([8, 4, 2, 1])).sum(axis=1).astype(np.uint8)
+
+
+# Spread the 4 bits of a level 1 node into its place in a 4x4 block index, one table per quadrant.
+_SPREAD = [[sum(1 << ((row + (bit >> 1 & 1)) * 4 + col + (bit & 1)) for bit in range(4) if value >> (3 - bit) & 1)
+            for value in range(16)] for row, col in ((0, 0), (0, 2), (2, 0), (2, 2))]
+
+
+class Hashlife:
+    """Store of canonical nodes and of their memoised futures.
+
+    The store is bounded: once it holds more than max_nodes nodes, everything not reachable from the current roots is
+    thrown away along with all memoised futures. Collection only happens between calls to advance, so a single huge
+    jump may temporarily go over the bound.
+    """
+
+    def __init__(self, max_nodes=1000000, rule=CONWAY):
+        """Create an empty store.
+
+        :param: max_nodes: The number of nodes above which the store is collected.
+        :param: rule: The Life-like Rule the futures are computed with. It must not be B0.
+        """
+        self.max_nodes = max_nodes
+        self._table = _life_4x4_table(rule)
+        self._nodes = {}
+        self._results = {}
+        self._empty = [DEAD]
+        self._level1 = [self.join(*(ALIVE if value >> (3 - bit) & 1 else DEAD for bit in range(4)))
+                        for value in range(16)]
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def join(self, nw, ne, sw, se):
+        """Get the canonical node made of four children.
+
+        :param: nw: The north west child.
+        :param: ne: The north east child.
+        :param: sw: The south west child.
+        :param: se: The south east child.
+
+        :return: The canonical node.
+        """
+        key = (nw, ne, sw, se)
+        node = self._nodes.get(key)
+        if node is None:
+            bits = 0
+            if nw.level == 0:
+                bits = nw.population << 3 | ne.population << 2 | sw.population << 1 | se.population
+            node = Node(nw, ne, sw, se, nw.level + 1,
+                        nw.population + ne.population + sw.population + se.population, bits)
+            self._nodes[key] = node
+        return node
+
+    def empty(self, level):
+        """Get the canonical dead node of a level.
+
+        :param: level: The level of the node.
+
+        :return: The canonical node.
+        """
+        while len(self._empty) <= level:
+            child = self._empty[-1]
+            self._empty.append(self.join(child, child, child, child))
+        return self._empty[level]
+
+    def centre(self, node):
+        """Surround a node with dead cells, giving a node one level up with the original in its centre.
+
+        :param: node: The node to surround.
+
+        :return: The surrounded node.
+        """
+        border = self.empty(node.level - 1)
+        return self.join(self.join(border, border, border, node.nw), self.join(border, border, node.ne, border),
+                         self.join(border, node.sw, border, border), self.join(node.se, border, border, border))
+
+    def successor(self, node, step):
+        """Get the centre of a node 2 ** step generations in the future.
+
+        :param: node: A node of level 2 or above.
+        :param: step: The log2 of the number of generations to advance. Capped at node.level - 2.
+
+        :return: The centre node, one level below the input.
+        """
+        if node.population == 0:
+            return node.nw
+        step = min(step, node.level - 2)
+        key = (node, step)
+        result = self._results.get(key)
+        if result is not None:
+            return result
+
+        if node.level == 2:
+            # Look up the 4x4 base case directly.
+            bits = self._table[_SPREAD[0][node.nw.bits] | _SPREAD[1][node.ne.bits] |
+                               _SPREAD[2][node.sw.bits] | _SPREAD[3][node.se.bits]]
+            result = self._level1[bits]
+        else:
+            # Advance the nine overlapping sub-nodes of half the size.
+            join, successor = self.join, self.successor
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            c1 = successor(nw, step)
+            c2 = successor(join(nw.ne, ne.nw, nw.se, ne.sw), step)
+            c3 = successor(ne, step)
+            c4 = successor(join(nw.sw, nw.se, sw.nw, sw.ne), step)
+            c5 = successor(join(nw.se, ne.sw, sw.ne, se.nw), step)
+            c6 = successor(join(ne.sw, ne.se, se.nw, se.ne), step)
+            c7 = successor(sw, step)
+            c8 = successor(join(sw.ne, se.nw, sw.se, se.sw), step)
+            c9 = successor(se, step)
+
+            if step < node.level - 2:
+                # The sub-nodes already went far enough, just take their centres.
+                result = join(join(c1.se, c2.sw, c4.ne, c5.nw), join(c2.se, c3.sw, c5.ne, c6.nw),
+                              join(c4.se, c5.sw, c7.ne, c8.nw), join(c5.se, c6.sw, c8.ne, c9.nw))
+            else:
+                # Advance the four recombined quarters for the second half of the generations.
+                result = join(successor(join(c1, c2, c4, c5), step), successor(join(c2, c3, c5, c6), step),
+                              successor(join(c4, c5, c7, c8), step), successor(join(c5, c6, c8, c9), step))
+
+        self._results[key] = result
+        return result
+
+    def collect(self, *roots):
+        """Throw away every node that is not reachable from the given roots, along with all memoised futures.
+
+        :param: roots: The nodes to keep.
+
+        :return: Void.
+        """
+        self._nodes = {}
+        self._results = {}
+        stack = list(roots) + self._empty[1:] + self._level1
+        while stack:
+            node = stack.pop()
+            key = (node.nw, node.ne, node.sw, node.se)
+            if node.level > 0 and key not in self._nodes:
+                self._nodes[key] = node
+                stack.extend(key)
+
+    def edit(self, node, cells, state, row, col):
+        """Get a node with the state of some of its cells changed. Only the paths down to the edited cells are rebuilt,
+        the rest of the node is shared.
+
+        :param: node: The node to edit.
+        :param: cells: An (N, 2) array of cells, all inside the node.
+        :param: state: The boolean array of the new state of each cell. Later edits of a cell win.
+        :param: row: The row of the top left hand corner of the node.
+        :param: col: The column of the top left hand corner of the node.
+
+        :return: The canonical edited node.
+        """
+        if len(cells) == 0:
+            return node
+        if node.level == 0:
+            return ALIVE if state[-1] else DEAD
+
+        # Split the edits between the four quadrants and edit each one.
+        half = 1 << (node.level - 1)
+        south = cells[:, 0] >= row + half
+        east = cells[:, 1] >= col + half
+        quadrants = []
+        for child, mask, child_row, child_col in ((node.nw, ~south & ~east, row, col),
+                                                  (node.ne, ~south & east, row, col + half),
+                                                  (node.sw, south & ~east, row + half, col),
+                                                  (node.se, south & east, row + half, col + half)):
+            quadrants.append(self.edit(child, cells[mask], state[mask], child_row, child_col))
+        return self.join(*quadrants)
+
+    @staticmethod
+    def get(node, row, col, cell_row, cell_col):
+        """Get the state of one cell of a node, walking down to it.
+
+        :param: node: The node.
+        :param: row: The row of the top left hand corner of the node.
+        :param: col: The column of the top left hand corner of the node.
+        :param: cell_row: The row of the cell.
+        :param: cell_col: The column of the cell.
+
+        :return: True if the cell is alive. Cells outside of the node are dead.
+        """
+        size = 1 << node.level
+        cell_row -= row
+        cell_col -= col
+        if not (0 <= cell_row < size and 0 <= cell_col < size):
+            return False
+        while node.level > 1 and node.population:
+            size >>= 1
+            south, east = cell_row >= size, cell_col >= size
+            node = (node.se if east else node.sw) if south else (node.ne if east else node.nw)
+            cell_row -= size if south else 0
+            cell_col -= size if east else 0
+        if node.level != 1:
+            return node.population == 1
+        return bool(node.bits >> (3 - 2 * cell_row - cell_col) & 1)
+
+    def diff(self, old, new, row, col):
+        """Get the cells which differ between two nodes of the same level and place. Parts the two nodes share are
+        skipped, so the cost follows the cells which changed rather than the population.
+
+        :param: old: The first node.
+        :param: new: The second node.
+        :param: row: The row of the top left hand corner of the nodes.
+        :param: col: The column of the top left hand corner of the nodes.
+
+        :return: An (N, 2) array of the cells alive in exactly one of the nodes.
+        """
+        found = []
+        stack = [(old, new, row, col)]
+        while stack:
+            old, new, row, col = stack.pop()
+            if old is new:
+                continue
+            if old.level == 1:
+                bits = old.bits ^ new.bits
+                found.extend((row + (bit >> 1), col + (bit & 1)) for bit in range(4) if bits >> (3 - bit) & 1)
+            else:
+                half = 1 << (old.level - 1)
+                stack.extend(((old.nw, new.nw, row, col), (old.ne, new.ne, row, col + half),
+                              (old.sw, new.sw, row + half, col), (old.se, new.se, row + half, col + half)))
+        return as_cells(found)
+
+    def fill(self, node, row, col, region, top, left):
+        """Copy the alive cells of a node into a region.
+
+        :param: node: The node to copy.
+        :param: row: The row of the top left hand corner of the node.
+        :param: col: The column of the top left hand corner of the node.
+        :param: region: The boolean array to copy the cells into.
+        :param: top: The row of the top left hand corner of the region.
+        :param: left: The column of the top left hand corner of the region.
+
+        :return: Void.
+        """
+        size = 1 << node.level
+        if (node.population == 0 or row >= top + region.shape[0] or col >= left + region.shape[1] or
+                row + size <= top or col + size <= left):
+            return
+        if node.level == 0:
+            region[row - top, col - left] = True
+            return
+
+        half = size >> 1
+        self.fill(node.nw, row, col, region, top, left)
+        self.fill(node.ne, row, col + half, region, top, left)
+        self.fill(node.sw, row + half, col, region, top, left)
+        self.fill(node.se, row + half, col + half, region, top, left)
+
+    def cells(self, node, row, col):
+        """Get the alive cells of a node.
+
+        :param: node: The node.
+        :param: row: The row of the top left hand corner of the node.
+        :param: col: The column of the top left hand corner of the node.
+
+        :return: An (N, 2) array holding the alive cells.
+        """
+        found = []
+        stack = [(node, row, col)]
+        while stack:
+            node, row, col = stack.pop()
+            if node.population == 0:
+                continue
+            if node.level == 0:
+                found.append((row, col))
+                continue
+            half = 1 << (node.level - 1)
+            stack.extend(((node.nw, row, col), (node.ne, row, col + half),
+                          (node.sw, row + half, col), (node.se, row + half, col + half)))
+        return as_cells(found)
+
+
+class HashlifeEngine(Engine):
+    """Backend storing an unbounded universe in a Hashlife quadtree.
+
+    Single steps cost as much as the parts of the tree which changed, but advance can jump 2 ** k generations at the
+    cost of a single step once the pattern has been seen before, so long-horizon runs are many orders of magnitude
+    faster than stepping.
+    """
+
+    BOUNDARIES = ('infinite',)
+    RELEASES_GIL = False
+    STEPS_EVERY_CELL = False
+
+    def __init__(self, rows=None, cols=None, boundary=None, rule=None, max_nodes=1000000):
+        """Create an empty universe.
+
+        :param: rows: Ignored, the universe is unbounded.
+        :param: cols: Ignored, the universe is unbounded.
+        :param: boundary: The boundary policy of the universe. Only 'infinite' is supported.
+        :param: rule: The Life-like Rule to run. Defaults to Conway's B3/S23.
+        :param: max_nodes: The number of nodes above which the node store is collected.
+        """
+        super().__init__(rows, cols, boundary, rule)
+        self.hashlife = Hashlife(max_nodes, self.rule)
+
+        # The root is always centred on the origin, so it covers -2 ** (level - 1) to 2 ** (level - 1) in both axes.
+        self.root = self.hashlife.empty(3)
+
+    def _origin(self):
+        """Get the row and column of the top left hand corner of the root."""
+        return -(1 << (self.root.level - 1)), -(1 << (self.root.level - 1))
+
+    def _padded(self):
+        """Check whether all alive cells lie in the inner quarter of the root."""
+        root = self.root
+        if root.level < 3:
+            return False
+        inner = root.nw.se.se.population + root.ne.sw.sw.population + root.sw.ne.ne.population + \
+            root.se.nw.nw.population
+        return inner == root.population
+
+    def advance(self, generations):
+        """Advance the universe by any number of generations, 2 ** k generations at a time.
+
+        :param: generations: The number of generations to advance.
+
+        :return: Void.
+        """
+        hashlife = self.hashlife
+        step = 0
+        while generations >> step:
+            if generations >> step & 1:
+                # Grow the root until it is big enough for the step and the pattern cannot escape it, then advance.
+                while self.root.level < step + 2 or not self._padded():
+                    self.root = hashlife.centre(self.root)
+                self.root = hashlife.successor(hashlife.centre(self.root), step)
+            step += 1
+        self.generation += generations
+
+        if len(hashlife) > hashlife.max_nodes:
+            hashlife.collect(self.root)
+
+    def run(self, generations):
+        self.advance(generations)
+
+    def step(self):
+        before = self.root
+        self.advance(1)
+
+        # The inverted cells are the ones alive in exactly one of the two generations. Both roots are centred on the
+        # origin, so once they are the same size the unchanged parts of the universe are the very same nodes.
+        after = self.root
+        while before.level < after.level:
+            before = self.hashlife.centre(before)
+        while after.level < before.level:
+            after = self.hashlife.centre(after)
+        return self.hashlife.diff(before, after, -(1 << (after.level - 1)), -(1 << (after.level - 1)))
+
+    def get_cells(self, cells):
+        cells = as_cells(cells)
+        get, root, (row, col) = self.hashlife.get, self.root, self._origin()
+        return np.fromiter((get(root, row, col, cell_row, cell_col) for cell_row, cell_col in cells.tolist()),
+                           dtype=bool, count=len(cells))
+
+    def set_cells(self, cells, state):
+        cells = as_cells(cells)
+        state = np.broadcast_to(np.asarray(state, dtype=bool), (len(cells),))
+        if len(cells) == 0:
+            return
+
+        # Grow the root until it covers every edited cell.
+        extent = int(np.abs(cells).max()) + 1
+        while (1 << (self.root.level - 1)) < extent:
+            self.root = self.hashlife.centre(self.root)
+
+        # Rebuild only the paths down to the edited cells.
+        self.root = self.hashlife.edit(self.root, cells, state, *self._origin())
+
+    def get_region(self, row, col, rows, cols):
+        region = np.zeros((rows, cols), dtype=bool)
+        self.hashlife.fill(self.root, *self._origin(), region, row, col)
+        return region
+
+    def live_cells(self):
+        return self.hashlife.cells(self.root, *self._origin())
+
+    def population(self):
+        return self.root.population
+
+
+def jump(engine, generations, max_nodes=1000000):
+    """Advance any engine by a number of generations using Hashlife.
+
+    Other unbounded engines are copied into a Hashlife universe, advanced, and copied back. Bounded engines are stepped
+    instead, since a Hashlife universe has no edges to wrap around or die at, so a jump always ends where stepping
+    would.
+
+    :param: engine: The simulation engine to advance.
+    :param: generations: The number of generations to advance.
+    :param: max_nodes: The number of nodes above which the node store of the copy is collected.
+
+    :return: Void.
+    """
+    if isinstance(engine, HashlifeEngine):
+        engine.advance(generations)
+        return
+
+    # Step bounded engines, whose edges the plane does not have. Under B0 rules the plane would fill up at once.
+    if engine.boundary != 'infinite' or engine.rule.births_from_nothing():
+        engine.run(generations)
+        return
+
+    universe = HashlifeEngine(rule=engine.rule, max_nodes=max_nodes)
+    before = engine.live_cells()
+    universe.set_cells(before, True)
+    universe.advance(generations)
+
+    engine.set_cells(before, False)
+    engine.set_cells(universe.live_cells(), True)
+    engine.generation += generations
@@ -0,0 +1,145 @@
+"""History module. Remembers the past generations of a universe so that it can be rewound.
+
+Every change to the universe, a generation, a jump or an edit, is kept as the set of cells it inverted. Inverting the
+same cells again undoes the change, so stepping back costs as much as the change did, not as much as the universe is
+large. Keyframes holding all alive cells are taken now and then, so that rewinding far back can start from the nearest
+keyframe and replay the changes after it instead of undoing every later change. The oldest changes are forgotten to
+stay within a memory budget.
+"""
+
+import collections
+import numpy as np
+from .sparse import pack, unpack
+
+# The default memory budget of a history, in bytes.
+DEFAULT_BUDGET = 64 << 20
+
+# The least number of inverted cells to remember between two keyframes.
+KEYFRAME_MIN_CELLS = 1 << 16
+
+
+class History:
+    """A bounded history of the changes made to an engine.
+
+    Changes are kept in a ring buffer, oldest first, each as (generation before, generation after, cells) with the
+    inverted cells packed into int64 keys. A keyframe is taken once the changes remembered since the last one hold
+    more cells than it does, which keeps the memory spent on keyframes below the memory spent on changes.
+    """
+
+    def __init__(self, engine, budget=DEFAULT_BUDGET):
+        """Start remembering the changes made to an engine from its current state onwards.
+
+        :param: engine: The simulation engine.
+        :param: budget: The most memory to spend on the history, in bytes.
+        """
+        self.engine = engine
+        self.budget = budget
+        self.clear()
+
+    def clear(self):
+        """Forget everything, keeping the current state as the oldest one.
+
+        :return: Void.
+        """
+        self._changes = collections.deque()
+        self._first = 0
+        self._keyframes = collections.deque()
+        self._since_keyframe = 0
+        self._last_keyframe = 0
+        self._bytes = 0
+        self.generation = self.engine.generation
+
+    def oldest(self):
+        """Get the oldest generation the history can rewind to.
+
+        :return: The generation.
+        """
+        return self._changes[0][0] if self._changes else self.generation
+
+    def push(self, cells):
+        """Remember a change which was just made to the engine.
+
+        :param: cells: An (N, 2) array of the distinct cells the change inverted.
+
+        :return: Void.
+        """
+        keys = pack(cells)
+        self._changes.append((self.generation, self.engine.generation, keys))
+        self._bytes += keys.nbytes
+        self.generation = self.engine.generation
+
+        # Take a keyframe once rebuilding from it is cheaper than undoing the changes since the last one.
+        self._since_keyframe += len(keys)
+        if self._since_keyframe >= max(self._last_keyframe, KEYFRAME_MIN_CELLS):
+            keyframe = pack(self.engine.live_cells())
+            if keyframe.nbytes < self.budget // 2:
+                self._keyframes.append((self._first + len(self._changes), keyframe))
+                self._bytes += keyframe.nbytes
+            self._since_keyframe = 0
+            self._last_keyframe = len(keyframe)
+
+        # Forget the oldest changes to stay within the budget, and the keyframes nothing can be replayed from.
+        while self._bytes > self.budget and self._changes:
+            self._bytes -= self._changes.popleft()[2].nbytes
+            self._first += 1
+            while self._keyframes and self._keyframes[0][0] < self._first:
+                self._bytes -= self._keyframes.popleft()[1].nbytes
+
+    def rewind(self, generations=1):
+        """Take the engine back by a number of generations, or as far as the history goes.
+
+        A jump is undone as a whole. Edits made during the generation rewound to are kept.
+
+        :param: generations: The number of generations to go back.
+
+        :return: An (N, 2) array of the distinct cells which were inverted.
+        """
+        # Find the changes to undo: every change which ended after the target generation.
+        target = max(self.generation - generations, self.oldest())
+        stop = len(self._changes)
+        while stop and self._changes[stop - 1][1] > target:
+            stop -= 1
+        if stop == len(self._changes):
+            return np.empty((0, 2), dtype=np.int64)
+        generation = self._changes[stop][0]
+        undo = [self._changes[index][2] for index in range(stop, len(self._changes))]
+
+        # Start from the newest keyframe at or before the target instead, if it takes fewer cells.
+        keyframe = None
+        for position, keys in reversed(self._keyframes):
+            if position <= self._first + stop:
+                keyframe = position, keys
+                break
+        cost = sum(len(keys) for keys in undo)
+        if keyframe is not None:
+            # Counting the population may take a pass over the board, so only do it if the rest does not decide.
+            replay = [self._changes[index][2] for index in range(keyframe[0] - self._first, stop)]
+            replay_cost = len(keyframe[1]) + sum(len(keys) for keys in replay)
+            if replay_cost < cost and replay_cost + self.engine.population() < cost:
+                inverted = self._restore(keyframe[1], replay)
+            else:
+                keyframe = None
+        if keyframe is None:
+            # The cells inverted an odd number of times are the ones which changed.
+            keys, counts = np.unique(np.concatenate(undo), return_counts=True)
+            inverted = unpack(keys[counts % 2 == 1])
+            self.engine.set_cells(inverted, ~self.engine.get_cells(inverted))
+
+        # Forget the undone changes, and the keyframes taken after them.
+        for _ in range(len(undo)):
+            self._bytes -= self._changes.pop()[2].nbytes
+        while self._keyframes and self._keyframes[-1][0] > self._first + stop:
+            self._bytes -= self._keyframes.pop()[1].nbytes
+        self._since_keyframe = 0
+        self.engine.generation = self.generation = generation
+        return inverted
+
+    def _restore(self, keyframe, replay):
+        """Make the engine hold a keyframe and replay changes after it, getting the cells which were inverted."""
+        before = pack(self.engine.live_cells())
+        self.engine.set_cells(unpack(before), False)
+        self.engine.set_cells(unpack(keyframe), True)
+        for keys in replay:
+            cells = unpack(keys)
+            self.engine.set_cells(cells, ~self.engine.get_cells(cells))
+        return unpack(np.setxor1d(before, pack(self.engine.live_cells())))
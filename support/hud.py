@@ -0,0 +1,149 @@
+"""HUD module. Shows how fast the game runs in a corner of the display, and where the time of each frame goes."""
+
+import collections
+import time
+import pygame
+
+# Colors of the HUD in RGB.
+TEXT_COLOR = (255, 255, 255)
+BACKGROUND_COLOR = (0, 0, 0)
+BIRTHS_COLOR = (0, 200, 0)
+DEATHS_COLOR = (200, 0, 0)
+
+# The number of times per second the text of the HUD is rendered again. Rendering text is slow next to a frame.
+REFRESH_RATE = 4
+
+# The number of seconds the rates are measured over.
+RATE_SECONDS = 1.0
+
+# The size in pixels of the graph of the population, births and deaths, one generation per pixel across.
+GRAPH_WIDTH = 256
+GRAPH_HEIGHT = 48
+
+
+class Hud:
+    """A heads-up display of the generations per second, the frame rate, the population, the cells changed per
+    generation, the time the worker spends stepping each generation and the time each phase of a frame takes, over a
+    graph of the population, births and deaths of the recent generations.
+
+    Turning the HUD on starts timing the phases, see the profiler module, and asks the worker for its statistics and
+    metrics, so nothing is measured while it is hidden.
+    """
+
+    def __init__(self, window, renderer, profiler, worker, visible=False, font_size=20):
+        """Create a HUD.
+
+        :param: window: The pygame window object that display's the game.
+        :param: renderer: The renderer drawing the universe under the HUD.
+        :param: profiler: The Profiler timing the phases of each frame.
+        :param: worker: The worker running the simulation engine that stores the state of each cell.
+        :param: visible: Whether to show the HUD from the start.
+        :param: font_size: The height of the text in pixels.
+        """
+        self.window = window
+        self.renderer = renderer
+        self.profiler = profiler
+        self.worker = worker
+        pygame.font.init()
+        self._font = pygame.font.Font(None, font_size)
+        self._samples = collections.deque()
+        self._metrics = None
+        self._surface = None
+        self._rendered_at = 0.0
+        self.visible = False
+        if visible:
+            self.toggle()
+
+    def toggle(self):
+        """Show the HUD if it is hidden, hide it otherwise.
+
+        :return: Void.
+        """
+        self.visible = not self.visible
+        self.profiler.enable('hud', self.visible)
+        self.worker.set_stats(self.visible or self.profiler.tracing(), GRAPH_WIDTH if self.visible else 0)
+        self._samples.clear()
+        self._metrics = None
+
+        # Draw the universe back over the HUD once it is hidden.
+        if not self.visible:
+            self.renderer.mark_all()
+            self._surface = None
+
+    def update(self, frame):
+        """Take the statistics of a new frame of the worker into account.
+
+        :param: frame: The frame. Frames without statistics are left out.
+
+        :return: Void.
+        """
+        if not self.visible or frame is None or frame.stats is None:
+            return
+        now = time.perf_counter()
+        self._samples.append((now, frame.generation, frame.stats))
+        self._metrics = frame.metrics if frame.metrics is not None else self._metrics
+        while len(self._samples) > 2 and self._samples[1][0] < now - RATE_SECONDS:
+            self._samples.popleft()
+
+    def _lines(self):
+        """Get the lines of text of the HUD."""
+        lines = ['{:.0f} fps'.format(self.profiler.fps())]
+        if self._samples:
+            (first, generation, (_, generations, inverted, seconds)), (last, latest, stats) = \
+                self._samples[0], self._samples[-1]
+            stepped = stats[1] - generations
+            lines[0] = 'generation {}  {:.1f} gens/s  {}'.format(
+                latest, (latest - generation) / (last - first) if last > first else 0.0, lines[0])
+            lines.append('population {}  changed {:.0f}/gen  step {:.2f} ms/gen'.format(
+                stats[0], (stats[2] - inverted) / stepped if stepped else 0.0,
+                (stats[3] - seconds) * 1000 / stepped if stepped else 0.0))
+        lines.append('  '.join('{} {:.2f}'.format(phase, ms) for phase, ms in self.profiler.phase_ms().items()) +
+                     ' ms')
+        return lines
+
+    def _draw_graph(self, surface, top):
+        """Draw the graph of the recent generations onto a surface, the population scaled to fill its height, and the
+        births and deaths over it, scaled together."""
+        if self._metrics is None or len(self._metrics['generation']) < 2:
+            return
+        x = range(4, 4 + len(self._metrics['generation']))
+        for names, colors in ((('population',), (TEXT_COLOR,)), (('births', 'deaths'), (BIRTHS_COLOR, DEATHS_COLOR))):
+            low = min(self._metrics[name].min() for name in names)
+            high = max(self._metrics[name].max() for name in names)
+            for name, color in zip(names, colors):
+                y = top + GRAPH_HEIGHT - (self._metrics[name] - low) * GRAPH_HEIGHT // max(high - low, 1)
+                pygame.draw.lines(surface, color, False, list(zip(x, y.tolist())))
+
+    def draw(self, drawn):
+        """Draw the HUD in the top left hand corner of the display and push it to the screen.
+
+        The text is rendered a few times per second. In between, the HUD is only drawn again if the universe was drawn
+        over it.
+
+        :param: drawn: Whether the renderer drew a frame since the last call.
+
+        :return: Void.
+        """
+        if not self.visible:
+            return
+        now = time.perf_counter()
+        if self._surface is None or now - self._rendered_at >= 1 / REFRESH_RATE:
+            lines = [self._font.render(line, True, TEXT_COLOR) for line in self._lines()]
+            graph = self._metrics is not None
+            width = max([line.get_width() for line in lines] + [GRAPH_WIDTH if graph else 0]) + 8
+            height = sum(line.get_height() for line in lines) + (GRAPH_HEIGHT + 4 if graph else 0) + 8
+
+            # Cover the last text too, in case the new one is smaller.
+            if self._surface is not None:
+                width, height = max(width, self._surface.get_width()), max(height, self._surface.get_height())
+            self._surface = pygame.Surface((width, height))
+            self._surface.fill(BACKGROUND_COLOR)
+            y = 4
+            for line in lines:
+                self._surface.blit(line, (4, y))
+                y += line.get_height()
+            self._draw_graph(self._surface, y + 4)
+            self._rendered_at = now
+        elif not drawn:
+            return
+        pygame.display.update(self.window.blit(self._surface, (0, 0)))
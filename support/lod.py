@@ -0,0 +1,141 @@
+"""Level of detail module. Holds a population pyramid used to draw zoomed out views of large universes.
+
+At level k the universe is divided into blocks of 2 ** k x 2 ** k cells and the pyramid knows how many cells of each
+block are alive. A zoomed out view draws one block per pixel, shaded by how full the block is, so drawing it costs as
+much as the display is large, no matter how large the universe is.
+"""
+
+import numpy as np
+from .engine import as_cells
+from .sparse import pack, unpack
+
+# The number of levels kept by default. At the top level a block is 4096 cells wide.
+LEVELS = 12
+
+
+class PopulationPyramid:
+    """Counts of the alive cells of every block of the universe, at every level up to a maximum.
+
+    Each level is split into square tiles of blocks. The counts of the tiles of a level are stored in one stacked
+    array, with a dictionary giving the slot of each tile, so that updating a level is a single vectorized pass no
+    matter how many tiles the changes touch. Only tiles that ever held an alive cell take up memory.
+    """
+
+    def __init__(self, levels=LEVELS, tile_size=64):
+        """Create an empty pyramid.
+
+        :param: levels: The number of levels above the cells. At most 15, so that the counts fit in 32 bits.
+        :param: tile_size: The width and height in blocks of a tile. Must be a power of two.
+        """
+        self.levels = levels
+        self.tile_size = tile_size
+        self._tile_shift = tile_size.bit_length() - 1
+        self.clear()
+
+    def clear(self):
+        """Make every cell dead and free all tiles.
+
+        :return: Void.
+        """
+        # Level 0 holds the cells themselves and is not stored, its entries are kept empty to index by level.
+        self._slots = [{} for _ in range(self.levels + 1)]
+        self._counts = [np.zeros((0, self.tile_size, self.tile_size), dtype=np.int32) for _ in range(self.levels + 1)]
+
+    def add(self, cells, deltas):
+        """Change the counts of the blocks holding the given cells.
+
+        :param: cells: An (N, 2) array of cells.
+        :param: deltas: The change of each cell, 1 for a cell which came alive and -1 for one which died. Either a
+        single number or one per cell.
+
+        :return: Void.
+        """
+        cells = as_cells(cells)
+        deltas = np.broadcast_to(np.asarray(deltas, dtype=np.int64), (len(cells),))
+        for level in range(1, self.levels + 1):
+            if not len(cells):
+                return
+
+            # Merge the entries of the level below into the blocks of this level, summing their changes, so every
+            # level handles fewer entries than the one below.
+            keys, inverse = np.unique(pack(cells >> 1), return_inverse=True)
+            merged = np.zeros(len(keys), dtype=np.int64)
+            np.add.at(merged, inverse, deltas)
+            cells, deltas = unpack(keys[merged != 0]), merged[merged != 0]
+            self._add_level(level, cells, deltas)
+
+    def update(self, cells, state):
+        """Change the counts after the given cells were inverted.
+
+        :param: cells: An (N, 2) array of distinct cells whose state was inverted.
+        :param: state: The new state of each cell.
+
+        :return: Void.
+        """
+        self.add(cells, np.where(state, 1, -1))
+
+    def _add_level(self, level, blocks, deltas):
+        """Add changes to the counts of the blocks of a level, creating the tiles they fall in if needed."""
+        tiles = blocks >> self._tile_shift
+        inside = blocks & (self.tile_size - 1)
+        keys, inverse = np.unique(pack(tiles), return_inverse=True)
+        slots = np.array([self._slot(level, key) for key in keys.tolist()], dtype=np.int64)
+        np.add.at(self._counts[level], (slots[inverse], inside[:, 0], inside[:, 1]), deltas)
+
+    def _slot(self, level, key):
+        """Get the slot of a tile in the stacked counts of its level, adding a tile of zeros if it is new."""
+        slots = self._slots[level]
+        slot = slots.get(key)
+        if slot is None:
+            slot = slots[key] = len(slots)
+
+            # Grow the stacked counts by doubling so that adding tiles takes constant time on average.
+            counts = self._counts[level]
+            if slot == len(counts):
+                grown = np.zeros((max(2 * len(counts), 4),) + counts.shape[1:], dtype=counts.dtype)
+                grown[:len(counts)] = counts
+                self._counts[level] = grown
+        return slot
+
+    def get_counts(self, level, row, col, rows, cols):
+        """Get the number of alive cells of every block of a rectangular region of a level.
+
+        :param: level: The level of the blocks, from 1 to the number of levels.
+        :param: row: The top row of the region, in blocks.
+        :param: col: The left hand column of the region, in blocks.
+        :param: rows: The number of rows of the region.
+        :param: cols: The number of columns of the region.
+
+        :return: An int32 array of shape (rows, cols).
+        """
+        counts = np.zeros((rows, cols), dtype=np.int32)
+        slots = self._slots[level]
+        shift, size = self._tile_shift, self.tile_size
+
+        # Copy the overlapping part of every stored tile the region touches.
+        for tile_row in range((row >> shift), ((row + rows - 1) >> shift) + 1):
+            for tile_col in range((col >> shift), ((col + cols - 1) >> shift) + 1):
+                slot = slots.get((tile_row << 32) + tile_col)
+                if slot is None:
+                    continue
+                top, left = max(row, tile_row * size), max(col, tile_col * size)
+                bottom, right = min(row + rows, (tile_row + 1) * size), min(col + cols, (tile_col + 1) * size)
+                counts[top - row:bottom - row, left - col:right - col] = self._counts[level][
+                    slot, top - tile_row * size:bottom - tile_row * size, left - tile_col * size:right - tile_col * size]
+        return counts
+
+    def get_density(self, level, row, col, rows, cols):
+        """Get how full every block of a rectangular region of a level is.
+
+        :param: level: The level of the blocks, from 1 to the number of levels.
+        :param: row: The top row of the region, in blocks.
+        :param: col: The left hand column of the region, in blocks.
+        :param: rows: The number of rows of the region.
+        :param: cols: The number of columns of the region.
+
+        :return: A uint8 array of shape (rows, cols), 0 for an empty block and 255 for a full one. Blocks holding any
+        alive cell are at least 1.
+        """
+        area = 4 ** level
+        counts = self.get_counts(level, row, col, rows, cols).astype(np.int64)
+        return ((counts * 255 + area - 1) // area).astype(np.uint8)
@@ -0,0 +1,252 @@
+"""Metrics module. Derives statistics of every generation from the cells it inverted, and streams them to sinks.
+
+Nothing in this module depends on pygame so that metrics can be recorded headless.
+
+A step already finds every cell it inverted. Looking up the new state of those cells tells the births from the deaths,
+and keeping the number of alive cells in every row and every column of the universe up to date from them gives the
+bounding box. Every metric costs as much as the cells that changed, never a pass over the whole board, apart from
+counting the alive cells once when recording starts.
+
+The metrics of a generation are: generation, population, births, deaths, the top, left, bottom and right of the
+bounding box of the alive cells (None when there are none), and regions, an (N, 3) array of (row, col, changes) for
+each square region of the universe with cells that changed, rows and columns counted in regions.
+"""
+
+import csv
+import json
+import os
+import sys
+import numpy as np
+from .engine import as_cells
+
+# The default width and height in cells of the regions whose changes are counted.
+DEFAULT_REGION_SIZE = 64
+
+# The default number of generations kept by a RingSink.
+DEFAULT_CAPACITY = 1024
+
+# The metrics of a generation, in the order they are written.
+FIELDS = ('generation', 'population', 'births', 'deaths', 'top', 'left', 'bottom', 'right', 'regions')
+
+# The metrics a RingSink keeps, those with a single number per generation.
+NUMBERS = ('generation', 'population', 'births', 'deaths')
+
+
+class _LineCounts:
+    """The number of alive cells on every line, rows or columns, of an unbounded universe.
+
+    The counts live in an array covering the lines seen so far, which grows when a change lands past either end.
+    """
+
+    def __init__(self):
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._first = 0
+
+    def add(self, lines, deltas):
+        """Add deltas to the counts of lines. A line may appear more than once."""
+        if not len(lines):
+            return
+        low, high = int(lines.min()), int(lines.max())
+        if not len(self._counts):
+            self._first = low
+        if low < self._first or high >= self._first + len(self._counts):
+            # Leave as many spare lines as the array holds past each end it grows at, so that a pattern spreading
+            # outwards only grows it now and then.
+            end = self._first + len(self._counts)
+            first = low - len(self._counts) if low < self._first else self._first
+            end = high + 1 + len(self._counts) if high >= end else end
+            counts = np.zeros(end - first, dtype=np.int64)
+            counts[self._first - first:self._first - first + len(self._counts)] = self._counts
+            self._counts, self._first = counts, first
+        self._counts += np.bincount(lines - self._first, weights=deltas, minlength=len(self._counts)).astype(np.int64)
+
+    def span(self):
+        """Get the first and last lines with alive cells, or None if there are none."""
+        lines = np.flatnonzero(self._counts)
+        if not len(lines):
+            return None
+        return int(lines[0]) + self._first, int(lines[-1]) + self._first
+
+
+class MetricsRecorder:
+    """Keep the metrics of an engine up to date from the cells inverted by its steps and edits, and hand the metrics of
+    each generation to the sinks.
+    """
+
+    def __init__(self, engine, sinks=(), region_size=DEFAULT_REGION_SIZE):
+        """Start recording the metrics of an engine from its current state.
+
+        :param: engine: The simulation engine.
+        :param: sinks: The sinks to write the metrics of each generation to, see CsvSink, JsonlSink and RingSink.
+        :param: region_size: The width and height in cells of the regions whose changes are counted.
+        """
+        self.engine = engine
+        self.sinks = list(sinks)
+        self.region_size = region_size
+        self._rows = _LineCounts()
+        self._cols = _LineCounts()
+        cells = engine.live_cells()
+        self.population = len(cells)
+        self._add(cells, np.ones(len(cells), dtype=np.int64))
+
+    def _add(self, cells, deltas):
+        """Add deltas to the counts of the rows and columns of cells."""
+        self._rows.add(cells[:, 0], deltas)
+        self._cols.add(cells[:, 1], deltas)
+
+    def bounds(self):
+        """Get the bounding box of the alive cells.
+
+        :return: top, left, bottom, right: The first and last row and column holding alive cells, or None if there are
+        no alive cells.
+        """
+        rows, cols = self._rows.span(), self._cols.span()
+        if rows is None or cols is None:
+            return None
+        return rows[0], cols[0], rows[1], cols[1]
+
+    def update(self, cells, state=None):
+        """Take cells inverted other than by a step into account, e.g. by an edit. No metrics are written.
+
+        :param: cells: An (N, 2) array of the distinct cells which were inverted.
+        :param: state: The boolean array of the new state of each cell. Looked up in the engine if not given.
+
+        :return: The number of cells which came alive.
+        """
+        cells = as_cells(cells)
+        state = self.engine.get_cells(cells) if state is None else state
+        deltas = np.where(state, 1, -1)
+        self._add(cells, deltas)
+        born = int(np.count_nonzero(state))
+        self.population += 2 * born - len(cells)
+        return born
+
+    def step(self, cells, state=None):
+        """Take the cells inverted by a step into account and write the metrics of the new generation to the sinks.
+
+        :param: cells: An (N, 2) array of the distinct cells which the step inverted.
+        :param: state: The boolean array of the new state of each cell. Looked up in the engine if not given.
+
+        :return: The metrics, as a dictionary holding every field of FIELDS.
+        """
+        cells = as_cells(cells)
+        births = self.update(cells, state)
+
+        # Count the changes in each region the changed cells fall in.
+        regions = cells // self.region_size
+        keys, changes = np.unique(regions, axis=0, return_counts=True)
+        bounds = self.bounds() or (None,) * 4
+        metrics = dict(zip(FIELDS, (self.engine.generation, self.population, births, len(cells) - births) + bounds +
+                           (np.column_stack((keys, changes)),)))
+        for sink in self.sinks:
+            sink.write(metrics)
+        return metrics
+
+    def close(self):
+        """Close every sink.
+
+        :return: Void.
+        """
+        for sink in self.sinks:
+            sink.close()
+
+
+class JsonlSink:
+    """Write the metrics of each generation as one line of JSON, with the regions as [row, col, changes] lists."""
+
+    def __init__(self, file):
+        """Create a sink.
+
+        :param: file: The open text file to write to. It is flushed after every generation and closed with the sink,
+        unless it is stdout.
+        """
+        self.file = file
+
+    def write(self, metrics):
+        """Write the metrics of a generation, see FIELDS.
+
+        :return: Void.
+        """
+        self.file.write(json.dumps({**metrics, 'regions': metrics['regions'].tolist()}) + '\n')
+        self.file.flush()
+
+    def close(self):
+        """Close the file, unless it is stdout.
+
+        :return: Void.
+        """
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+class CsvSink(JsonlSink):
+    """Write the metrics of each generation as one row of CSV, after a header row, with the regions written as
+    'row,col:changes' triples separated by spaces.
+    """
+
+    def __init__(self, file):
+        super().__init__(file)
+        self._writer = csv.DictWriter(file, FIELDS)
+        self._writer.writeheader()
+
+    def write(self, metrics):
+        self._writer.writerow({**metrics, 'regions': ' '.join('{},{}:{}'.format(*region)
+                                                               for region in metrics['regions'].tolist())})
+        self.file.flush()
+
+
+class RingSink:
+    """Keep the metrics of the most recent generations in memory, e.g. to draw a graph of them.
+
+    Only the metrics holding a single number, see NUMBERS, are kept, in preallocated arrays written round and round.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        """Create a sink.
+
+        :param: capacity: The number of generations to keep.
+        """
+        self._values = np.zeros((len(NUMBERS), capacity), dtype=np.int64)
+        self._count = 0
+
+    def write(self, metrics):
+        """Keep the metrics of a generation, see FIELDS, in place of the oldest ones.
+
+        :return: Void.
+        """
+        self._values[:, self._count % self._values.shape[1]] = [metrics[name] for name in NUMBERS]
+        self._count += 1
+
+    def snapshot(self):
+        """Get a copy of the metrics kept.
+
+        :return: A dictionary from each name of NUMBERS to an array of its values, oldest first.
+        """
+        capacity = self._values.shape[1]
+        order = np.arange(max(self._count - capacity, 0), self._count) % capacity
+        return dict(zip(NUMBERS, self._values[:, order]))
+
+    def close(self):
+        """Do nothing. The metrics kept stay readable.
+
+        :return: Void.
+        """
+
+
+# The file sinks by extension.
+SINKS = {'.csv': CsvSink, '.jsonl': JsonlSink}
+
+
+def open_sink(path):
+    """Open a file to write metrics to, picking the format from its extension.
+
+    :param: path: The path of a .csv or .jsonl file, or - for JSONL on stdout.
+
+    :return: The sink.
+    """
+    if path == '-':
+        return JsonlSink(sys.stdout)
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SINKS:
+        raise ValueError('unknown metrics format {!r}, use one of {}'.format(extension, ', '.join(SINKS)))
+    return SINKS[extension](open(path, 'w', newline=''))
@@ -0,0 +1,131 @@
+"""Parallel universe module. Holds a backend that steps horizontal strips of the board in a pool of processes.
+
+The board lives in two shared memory buffers that every worker maps once when it starts. Each generation the workers
+read their strip, plus the ghost row above and below it, from one buffer and write the next generation of the strip
+into the other, so no cell state is ever pickled. Only the small arrays of inverted cells travel back.
+"""
+
+import multiprocessing
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from .engine import DenseEngine, cell_die_or_live
+
+# The shared buffers as mapped by a worker process and the rule they are stepped with, set up by _attach.
+_worker_memory = []
+_worker_buffers = []
+_worker_rule = []
+
+
+def _attach(names, shape, rule):
+    """Map the shared buffers into a worker process. Runs once when the worker starts.
+
+    :param: names: The names of the two shared memory blocks.
+    :param: shape: The shape of each buffer.
+    :param: rule: The Life-like Rule to step with.
+
+    :return: Void.
+    """
+    _worker_rule.append(rule)
+    for name in names:
+        memory = shared_memory.SharedMemory(name=name)
+        _worker_memory.append(memory)
+        _worker_buffers.append(np.ndarray(shape, dtype=bool, buffer=memory.buf))
+
+
+def _step_strip(source, start, stop):
+    """Step one strip of rows from one buffer into the other. Runs in a worker process.
+
+    :param: source: The index of the buffer holding the current generation.
+    :param: start: The first row of the strip, counted from the top of the board.
+    :param: stop: The row after the last row of the strip.
+
+    :return: An (N, 2) array holding the cells of the strip whose state was inverted.
+    """
+    current = _worker_buffers[source]
+    rows = stop - start
+    cols = current.shape[1] - 2
+
+    # The buffer rows start to stop + 2 hold the strip along with its ghost rows.
+    block = current[start:stop + 2].view(np.uint8)
+    count = np.zeros((rows, cols), dtype=np.uint8)
+    for i in range(3):
+        for j in range(3):
+            if (i != 1) or (j != 1):
+                count += block[i:i + rows, j:j + cols]
+
+    state = current[start + 1:stop + 1, 1:-1]
+    inverse = cell_die_or_live(count, state, _worker_rule[0])
+    _worker_buffers[1 - source][start + 1:stop + 1, 1:-1] = state ^ inverse
+    return np.argwhere(inverse) + (start, 0)
+
+
+def _release(executor, memory):
+    """Shut the worker pool down and free the shared buffers."""
+    executor.shutdown(wait=True, cancel_futures=True)
+    for block in memory:
+        block.close()
+        block.unlink()
+
+
+class ParallelEngine(DenseEngine):
+    """Backend splitting the board into horizontal strips stepped by a pool of worker processes.
+
+    Call close when done with the engine to stop the workers and free the shared memory. This also happens when the
+    engine is garbage collected or the interpreter exits.
+    """
+
+    BOUNDARIES = ('dead', 'torus')
+
+    def __init__(self, rows, cols, boundary=None, rule=None, workers=None, strips=None):
+        """Create an empty universe.
+
+        :param: rows: The number of rows of the universe.
+        :param: cols: The number of columns of the universe.
+        :param: boundary: The boundary policy of the universe.
+        :param: rule: The Life-like Rule to run. Defaults to Conway's B3/S23.
+        :param: workers: The number of worker processes. Defaults to the number of CPUs.
+        :param: strips: The number of strips the board is split into. Defaults to the number of workers.
+        """
+        super().__init__(rows, cols, boundary, rule)
+        self.workers = workers or os.cpu_count() or 1
+        strips = min(strips or self.workers, rows)
+        self._strips = [(rows * i // strips, rows * (i + 1) // strips) for i in range(strips)]
+
+        # Create the two buffers, each with a border of ghost cells all the way round.
+        shape = (rows + 2, cols + 2)
+        self._memory = [shared_memory.SharedMemory(create=True, size=shape[0] * shape[1]) for _ in range(2)]
+        self._buffers = [np.ndarray(shape, dtype=bool, buffer=memory.buf) for memory in self._memory]
+        for buffer in self._buffers:
+            buffer[:] = False
+        self._source = 0
+        self.array = self._buffers[0][1:-1, 1:-1]
+
+        # Start the workers in fresh interpreters so they never inherit state such as an open display.
+        self._executor = ProcessPoolExecutor(self.workers, multiprocessing.get_context('spawn'), _attach,
+                                             ([memory.name for memory in self._memory], shape, self.rule))
+        self._finalizer = weakref.finalize(self, _release, self._executor, self._memory)
+
+    def close(self):
+        """Stop the worker processes and free the shared buffers. The final state stays readable."""
+        if self._finalizer.alive:
+            self.array = self.array.copy()
+            self._buffers = []
+            self._finalizer()
+
+    def step(self):
+        # Fill the ghost border with the opposite edge of the board if it wraps around. Otherwise it stays dead.
+        current = self._buffers[self._source]
+        if self.boundary == 'torus':
+            current[0], current[-1] = current[-2], current[1]
+            current[:, 0], current[:, -1] = current[:, -2], current[:, 1]
+
+        # Step every strip in the pool and wait for all of them before swapping the buffers.
+        futures = [self._executor.submit(_step_strip, self._source, start, stop) for start, stop in self._strips]
+        inverse_indices = np.concatenate([future.result() for future in futures]).astype(np.int64)
+        self._source = 1 - self._source
+        self.array = self._buffers[self._source][1:-1, 1:-1]
+        self.generation += 1
+        return inverse_indices
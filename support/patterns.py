@@ -0,0 +1,486 @@
+"""Pattern file module. Holds the functions that read and write patterns to and from files.
+
+Nothing in this module depends on pygame so that patterns can be loaded and saved headless.
+
+Three formats are understood: plaintext (.cells), run length encoded (.rle) and Life 1.06 (.lif, .life). Binary
+checkpoints (.ckpt, see the checkpoint module) are loaded and saved through the same functions.
+
+The readers stream. They read the file in fixed size blocks and parse each block with vectorized NumPy passes over its
+bytes, yielding the alive cells of the block as an (N, 2) array, so a pattern of any size loads in bounded memory
+straight into an engine. Files may be opened in binary or text mode.
+"""
+
+import os
+import numpy as np
+from .checkpoint import CHECKPOINT_EXTENSION, load_checkpoint, save_checkpoint
+from .engine import as_cells
+
+# The number of bytes read from a pattern file at a time.
+BLOCK_SIZE = 1 << 18
+
+# RLE writers keep lines at most this long, as the format asks.
+RLE_LINE_LENGTH = 70
+
+_NEWLINE = ord('\n')
+_DIGIT_ZERO = ord('0')
+
+
+def _blocks(file, block_size):
+    """Read a file block by block as arrays of bytes.
+
+    :param: file: The open file to read.
+    :param: block_size: The number of bytes, or characters in text mode, to read at a time.
+
+    :return: Generator of uint8 arrays.
+    """
+    while True:
+        block = file.read(block_size)
+        if not block:
+            return
+        if isinstance(block, str):
+            block = block.encode('ascii')
+        yield np.frombuffer(block, dtype=np.uint8)
+
+
+def _lines(file, block_size):
+    """Read a file block by block, cutting each block after its last complete line.
+
+    :param: file: The open file to read.
+    :param: block_size: The number of bytes to read at a time.
+
+    :return: Generator of uint8 arrays, each ending with a newline.
+    """
+    carry = np.empty(0, dtype=np.uint8)
+    for block in _blocks(file, block_size):
+        data = np.concatenate((carry, block))
+        newlines = np.flatnonzero(data == _NEWLINE)
+        if not len(newlines):
+            carry = data
+            continue
+        carry = data[newlines[-1] + 1:]
+        yield data[:newlines[-1] + 1]
+
+    # Give the last line a newline if the file did not end with one.
+    if len(carry):
+        yield np.append(carry, np.uint8(_NEWLINE))
+
+
+def _numbers(data):
+    """Find the runs of decimal digits in an array of bytes and the numbers they spell.
+
+    :param: data: The uint8 array of bytes.
+
+    :return: starts, ends, values: The position of the first digit of each run, the position after its last digit and
+    its value.
+    """
+    digit = (data >= _DIGIT_ZERO) & (data <= _DIGIT_ZERO + 9)
+    edges = np.diff(np.concatenate(([0], digit.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if not len(starts):
+        return starts, ends, np.empty(0, dtype=np.int64)
+
+    # Weigh every digit by the power of ten of its place within its run, then add up each run.
+    lengths = ends - starts
+    positions = np.flatnonzero(digit)
+    places = np.repeat(ends - 1, lengths) - positions
+    weighted = (data[positions] - _DIGIT_ZERO).astype(np.int64) * np.power(10, places, dtype=np.int64)
+    return starts, ends, np.add.reduceat(weighted, np.cumsum(lengths) - lengths)
+
+
+def iter_plaintext(file, block_size=BLOCK_SIZE):
+    """Read the alive cells of a pattern stored in the plaintext (.cells) format, block by block.
+
+    Lines beginning with '!' are comments. Every other line is a row of the pattern where 'O' (or '*') is an alive
+    cell and '.' is a dead cell.
+
+    :param: file: The open file to read.
+    :param: block_size: The number of bytes to read at a time.
+
+    :return: Generator of (N, 2) arrays of alive cells, with the top left hand corner of the pattern at (0, 0).
+    """
+    for cells, _ in _iter_plaintext(file, block_size):
+        yield cells
+
+
+def _iter_plaintext(file, block_size):
+    """Read a plaintext pattern block by block, also yielding the number of rows and columns seen so far."""
+    rows = cols = 0
+    for data in _lines(file, block_size):
+        newlines = np.flatnonzero(data == _NEWLINE)
+        starts = np.concatenate(([0], newlines[:-1] + 1))
+
+        # Drop the comment lines, numbering the rows of the pattern that are left.
+        pattern = data[starts] != ord('!')
+        row_of_line = rows + np.cumsum(pattern) - 1
+
+        # Find the alive cells of the pattern lines and their place in their line.
+        alive = np.flatnonzero((data == ord('O')) | (data == ord('*')))
+        line = np.searchsorted(newlines, alive)
+        alive, line = alive[pattern[line]], line[pattern[line]]
+        cells = np.stack((row_of_line[line], alive - starts[line]), axis=1)
+
+        # The width of a line does not count a carriage return before the newline.
+        lengths = newlines - starts - (data[np.maximum(newlines - 1, 0)] == ord('\r'))
+        cols = max(cols, int(lengths[pattern].max(initial=0)))
+        rows += int(pattern.sum())
+        yield cells, (rows, cols)
+
+
+def read_plaintext(file):
+    """Read a pattern stored in the plaintext (.cells) format.
+
+    Lines beginning with '!' are comments. Every other line is a row of the pattern where 'O' (or '*') is an alive
+    cell and '.' is a dead cell.
+
+    :param: file: The open file to read.
+
+    :return: cells, size: The (N, 2) array of alive cells and the (rows, cols) size of the pattern.
+    """
+    chunks = []
+    size = (0, 0)
+    for cells, size in _iter_plaintext(file, BLOCK_SIZE):
+        chunks.append(cells)
+    return as_cells(np.concatenate(chunks) if chunks else []), size
+
+
+def read_rle_header(file):
+    """Read the comment lines and the header line of a pattern stored in the RLE format.
+
+    :param: file: The open file to read. It is left at the start of the encoded cells.
+
+    :return: A dictionary of the header fields, e.g. {'x': '3', 'y': '3', 'rule': 'B3/S23'}. Empty if the file has no
+    header line.
+    """
+    while True:
+        position = file.tell()
+        line = file.readline()
+        if isinstance(line, bytes):
+            line = line.decode('ascii')
+        if not line:
+            return {}
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+
+        # The header line looks like 'x = m, y = n, rule = abc'. Anything else is already part of the cells.
+        if not line.startswith('x'):
+            file.seek(position)
+            return {}
+        return {key.strip(): value.strip() for key, value in (field.split('=', 1) for field in line.split(','))}
+
+
+def iter_rle(file, block_size=BLOCK_SIZE):
+    """Read the alive cells of a pattern stored in the run length encoded (RLE) format, block by block.
+
+    The cells are a sequence of tags, each optionally preceded by a run count: 'b' is a dead cell, 'o' (or any other
+    letter) an alive cell, '$' the end of a row and '!' the end of the pattern.
+
+    :param: file: The open file to read.
+    :param: block_size: The number of bytes to read at a time.
+
+    :return: Generator of (N, 2) arrays of alive cells, with the top left hand corner of the pattern at (0, 0).
+    """
+    read_rle_header(file)
+    row = col = 0
+    carry = np.empty(0, dtype=np.uint8)
+    for block in _blocks(file, block_size):
+        data = np.concatenate((carry, block))
+        data = data[data > ord(' ')]
+
+        # Stop at the end of the pattern. Otherwise hold back a run count cut off by the end of the block.
+        end = np.flatnonzero(data == ord('!'))
+        finished = len(end) > 0
+        if finished:
+            data = data[:end[0]]
+            carry = data[:0]
+        else:
+            digits = (data >= _DIGIT_ZERO) & (data <= _DIGIT_ZERO + 9)
+            cut = len(data) - np.argmin(digits[::-1]) if len(data) and not digits.all() else 0
+            data, carry = data[:cut], data[cut:]
+
+        # Find the tags and their run counts, 1 unless there is a number right before the tag.
+        _, ends, values = _numbers(data)
+        tags = np.flatnonzero((data < _DIGIT_ZERO) | (data > _DIGIT_ZERO + 9))
+        counts = np.ones(len(tags), dtype=np.int64)
+        index = np.minimum(np.searchsorted(ends, tags), max(len(ends) - 1, 0))
+        counted = ends[index] == tags if len(ends) else np.zeros(len(tags), dtype=bool)
+        counts[counted] = values[index[counted]]
+        kinds = data[tags]
+
+        # Work out the row and column each tag starts at. Row ends move down and go back to the first column.
+        newline = kinds == ord('$')
+        down = np.where(newline, counts, 0)
+        across = np.where(newline, 0, counts)
+        tag_rows = row + np.cumsum(down) - down
+        passed = np.cumsum(across) - across
+        last_newline = np.maximum.accumulate(np.where(newline, np.arange(len(tags)), -1))
+        tag_cols = np.where(last_newline >= 0, passed - passed[last_newline], passed + col)
+
+        # Expand the runs of alive cells into cells.
+        alive = ~newline & (kinds != ord('b')) & (kinds != ord('.'))
+        lengths = counts[alive]
+        first = np.cumsum(lengths) - lengths
+        cells = np.empty((int(lengths.sum()), 2), dtype=np.int64)
+        cells[:, 0] = np.repeat(tag_rows[alive], lengths)
+        cells[:, 1] = np.repeat(tag_cols[alive] - first, lengths) + np.arange(len(cells))
+        yield cells
+
+        if len(tags):
+            row = int(tag_rows[-1] + down[-1])
+            col = 0 if newline[-1] else int(tag_cols[-1] + across[-1])
+        if finished:
+            return
+
+
+def iter_life106(file, block_size=BLOCK_SIZE):
+    """Read the alive cells of a pattern stored in the Life 1.06 format, block by block.
+
+    Lines beginning with '#' are comments, the first one being '#Life 1.06'. Every other line holds the x (column) and
+    y (row) of an alive cell, separated by whitespace.
+
+    :param: file: The open file to read.
+    :param: block_size: The number of bytes to read at a time.
+
+    :return: Generator of (N, 2) arrays of alive cells, at the coordinates given in the file.
+    """
+    for data in _lines(file, block_size):
+        # Blank out the comment lines.
+        newlines = np.flatnonzero(data == _NEWLINE)
+        starts = np.concatenate(([0], newlines[:-1] + 1))
+        comment = data[starts] == ord('#')
+        data = np.where(np.repeat(comment, newlines - starts + 1), np.uint8(ord(' ')), data)
+
+        # The numbers come in (x, y) pairs. A minus sign right before a number makes it negative.
+        starts, _, values = _numbers(data)
+        negative = data[np.maximum(starts - 1, 0)] == ord('-')
+        values = np.where(negative & (starts > 0), -values, values)
+        if len(values) % 2:
+            raise ValueError('Life 1.06 line without a y coordinate')
+        yield np.stack((values[1::2], values[0::2]), axis=1)
+
+
+def write_plaintext(file, engine, row=0, col=0, rows=None, cols=None):
+    """Write a region of the engine to a file in the plaintext (.cells) format.
+
+    :param: file: The open text file to write to.
+    :param: engine: The simulation engine that stores the state of each cell.
+    :param: row: The row of the top left hand corner of the region.
+    :param: col: The column of the top left hand corner of the region.
+    :param: rows: The number of rows in the region. Defaults to the rows of the engine, or to the rows up to the last
+    alive cell in an unbounded universe.
+    :param: cols: The number of columns in the region. Defaults to the columns of the engine, or to the columns up to
+    the last alive cell in an unbounded universe.
+
+    :return: Void.
+    """
+    rows, cols = _region_size(engine, row, col, rows, cols)
+    region = engine.get_region(row, col, rows, cols)
+
+    # Map each cell to its character and write the region out row by row.
+    chars = np.where(region, ord('O'), ord('.')).astype(np.uint8)
+    file.write('!Generation: {}\n'.format(engine.generation))
+    for line in chars:
+        file.write(line.tobytes().decode('ascii') + '\n')
+
+
+def write_rle(file, engine, row=0, col=0, rows=None, cols=None, band_rows=256):
+    """Write a region of the engine to a file in the run length encoded (RLE) format.
+
+    :param: file: The open text file to write to.
+    :param: engine: The simulation engine that stores the state of each cell.
+    :param: row: The row of the top left hand corner of the region.
+    :param: col: The column of the top left hand corner of the region.
+    :param: rows: The number of rows in the region. Defaults as for write_plaintext.
+    :param: cols: The number of columns in the region. Defaults as for write_plaintext.
+    :param: band_rows: The number of rows of the region read from the engine at a time.
+
+    :return: Void.
+    """
+    rows, cols = _region_size(engine, row, col, rows, cols)
+    file.write('#C Generation: {}\n'.format(engine.generation))
+    file.write('x = {}, y = {}, rule = {}\n'.format(cols, rows, engine.rule))
+
+    line = ''
+    pending_rows = 0
+    for top in range(row, row + rows, band_rows):
+        region = engine.get_region(top, col, min(band_rows, row + rows - top), cols)
+
+        # Find where each row switches between dead and alive. Every row starts dead and ends dead.
+        edges = np.diff(region.view(np.int8), axis=1, prepend=0, append=0)
+        for switches in (np.flatnonzero(edges_of_row) for edges_of_row in edges):
+            if len(switches):
+                tokens = ['{}$'.format(pending_rows) if pending_rows > 1 else '$'] if pending_rows else []
+                pending_rows = 0
+                starts = np.concatenate(([0], switches[:-1]))
+                for start, stop, tag in zip(starts.tolist(), switches.tolist(), 'bo' * (len(switches) // 2)):
+                    if stop > start:
+                        tokens.append('{}{}'.format(stop - start, tag) if stop - start > 1 else tag)
+
+                # Keep lines short, never breaking a token.
+                for token in tokens:
+                    if len(line) + len(token) > RLE_LINE_LENGTH:
+                        file.write(line + '\n')
+                        line = ''
+                    line += token
+            pending_rows += 1
+    file.write(line + '!\n')
+
+
+def write_life106(file, engine):
+    """Write all alive cells of the engine to a file in the Life 1.06 format.
+
+    :param: file: The open text file to write to.
+    :param: engine: The simulation engine that stores the state of each cell.
+
+    :return: Void.
+    """
+    file.write('#Life 1.06\n')
+    cells = engine.live_cells()
+    for start in range(0, len(cells), 1 << 16):
+        chunk = cells[start:start + (1 << 16)]
+        file.write(''.join('{} {}\n'.format(x, y) for y, x in chunk.tolist()))
+
+
+def _region_size(engine, row, col, rows, cols):
+    """Fill in the default size of a region to write, see write_plaintext."""
+    if engine.rows is not None:
+        return engine.rows if rows is None else rows, engine.cols if cols is None else cols
+
+    # Reach as far as the last alive cell in an unbounded universe.
+    cells = engine.live_cells()
+    bottom, right = (cells.max(axis=0) + 1).tolist() if len(cells) else (row, col)
+    return max(bottom - row, 0) if rows is None else rows, max(right - col, 0) if cols is None else cols
+
+
+# The readers and writers of each format by file extension.
+FORMATS = {
+    '.cells': (iter_plaintext, write_plaintext),
+    '.rle': (iter_rle, write_rle),
+    '.lif': (iter_life106, write_life106),
+    '.life': (iter_life106, write_life106),
+}
+
+
+# Every extension load_pattern and save_pattern understand.
+EXTENSIONS = tuple(FORMATS) + (CHECKPOINT_EXTENSION,)
+
+
+def _is_checkpoint(path):
+    """Get whether a file is a checkpoint from its extension."""
+    return os.path.splitext(path)[1].lower() == CHECKPOINT_EXTENSION
+
+
+def _format(path):
+    """Get the reader and writer for a file from its extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError('unknown pattern format {!r}, use one of {}'.format(extension, ', '.join(EXTENSIONS)))
+    return FORMATS[extension]
+
+
+def pattern_rule(path):
+    """Get the rule a pattern file was made for. Only RLE files and checkpoints give one.
+
+    :param: path: The path of the file. The format is chosen by its extension.
+
+    :return: The rulestring, e.g. 'B3/S23', or None if the file does not give one.
+    """
+    if _is_checkpoint(path):
+        return str(load_checkpoint(path).rule)
+    if _format(path)[0] is not iter_rle:
+        return None
+    with open(path, 'rb') as file:
+        return read_rle_header(file).get('rule')
+
+
+def pattern_boundary(path):
+    """Get the boundary policy a pattern file was saved with. Only checkpoints give one.
+
+    :param: path: The path of the file. The format is chosen by its extension.
+
+    :return: The boundary policy, e.g. 'torus', or None if the file does not give one.
+    """
+    return load_checkpoint(path).boundary if _is_checkpoint(path) else None
+
+
+def pattern_bounds(path):
+    """Get the bounding box of the alive cells of a pattern file.
+
+    :param: path: The path of the file. The format is chosen by its extension.
+
+    :return: row, col, rows, cols: The top left hand cell of the bounding box and its number of rows and columns.
+    """
+    # The headers of checkpoints and RLE files give their size without reading the cells.
+    if _is_checkpoint(path):
+        checkpoint = load_checkpoint(path)
+        return checkpoint.row, checkpoint.col, checkpoint.rows, checkpoint.cols
+    with open(path, 'rb') as file:
+        if _format(path)[0] is iter_rle:
+            header = read_rle_header(file)
+            if 'x' in header and 'y' in header:
+                return 0, 0, int(header['y']), int(header['x'])
+            file.seek(0)
+
+        top = left = np.iinfo(np.int64).max
+        bottom = right = np.iinfo(np.int64).min
+        for cells in _format(path)[0](file):
+            if len(cells):
+                top, left = np.minimum((top, left), cells.min(axis=0)).tolist()
+                bottom, right = np.maximum((bottom, right), cells.max(axis=0)).tolist()
+    if top > bottom:
+        return 0, 0, 0, 0
+    return top, left, bottom - top + 1, right - left + 1
+
+
+def read_pattern(path):
+    """Read all of the alive cells of a pattern file at once, e.g. to paste them again and again.
+
+    :param: path: The path of the file. The format is chosen by its extension.
+
+    :return: An (N, 2) array of the alive cells, where the pattern puts them.
+    """
+    if _is_checkpoint(path):
+        return load_checkpoint(path).live_cells()
+    with open(path, 'rb') as file:
+        return as_cells(np.concatenate(list(_format(path)[0](file)) or [np.empty((0, 2), dtype=np.int64)]))
+
+
+def load_pattern(path, engine, row=0, col=0):
+    """Stream the alive cells of a pattern file into an engine.
+
+    :param: path: The path of the file. The format is chosen by its extension.
+    :param: engine: The simulation engine to load the pattern into. Cells already alive stay alive.
+    :param: row: The row to place the origin of the pattern at.
+    :param: col: The column to place the origin of the pattern at.
+
+    :return: Void.
+    """
+    if _is_checkpoint(path):
+        engine.set_cells(load_checkpoint(path).live_cells() + (row, col), True)
+        return
+    with open(path, 'rb') as file:
+        for cells in _format(path)[0](file):
+            engine.set_cells(cells + (row, col), True)
+
+
+def save_pattern(path, engine):
+    """Write all of a bounded engine, or all alive cells of an unbounded one, to a pattern file.
+
+    :param: path: The path of the file. The format is chosen by its extension.
+    :param: engine: The simulation engine that stores the state of each cell.
+
+    :return: Void.
+    """
+    if _is_checkpoint(path):
+        save_checkpoint(path, engine)
+        return
+    writer = _format(path)[1]
+    with open(path, 'w') as file:
+        if writer is write_life106 or engine.rows is not None:
+            writer(file, engine)
+        else:
+            # Start the region at the first alive cell.
+            cells = engine.live_cells()
+            top, left = cells.min(axis=0).tolist() if len(cells) else (0, 0)
+            writer(file, engine, top, left)
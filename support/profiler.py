@@ -0,0 +1,187 @@
+"""Profiler module. Times the phases of every frame of the game loop, and profiles it with cProfile on demand.
+
+Nothing in this module depends on pygame so that the timings can be read and written anywhere.
+
+The game loop calls mark at the end of each of its phases and end_frame at the end of each frame. While nothing
+needs the timings, both are replaced by a function doing nothing, so the instrumentation costs a few empty calls per
+frame.
+"""
+
+import collections
+import cProfile
+import csv
+import pstats
+import sys
+import time
+
+# The phases of a frame of the game loop, in order: handling events, picking up the frame of the worker, drawing it
+# into the window, pushing the window to the screen, drawing the HUD, and waiting for the next frame.
+PHASES = ('events', 'frame', 'draw', 'display', 'hud', 'wait')
+
+# The default number of recent frames averaged over.
+DEFAULT_WINDOW = 120
+
+# The default number of frames profiled with cProfile at a time.
+DEFAULT_PROFILE_FRAMES = 300
+
+
+def _ignore(*args, **kwargs):
+    """Do nothing, standing in for the timing methods while nothing needs the timings."""
+
+
+class Profiler:
+    """Time the phases of the frames of the game loop.
+
+    The timings are kept for the recent frames, and written to a CSV trace file, one row per frame, if asked to. Timing
+    is only switched on while something needs it, see enable.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, trace_path=None, profile_path='profile.prof',
+                 profile_frames=DEFAULT_PROFILE_FRAMES):
+        """Create a profiler.
+
+        :param: window: The number of recent frames to keep the timings of.
+        :param: trace_path: The path of a CSV file to write the timings of every frame to, or None not to.
+        :param: profile_path: The path to save cProfile statistics to, see profile.
+        :param: profile_frames: The number of frames to profile with cProfile at a time.
+        """
+        self._frames = collections.deque(maxlen=window)
+        self._reasons = set()
+        self._times = dict.fromkeys(PHASES, 0.0)
+        self._last = self._start = time.perf_counter()
+        self._count = 0
+        self._trace = None
+        self._profile = None
+        self._profile_left = 0
+        self.profile_path = profile_path
+        self.profile_frames = profile_frames
+        if trace_path is not None:
+            self._trace_file = open(trace_path, 'w', newline='')
+            self._trace = csv.writer(self._trace_file)
+            self._trace.writerow(('frame', 'seconds') + tuple(phase + '_ms' for phase in PHASES) +
+                                 ('generation', 'population', 'changed'))
+        self.enable('trace', self._trace is not None)
+
+    def enable(self, reason, enabled=True):
+        """Switch timing on or off for one reason. Timing stays on while there is any reason for it.
+
+        :param: reason: What needs the timings, e.g. 'hud'.
+        :param: enabled: Whether it needs them from now on.
+
+        :return: Void.
+        """
+        if enabled:
+            self._reasons.add(reason)
+        else:
+            self._reasons.discard(reason)
+
+        # Stand the methods of the instance in for the ones of the class while timing is off. Timings from before it
+        # was last off are dropped.
+        if self._reasons and 'mark' in self.__dict__:
+            del self.mark, self.end_frame
+            self._frames.clear()
+            self._times = dict.fromkeys(PHASES, 0.0)
+            self._last = time.perf_counter()
+        elif not self._reasons:
+            self.mark = self.end_frame = _ignore
+
+    def tracing(self):
+        """Check whether the timings of every frame are written to a trace file.
+
+        :return: True if they are.
+        """
+        return self._trace is not None
+
+    def mark(self, phase):
+        """End a phase of the current frame, counting the time since the end of the last phase towards it.
+
+        :param: phase: The phase, one of PHASES.
+
+        :return: Void.
+        """
+        now = time.perf_counter()
+        self._times[phase] += now - self._last
+        self._last = now
+
+    def end_frame(self, generation=None, population=None, changed=None):
+        """End the current frame, keeping its timings and writing them to the trace.
+
+        :param: generation: The generation shown by the frame, for the trace.
+        :param: population: The population shown by the frame, for the trace.
+        :param: changed: The number of cells changed since the last frame, for the trace.
+
+        :return: Void.
+        """
+        self._frames.append(self._times)
+        if self._trace is not None:
+            self._trace.writerow([self._count, round(self._last - self._start, 6)] +
+                                 [round(self._times[phase] * 1000, 4) for phase in PHASES] +
+                                 [generation, population, changed])
+        self._times = dict.fromkeys(PHASES, 0.0)
+        self._count += 1
+
+        # Stop profiling once the frames asked for are done.
+        if self._profile is not None:
+            self._profile_left -= 1
+            if self._profile_left <= 0:
+                self._finish_profile()
+
+    def phase_ms(self):
+        """Get the average time spent in each phase over the recent frames.
+
+        :return: A dictionary from phase to milliseconds.
+        """
+        count = max(len(self._frames), 1)
+        return {phase: sum(frame[phase] for frame in self._frames) * 1000 / count for phase in PHASES}
+
+    def fps(self):
+        """Get the number of frames per second over the recent frames.
+
+        :return: The frame rate, 0 if no frames were timed.
+        """
+        total = sum(sum(frame.values()) for frame in self._frames)
+        return len(self._frames) / total if total else 0.0
+
+    def profile(self):
+        """Profile the next profile_frames frames of the game loop with cProfile, then save the statistics to
+        profile_path, for pstats or a viewer such as snakeviz, and print the top entries.
+
+        Only the thread of the game loop is profiled. Run the simulation in a process, see the worker module, or profile
+        the engine headless to see the time spent stepping.
+
+        :return: Void. Does nothing if a profile is running already.
+        """
+        if self._profile is not None:
+            return
+        self._profile_left = self.profile_frames
+        self.enable('profile')
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def profiling(self):
+        """Check whether a cProfile window is running.
+
+        :return: True while profiling.
+        """
+        return self._profile is not None
+
+    def _finish_profile(self):
+        """Stop the running cProfile window, save its statistics and print a summary."""
+        self._profile.disable()
+        self._profile.dump_stats(self.profile_path)
+        print('profile of {} frames saved to {}'.format(self.profile_frames - self._profile_left, self.profile_path),
+              file=sys.stderr)
+        pstats.Stats(self._profile, stream=sys.stderr).sort_stats('cumulative').print_stats(20)
+        self._profile = None
+        self.enable('profile', False)
+
+    def close(self):
+        """Finish any profile and close the trace file.
+
+        :return: Void.
+        """
+        if self._profile is not None:
+            self._finish_profile()
+        if self._trace is not None:
+            self._trace_file.close()
+            self._trace = None
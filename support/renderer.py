@@ -0,0 +1,188 @@
+"""Renderer module. Draws the universe onto the display from a pixel buffer instead of one rectangle per cell."""
+
+import numpy as np
+import pygame
+from .default_draw_grid import default_draw_grid
+from .profiler import Profiler
+
+# Colors of the board in RGB.
+ALIVE_COLOR = (255, 255, 0)
+DEAD_COLOR = (128, 128, 128)
+
+# The grid overlay is drawn with this color made transparent.
+TRANSPARENT_COLOR = (255, 0, 255)
+
+# Cells smaller than this are drawn without grid lines, which would cover them up.
+MIN_GRID_SIZE = 4
+
+# When zoomed out, the least full blocks are shaded this far from the dead color to the alive color, so that a block
+# holding a single alive cell still stands out.
+MIN_SHADE = 0.3
+
+
+class Renderer:
+    """Draw the part of the universe shown by the camera onto the window.
+
+    The visible cells are written into a surface with one pixel per cell, scaled up to the cell size in a single
+    call and covered with a pre-rendered grid overlay. Only the parts of the display holding cells that changed since
+    the last frame are then pushed to the screen, in one batched display update, so the cost of a frame does not grow
+    with the number of cells that changed.
+
+    The renderer follows the camera by itself. Panning redraws the display, zooming also rebuilds the surfaces, with
+    the grid overlays of recent cell sizes kept around so that zooming back and forth does not redraw the lines.
+    """
+
+    def __init__(self, window, camera, tile_size=16, cached_grids=8, profiler=None):
+        """Create a renderer.
+
+        :param: window: The pygame window object that display's the game.
+        :param: camera: The camera deciding which part of the universe is shown.
+        :param: tile_size: The width and height in cells of the rectangles the display is updated in.
+        :param: cached_grids: The number of grid overlays to keep for cell sizes no longer in use.
+        :param: profiler: The Profiler timing the draw and display phases of each frame, if any.
+        """
+        self.window = window
+        self.camera = camera
+        self.profiler = profiler or Profiler()
+        self.tile_size = tile_size
+        self.cached_grids = cached_grids
+        self._grids = {}
+        self._canvas = None
+        self._camera_state = None
+        self.mark_all()
+
+    def _follow_camera(self):
+        """Pick up any change of the camera since the last frame.
+
+        :return: Void.
+        """
+        state = self.camera.state()
+        if state == self._camera_state:
+            return
+
+        # Rebuild the surfaces if the size of a cell changed.
+        if self._camera_state is None or state[2:4] != self._camera_state[2:4]:
+            cell_width, cell_height = state[2:4]
+            rows, cols = self.camera.viewport()[2:]
+
+            # One pixel per visible cell, and the same scaled up to the size of the cells. The scaled surface is cut out
+            # of a larger canvas which is only replaced when it is too small, so zooming seldom allocates pixels.
+            self._cells = pygame.Surface((cols, rows))
+            size = (cols * cell_width, rows * cell_height)
+            if self._canvas is None or size[0] > self._canvas.get_width() or size[1] > self._canvas.get_height():
+                self._canvas = pygame.Surface((size[0] * 5 // 4, size[1] * 5 // 4))
+            self._scaled = self._canvas.subsurface((0, 0) + size)
+            self._colors = np.array([self._cells.map_rgb(DEAD_COLOR), self._cells.map_rgb(ALIVE_COLOR)])
+            self._shades = np.array([self._cells.map_rgb(self._shade(density)) for density in range(256)])
+            if cell_width >= MIN_GRID_SIZE and cell_height >= MIN_GRID_SIZE:
+                self._grid = self._grid_overlay(cell_width, cell_height, self._scaled.get_size())
+            else:
+                self._grid = None
+
+        self._camera_state = state
+        self.mark_all()
+
+    @staticmethod
+    def _shade(density):
+        """Get the color of a block of cells when zoomed out.
+
+        :param: density: How full the block is, from 0 for empty to 255 for full.
+
+        :return: The color in RGB.
+        """
+        if density == 0:
+            return DEAD_COLOR
+        fraction = MIN_SHADE + (1 - MIN_SHADE) * density / 255
+        return tuple(round(dead + (alive - dead) * fraction) for dead, alive in zip(DEAD_COLOR, ALIVE_COLOR))
+
+    def _grid_overlay(self, cell_width, cell_height, size):
+        """Get the grid lines for a cell size, drawing them only if they are not cached.
+
+        :return: A surface where everything but the lines is transparent.
+        """
+        key = (cell_width, cell_height, size)
+        grid = self._grids.pop(key, None)
+        if grid is None:
+            grid = pygame.Surface(size)
+            grid.fill(TRANSPARENT_COLOR)
+            grid.set_colorkey(TRANSPARENT_COLOR)
+            default_draw_grid(grid, cell_width, cell_height)
+
+        # Keep the most recently used overlays, dropping the oldest ones.
+        self._grids[key] = grid
+        while len(self._grids) > self.cached_grids + 1:
+            del self._grids[next(iter(self._grids))]
+        return grid
+
+    def mark(self, cells):
+        """Mark cells as changed so that they are pushed to the screen on the next frame.
+
+        :param: cells: An (N, 2) array of the changed cells.
+
+        :return: Void.
+        """
+        if len(cells):
+            self._dirty.append(np.asarray(cells))
+
+    def mark_all(self):
+        """Mark the whole display as changed.
+
+        :return: Void.
+        """
+        self._full = True
+        self._dirty = []
+
+    def render(self, engine):
+        """Draw a frame if anything changed since the last one.
+
+        :param: engine: The simulation engine that stores the state of each cell, or anything else with a get_region
+        method such as a frame published by a worker. When the camera is zoomed out past single cells, it needs a
+        get_density method instead, see the lod module.
+
+        :return: True if it drew a frame, False if nothing changed.
+        """
+        self._follow_camera()
+        if not self._full and not self._dirty:
+            return False
+
+        # Write the visible cells, or how full the visible blocks are, into the pixel buffer.
+        row, col, rows, cols = self.camera.viewport()
+        if self.camera.level:
+            pixels = self._shades[engine.get_density(self.camera.level, row, col, rows, cols).T]
+        else:
+            pixels = self._colors[engine.get_region(row, col, rows, cols).T.view(np.uint8)]
+        pygame.surfarray.blit_array(self._cells, pixels)
+
+        # Scale the pixel buffer to the cell size and lay the grid over it. The viewport starts at a whole cell, so it
+        # is shifted by the part of the first cell which is off the display.
+        offset = self.camera.offset()
+        pygame.transform.scale(self._cells, self._scaled.get_size(), self._scaled)
+        self.window.blit(self._scaled, offset)
+        if self._grid is not None:
+            self.window.blit(self._grid, offset)
+        self.profiler.mark('draw')
+
+        if self._full:
+            pygame.display.update()
+        else:
+            pygame.display.update(self._dirty_rects(row, col, rows, cols, offset))
+        self.profiler.mark('display')
+        self._full = False
+        self._dirty = []
+        return True
+
+    def _dirty_rects(self, row, col, rows, cols, offset):
+        """Get the display rectangles covering the visible changed cells, one per tile of cells.
+
+        :return: The list of rectangles.
+        """
+        cells = np.concatenate(self._dirty) - (row, col)
+        cells = cells[(cells[:, 0] >= 0) & (cells[:, 0] < rows) & (cells[:, 1] >= 0) & (cells[:, 1] < cols)]
+
+        # Group the cells by tile so that a busy area is pushed as a few large rectangles.
+        tile_cols = -(-cols // self.tile_size)
+        tiles = np.unique((cells[:, 0] // self.tile_size) * tile_cols + cells[:, 1] // self.tile_size)
+        width = self.tile_size * self.camera.cell_width
+        height = self.tile_size * self.camera.cell_height
+        return [pygame.Rect(offset[0] + tile % tile_cols * width, offset[1] + tile // tile_cols * height, width, height)
+                for tile in tiles]
@@ -0,0 +1,229 @@
+"""Rules module. Holds the Life-like rules the engines can run, given in B/S notation.
+
+A Life-like rule decides the next state of a cell from its current state and its number of alive neighbors alone.
+'B36/S23' means that a dead cell is born with 3 or 6 alive neighbors and that an alive cell survives with 2 or 3, and
+dies otherwise. Conway's game of life is B3/S23.
+
+A rule is compiled once from its table of next states, indexed by neighbor count and state, into the forms the
+engines need: a few whole-array comparisons of the neighbor counts, which cost the same as the hard-coded B3/S23 checks
+did (NumPy widens the indices of a table lookup to 64 bits, which makes a lookup per cell several times slower), a
+boolean function of the neighbor count bit-planes for the bit-packed backend, and the 4x4 block table of Hashlife.
+"""
+
+import itertools
+import numpy as np
+
+# Well known rules by name.
+RULES = {
+    'life': 'B3/S23',
+    'highlife': 'B36/S23',
+    'daynight': 'B3678/S34678',
+    'seeds': 'B2/S',
+}
+
+
+def _digits(text, rulestring):
+    """Get the neighbor counts listed in part of a rulestring."""
+    if not all(char in '012345678' for char in text):
+        raise ValueError('invalid rule {!r}, neighbor counts go from 0 to 8'.format(rulestring))
+    return {int(char) for char in text}
+
+
+def _runs(counts):
+    """Split a set of neighbor counts into runs of consecutive counts, as (lowest, highest) pairs."""
+    runs = []
+    for count in sorted(counts):
+        if runs and runs[-1][1] == count - 1:
+            runs[-1] = (runs[-1][0], count)
+        else:
+            runs.append((count, count))
+    return runs
+
+
+def _member(count, runs):
+    """Get a mask of the neighbor counts which fall in any of the runs."""
+    mask = None
+    for low, high in runs:
+        if low == high:
+            part = count == low
+        elif low == 0:
+            part = count <= high
+        elif high == 8:
+            part = count >= low
+        else:
+            part = (count >= low) & (count <= high)
+        mask = part if mask is None else mask | part
+    return np.zeros(np.shape(count), dtype=bool) if mask is None else mask
+
+
+class Rule:
+    """A Life-like rule.
+
+    The next state of a cell with count alive neighbors and state is table[count * 2 + state].
+    """
+
+    def __init__(self, birth, survival):
+        """Create a rule.
+
+        :param: birth: The neighbor counts at which a dead cell comes alive.
+        :param: survival: The neighbor counts at which an alive cell stays alive.
+        """
+        self.birth = frozenset(birth)
+        self.survival = frozenset(survival)
+        if not self.birth | self.survival <= set(range(9)):
+            raise ValueError('neighbor counts go from 0 to 8')
+        self.table = np.array([count in (self.survival if state else self.birth)
+                               for count in range(9) for state in (False, True)])
+        self._birth_runs = _runs(count for count in range(9) if self.table[count * 2])
+        self._death_runs = _runs(count for count in range(9) if not self.table[count * 2 + 1])
+
+    @classmethod
+    def parse(cls, rulestring):
+        """Parse a rule in B/S notation, e.g. 'B3/S23', in S/B notation, e.g. '23/3', or by name, see RULES.
+
+        :param: rulestring: The rule.
+
+        :return: The Rule.
+        """
+        text = RULES.get(rulestring.strip().lower(), rulestring).replace(' ', '').upper()
+        parts = text.split('/')
+        if len(parts) != 2:
+            raise ValueError('invalid rule {!r}, use B/S notation such as B3/S23'.format(rulestring))
+        if parts[0].startswith('S') and parts[1].startswith('B'):
+            parts.reverse()
+        if parts[0].startswith('B') and parts[1].startswith('S'):
+            return cls(_digits(parts[0][1:], rulestring), _digits(parts[1][1:], rulestring))
+        # Without letters the survival counts come first.
+        return cls(_digits(parts[1], rulestring), _digits(parts[0], rulestring))
+
+    def __str__(self):
+        return 'B{}/S{}'.format(''.join(map(str, sorted(self.birth))), ''.join(map(str, sorted(self.survival))))
+
+    def __repr__(self):
+        return 'Rule.parse({!r})'.format(str(self))
+
+    def __eq__(self, other):
+        return isinstance(other, Rule) and (self.birth, self.survival) == (other.birth, other.survival)
+
+    def __hash__(self):
+        return hash((self.birth, self.survival))
+
+    def births_from_nothing(self):
+        """Check whether dead cells with no alive neighbors come alive (B0), which fills an unbounded universe at once.
+
+        :return: True if 0 is a birth count.
+        """
+        return 0 in self.birth
+
+    def next_state(self, count, state):
+        """Get the next state of cells.
+
+        :param: count: The number of alive neighbors of each cell, as an integer array.
+        :param: state: The current state of each cell, as a boolean array of the same shape.
+
+        :return: A boolean array of the next state of each cell.
+        """
+        return self.inverted(count, state) ^ state
+
+    def inverted(self, count, state):
+        """Get which cells are inverted in the next generation.
+
+        :param: count: The number of alive neighbors of each cell, as an integer array.
+        :param: state: The current state of each cell, as a boolean array of the same shape.
+
+        :return: A boolean array which is True where a cell will die or be revived.
+        """
+        # Take whether an alive cell dies where the cell is alive, and whether a dead cell is born elsewhere.
+        born = _member(count, self._birth_runs)
+        return born ^ (state & (born ^ _member(count, self._death_runs)))
+
+    def bitplane_function(self):
+        """Compile the rule into a function of bit-planes, for backends packing many cells into each machine word.
+
+        The function takes the bit-planes of the cell states and of the ones, twos, fours and eights of their neighbor
+        counts, and returns the bit-plane of the next states. It is built from a decision tree over the planes with
+        constant branches folded away, in the variable order giving the fewest operations. For B3/S23 it comes down to
+        ~eights & ~fours & twos & (ones | alive).
+
+        :return: The function.
+        """
+        # Counts up to 7 are spread over the ones, twos and fours, and 8 is the only count with the eights set.
+        def next_state(alive, ones, twos, fours):
+            count = ones | twos << 1 | fours << 2
+            return count in (self.survival if alive else self.birth)
+
+        best = None
+        for order in itertools.permutations(range(4)):
+            tree = _decide(next_state, order, {})
+            if best is None or _cost(tree) < _cost(best):
+                best = tree
+        tree = _mux(('plane', 4), _mux(('plane', 0), 8 in self.survival, 8 in self.birth), best)
+        return _compile(tree)
+
+
+def _decide(function, order, values):
+    """Build the decision tree of a boolean function of the planes in the given order, folding constants."""
+    if len(values) == len(order):
+        return function(*(values[plane] for plane in range(len(order))))
+    plane = order[len(values)]
+    return _mux(('plane', plane), _decide(function, order, {**values, plane: True}),
+                _decide(function, order, {**values, plane: False}))
+
+
+def _negate(node):
+    """Build the complement of a node."""
+    if isinstance(node, bool):
+        return not node
+    return node[1] if node[0] == 'not' else ('not', node)
+
+
+def _mux(select, high, low):
+    """Build the node which is high where select is set and low elsewhere, folding constants."""
+    if high == low:
+        return high
+    if high is True and low is False:
+        return select
+    if high is False and low is True:
+        return _negate(select)
+    if low is False:
+        return 'and', select, high
+    if high is False:
+        return 'and', _negate(select), low
+    if high is True:
+        return 'or', select, low
+    if low is True:
+        return 'or', _negate(select), high
+    return 'mux', select, high, low
+
+
+def _cost(node):
+    """Count the bitwise operations needed to evaluate a node."""
+    if isinstance(node, bool) or node[0] == 'plane':
+        return 0
+    return {'not': 1, 'and': 1, 'or': 1, 'mux': 3}[node[0]] + sum(_cost(child) for child in node[1:])
+
+
+def _compile(node):
+    """Turn a node into a function of the five bit-planes."""
+    if isinstance(node, bool):
+        return lambda *planes: np.full_like(planes[0], ~np.uint64(0) if node else 0)
+    kind = node[0]
+    if kind == 'plane':
+        return lambda *planes: planes[node[1]]
+    children = [_compile(child) for child in node[1:]]
+    if kind == 'not':
+        return lambda *planes: ~children[0](*planes)
+    if kind == 'and':
+        return lambda *planes: children[0](*planes) & children[1](*planes)
+    if kind == 'or':
+        return lambda *planes: children[0](*planes) | children[1](*planes)
+
+    # Take the high bits where select is set and the low bits elsewhere.
+    def mux(*planes):
+        low = children[2](*planes)
+        return low ^ (children[0](*planes) & (children[1](*planes) ^ low))
+    return mux
+
+
+# Conway's game of life, the default rule of every engine.
+CONWAY = Rule.parse('B3/S23')
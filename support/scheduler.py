@@ -0,0 +1,51 @@
+"""Scheduler module. Decides how many generations to run at a time, independent of the frame rate."""
+
+import time
+
+
+class Scheduler:
+    """Fixed timestep scheduler for the simulation.
+
+    Time passing adds generations to a running balance at the target rate. Whenever asked, the whole generations in
+    the balance are handed out, so a fast board runs several generations per frame while a slow board runs one per
+    frame or fewer. The balance is capped, so a board that cannot keep up slows down instead of building up a backlog.
+    """
+
+    def __init__(self, generations_per_second=60, max_backlog=0.25):
+        """Create a scheduler.
+
+        :param: generations_per_second: The target simulation rate.
+        :param: max_backlog: The most generations kept in the balance, in seconds worth of generations.
+        """
+        self.generations_per_second = generations_per_second
+        self.max_backlog = max_backlog
+        self.reset()
+
+    def reset(self):
+        """Empty the balance and restart the clock, e.g. when the game resumes after a pause.
+
+        :return: Void.
+        """
+        self._balance = 0.0
+        self._last = time.perf_counter()
+
+    def generations_due(self):
+        """Get the number of generations to run this frame and take them out of the balance.
+
+        :return: The number of generations.
+        """
+        now = time.perf_counter()
+        self._balance += (now - self._last) * self.generations_per_second
+        self._balance = min(self._balance, max(self.max_backlog * self.generations_per_second, 1.0))
+        self._last = now
+
+        due = int(self._balance)
+        self._balance -= due
+        return due
+
+    def time_until_due(self):
+        """Get the time left until the next generation is due.
+
+        :return: The time in seconds.
+        """
+        return max(1 - self._balance, 0) / self.generations_per_second - (time.perf_counter() - self._last)
@@ -0,0 +1,385 @@
+"""Soup module. Runs many random soups at once to collect statistics about how they settle.
+
+Nothing in this module depends on pygame so that soups can be searched headless.
+
+A soup is a board filled at random with a given density of alive cells. Boards of the same size and rule are stepped
+together as one (boards, rows, cols) stack, so each generation of the whole stack is the same few array operations as
+a generation of a single board. Every board is hashed each generation, and a board whose hash was seen a few
+generations before has settled into still lifes and oscillators: it is taken off the stack and its result, with a
+census of the objects it settled into, is handed out straight away. Stacks are sharded across a pool of processes,
+which send each result back as soon as its board settles rather than once their whole shard is done.
+"""
+
+import csv
+import functools
+import json
+import multiprocessing
+import os
+import queue
+import numpy as np
+from .cycles import DEFAULT_WINDOW
+from .engine import get_live_neighbors
+from .rules import CONWAY
+
+# The default number of soups stepped together by each task of the pool.
+DEFAULT_SHARD_SIZE = 64
+
+# The fields of a result, in the order they are written.
+FIELDS = ('board', 'rule', 'density', 'generations', 'lifespan', 'period', 'population', 'census')
+
+# The result formats, by file extension.
+RESULT_FORMATS = {'.jsonl': 'jsonl', '.csv': 'csv'}
+
+# Common objects named in the census, as plaintext rows joined by slashes, with their period. Moving objects have no
+# period and are only recognized on boards which did not settle.
+OBJECTS = (
+    ('block', 'OO/OO', 1),
+    ('beehive', '.OO./O..O/.OO.', 1),
+    ('loaf', '.OO./O..O/.O.O/..O.', 1),
+    ('boat', 'OO./O.O/.O.', 1),
+    ('ship', 'OO./O.O/.OO', 1),
+    ('tub', '.O./O.O/.O.', 1),
+    ('pond', '.OO./O..O/O..O/.OO.', 1),
+    ('long boat', 'OO../O.O./.O.O/..O.', 1),
+    ('barge', '.O../O.O./.O.O/..O.', 1),
+    ('mango', '.OO../O..O./.O..O/..OO.', 1),
+    ('eater', 'OO../O.O./..O./..OO', 1),
+    ('snake', 'OO.O/O.OO', 1),
+    ('aircraft carrier', 'OO../O..O/..OO', 1),
+    ('blinker', 'OOO', 2),
+    ('toad', '.OOO/OOO.', 2),
+    ('beacon', 'OO../OO../..OO/..OO', 2),
+    ('pulsar', '..OOO...OOO../............./O....O.O....O/O....O.O....O/O....O.O....O/..OOO...OOO../'
+               '............./..OOO...OOO../O....O.O....O/O....O.O....O/O....O.O....O/............./'
+               '..OOO...OOO..', 3),
+    ('pentadecathlon', '..O....O../OO.OOOO.OO/..O....O..', 15),
+    ('glider', '.O./..O/OOO', None),
+)
+
+
+def random_soups(indices, rows, cols, density, seed=0):
+    """Fill boards at random. Each board only depends on the seed and its index, so any soup can be made again alone.
+
+    :param: indices: The index of each board.
+    :param: rows: The number of rows of each board.
+    :param: cols: The number of columns of each board.
+    :param: density: The probability of each cell being alive.
+    :param: seed: The seed shared by all soups.
+
+    :return: A (boards, rows, cols) boolean array.
+    """
+    boards = np.empty((len(indices), rows, cols), dtype=bool)
+    for board, index in enumerate(indices):
+        boards[board] = np.random.default_rng([seed, int(index)]).random((rows, cols)) < density
+    return boards
+
+
+def step_boards(boards, rule=CONWAY, wrap=False):
+    """Advance every board of a stack by one generation.
+
+    :param: boards: A (boards, rows, cols) boolean array.
+    :param: rule: The Life-like Rule to apply.
+    :param: wrap: Whether opposite edges of each board are joined together, making it a torus.
+
+    :return: The next generation of the boards, as a new array.
+    """
+    return boards ^ rule.inverted(get_live_neighbors(boards, wrap), boards)
+
+
+def board_hashes(boards, weights):
+    """Hash every board of a stack, by adding up its cells packed into words, each word times its own weight.
+
+    :param: boards: A (boards, rows, cols) boolean array.
+    :param: weights: The random odd uint64 weight of each word, see _weights.
+
+    :return: An array holding the uint64 hash of each board.
+    """
+    packed = np.packbits(boards.reshape(len(boards), -1), axis=1)
+    words = np.zeros((len(boards), len(weights) * 8), dtype=np.uint8)
+    words[:, :packed.shape[1]] = packed
+    return (words.view('<u8') * weights).sum(axis=1, dtype=np.uint64)
+
+
+def _weights(rows, cols):
+    """Get the weights board_hashes multiplies the words of a board of the given size by."""
+    return np.random.default_rng(0).integers(0, 1 << 63, -(-rows * cols // 64), dtype=np.uint64) * 2 + 1
+
+
+def canonical(cells):
+    """Get the shape of a group of cells regardless of its position, rotation and reflection.
+
+    :param: cells: An (N, 2) array of cells.
+
+    :return: A hashable canonical form, the same for any group of cells with the same shape.
+    """
+    forms = []
+    for transform in (cells, cells[:, ::-1]):
+        for signs in ((1, 1), (1, -1), (-1, 1), (-1, -1)):
+            moved = transform * signs
+            moved = moved - moved.min(axis=0)
+            forms.append(tuple(map(tuple, moved[np.lexsort((moved[:, 1], moved[:, 0]))].tolist())))
+    return min(forms)
+
+
+def _footprint(board, rule, wrap, period):
+    """Get the cells which are alive in any generation of a period, starting with the board as it is."""
+    footprint = board.copy()
+    boards = board[np.newaxis]
+    for _ in range(period - 1):
+        boards = step_boards(boards, rule, wrap)
+        footprint |= boards[0]
+    return footprint
+
+
+@functools.lru_cache(maxsize=None)
+def known_objects(rule=CONWAY):
+    """Get the canonical forms of the objects of OBJECTS which behave under a rule as they do under B3/S23.
+
+    Oscillators are known by their footprint, the cells alive in any of their phases, so every phase gets the same
+    name. Moving objects are known by each of their phases.
+
+    :param: rule: The Life-like Rule.
+
+    :return: A dictionary from canonical form to name.
+    """
+    names = {}
+    for name, rows, period in OBJECTS:
+        lines = rows.split('/')
+        board = np.zeros((len(lines) + 16, max(map(len, lines)) + 16), dtype=bool)
+        for row, line in enumerate(lines):
+            board[row + 8, 8:8 + len(line)] = [char == 'O' for char in line]
+        if period is None:
+            # Take the phases of a glider-like object until it comes back to its shape.
+            phases = [board]
+            for _ in range(4):
+                phases.append(step_boards(phases[-1][np.newaxis], rule)[0])
+            if canonical(np.argwhere(phases[-1])) != canonical(np.argwhere(board)):
+                continue
+            for phase in phases:
+                names[canonical(np.argwhere(phase))] = name
+            continue
+
+        # Keep the oscillators that come back to their first phase after their period.
+        later = board[np.newaxis]
+        for _ in range(period):
+            later = step_boards(later, rule)
+        if (later[0] == board).all():
+            names[canonical(np.argwhere(_footprint(board, rule, False, period)))] = name
+    return names
+
+
+def objects(footprint, wrap=False):
+    """Split the alive cells of a board into objects: groups of cells touching each other, diagonals included.
+
+    :param: footprint: The boolean array of the cells.
+    :param: wrap: Whether the board is a torus. Objects across an edge are then kept whole, with cells past the edge
+    given rows or columns outside of the board.
+
+    :return: A list of (N, 2) arrays, one per object.
+    """
+    rows, cols = footprint.shape
+    remaining = set(map(tuple, np.argwhere(footprint).tolist()))
+    groups = []
+    while remaining:
+        group = [remaining.pop()]
+        for row, col in group:
+            for neighbor in ((row + i, col + j) for i in (-1, 0, 1) for j in (-1, 0, 1)):
+                cell = (neighbor[0] % rows, neighbor[1] % cols) if wrap else neighbor
+                if cell in remaining:
+                    remaining.remove(cell)
+                    group.append(neighbor)
+        groups.append(np.array(group, dtype=np.int64))
+    return groups
+
+
+def census(board, rule=CONWAY, wrap=False, period=1):
+    """Count the objects on a board by name.
+
+    Objects are found on the footprint of the board over its period, so that the phases of an oscillator are one
+    object. Objects with no name are counted by their number of cells in the footprint, e.g. 'other12'.
+
+    :param: board: The (rows, cols) boolean array of the board.
+    :param: rule: The Life-like Rule the board runs.
+    :param: wrap: Whether the board is a torus.
+    :param: period: The period the board cycles with, 1 for a still board or one which did not settle.
+
+    :return: A dictionary from object name to count, most common first.
+    """
+    names = known_objects(rule)
+    counts = {}
+    for cells in objects(_footprint(board, rule, wrap, period), wrap):
+        name = names.get(canonical(cells), 'other{}'.format(len(cells)))
+        counts[name] = counts.get(name, 0) + 1
+    return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+
+def run_soups(boards, rule=CONWAY, wrap=False, generations=10000, window=DEFAULT_WINDOW):
+    """Step a stack of boards until each one settles, or for a number of generations.
+
+    :param: boards: A (boards, rows, cols) boolean array. It is not changed.
+    :param: rule: The Life-like Rule to apply.
+    :param: wrap: Whether opposite edges of each board are joined together, making it a torus.
+    :param: generations: The most generations to step a board for.
+    :param: window: The number of recent generations to remember, which is the longest period that can be found.
+
+    :return: Generator of (index, result): The index of a board in the stack and its result, a dictionary holding
+    generations, the number of generations stepped, lifespan, the first generation of the cycle it settled into,
+    period, the period of that cycle, population and census. Lifespan and period are None for boards which did not
+    settle. Boards come out as they settle.
+    """
+    indices = np.arange(len(boards))
+    weights = _weights(*boards.shape[1:])
+    seen = np.zeros((len(boards), window), dtype=np.uint64)
+    seen_at = np.full((len(boards), window), -1, dtype=np.int64)
+    for generation in range(generations + 1):
+        # Look the hash of every board up among its recent generations, the latest one giving the shortest period.
+        hashes = board_hashes(boards, weights)
+        matches = (seen == hashes[:, np.newaxis]) & (seen_at >= 0)
+        settled = matches.any(axis=1)
+        if settled.any():
+            starts = np.where(matches, seen_at, -1).max(axis=1)
+            for board in np.flatnonzero(settled):
+                period = generation - int(starts[board])
+                yield int(indices[board]), {
+                    'generations': generation, 'lifespan': int(starts[board]), 'period': period,
+                    'population': int(boards[board].sum()), 'census': census(boards[board], rule, wrap, period)}
+
+            # Take the settled boards off the stack.
+            boards, indices, hashes = boards[~settled], indices[~settled], hashes[~settled]
+            seen, seen_at = seen[~settled], seen_at[~settled]
+            if not len(boards):
+                return
+        if generation == generations:
+            break
+        seen[:, generation % window] = hashes
+        seen_at[:, generation % window] = generation
+        boards = step_boards(boards, rule, wrap)
+
+    for board, index in enumerate(indices):
+        yield int(index), {'generations': generations, 'lifespan': None, 'period': None,
+                           'population': int(boards[board].sum()), 'census': census(boards[board], rule, wrap)}
+
+
+# The queue a worker process sends its results back on, see _start_worker.
+_results = None
+
+
+def _shard_results(indices, rows, cols, density, rule, wrap, seed, generations, window):
+    """Make and run a shard of soups.
+
+    :return: Generator of the results of the soups as they settle, each with its board index, rule and density, see
+    FIELDS.
+    """
+    for board, result in run_soups(random_soups(indices, rows, cols, density, seed), rule, wrap, generations, window):
+        yield {'board': int(indices[board]), 'rule': str(rule), 'density': density, **result}
+
+
+def _start_worker(results):
+    """Keep the queue to send results back on. Runs once in each worker process."""
+    global _results
+    _results = results
+
+
+def _run_shard(*shard):
+    """Make and run a shard of soups, sending each result back as soon as it comes. Runs in a worker process.
+
+    :return: Void.
+    """
+    for result in _shard_results(*shard):
+        _results.put(result)
+
+
+def run_batch(soups, rows, cols, densities=(0.5,), rules=(CONWAY,), boundary='dead', generations=10000,
+              window=DEFAULT_WINDOW, seed=0, workers=None, shard_size=DEFAULT_SHARD_SIZE):
+    """Run random soups for every combination of rule and density, sharded across a pool of processes.
+
+    Boards are numbered in order across the combinations, rules first, and soup i is random_soups([i], ...) whichever
+    worker runs it.
+
+    :param: soups: The number of soups of each combination.
+    :param: rows: The number of rows of each board.
+    :param: cols: The number of columns of each board.
+    :param: densities: The densities of alive cells to sweep.
+    :param: rules: The Life-like Rules to sweep.
+    :param: boundary: The boundary policy of the boards, 'dead' or 'torus'.
+    :param: generations: The most generations to step a board for.
+    :param: window: The number of recent generations to remember, which is the longest period that can be found.
+    :param: seed: The seed shared by all soups.
+    :param: workers: The number of worker processes. Defaults to the number of CPUs. With 1 the soups run in this
+    process.
+    :param: shard_size: The number of soups each task steps together.
+
+    :return: Generator of results, see FIELDS, in the order the boards finish.
+    """
+    if boundary not in ('dead', 'torus'):
+        raise ValueError('soups need a bounded board, use the dead or torus boundary')
+    shards = []
+    for number, (rule, density) in enumerate((rule, density) for rule in rules for density in densities):
+        for start in range(0, soups, shard_size):
+            indices = np.arange(start, min(start + shard_size, soups)) + number * soups
+            shards.append((indices, rows, cols, density, rule, boundary == 'torus', seed, generations, window))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for shard in shards:
+            yield from _shard_results(*shard)
+        return
+
+    # Start the workers in fresh interpreters so they never inherit state such as an open display. They send every
+    # result back on a queue, which is read until all boards are in, watching for a shard failing meanwhile.
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    expected = sum(len(shard[0]) for shard in shards)
+    pool = context.Pool(workers, _start_worker, (results,))
+    try:
+        tasks = [pool.apply_async(_run_shard, shard) for shard in shards]
+        while expected:
+            try:
+                yield results.get(timeout=0.1)
+                expected -= 1
+            except queue.Empty:
+                for task in tasks:
+                    if task.ready() and not task.successful():
+                        task.get()
+    finally:
+        # Once every result is in the workers are done. Otherwise a shard failed or the results stopped being read, so
+        # stop the workers rather than wait for shards which may be blocked putting results nobody reads anymore.
+        if expected:
+            pool.terminate()
+        else:
+            pool.close()
+        pool.join()
+        results.close()
+
+
+def write_results(file, results, result_format='jsonl'):
+    """Write results to a file as they come, one line each, flushing after every line.
+
+    JSONL lines hold every field of FIELDS. CSV has a header row, and the census is written as 'name:count' pairs
+    separated by spaces.
+
+    :param: file: The open text file to write to.
+    :param: results: The iterable of results, see run_batch.
+    :param: result_format: 'jsonl' or 'csv'.
+
+    :return: boards, board_generations, total: The number of results written, the number of generations stepped over
+    all boards, and the census of all boards added together.
+    """
+    writer = None
+    if result_format == 'csv':
+        writer = csv.DictWriter(file, FIELDS)
+        writer.writeheader()
+    boards = board_generations = 0
+    total = {}
+    for result in results:
+        boards += 1
+        board_generations += result['generations']
+        for name, count in result['census'].items():
+            total[name] = total.get(name, 0) + count
+        if writer is None:
+            file.write(json.dumps({field: result[field] for field in FIELDS}) + '\n')
+        else:
+            writer.writerow({**result, 'census': ' '.join('{}:{}'.format(name.replace(' ', '_'), count)
+                                                          for name, count in result['census'].items())})
+        file.flush()
+    return boards, board_generations, dict(sorted(total.items(), key=lambda item: (-item[1], item[0])))
@@ -0,0 +1,129 @@
+"""Sparse universe module. Holds a backend whose memory grows with the number of alive cells instead of the board area.
+
+Alive cells are stored as a sorted array of packed (row, column) keys. A key packs the row into the upper 32 bits and
+the column into the lower 32 bits, so sorting the keys sorts cells by row and then by column. Membership tests are
+binary searches and a generation is computed with a handful of vectorized passes over the alive cells.
+"""
+
+import numpy as np
+from .engine import Engine, as_cells
+
+# The 8 (row, column) offsets of the neighbors of a cell.
+NEIGHBOR_OFFSETS = np.array([(i, j) for i in (-1, 0, 1) for j in (-1, 0, 1) if i or j], dtype=np.int64)
+
+
+def pack(cells):
+    """Pack an (N, 2) array of cells into sortable int64 keys.
+
+    :param: cells: The cells to pack. Rows and columns must fit in 32 bit signed integers.
+
+    :return: An array of N keys.
+    """
+    return (cells[:, 0] << 32) + cells[:, 1]
+
+
+def unpack(keys):
+    """Unpack int64 keys back into an (N, 2) array of cells.
+
+    :param: keys: The keys to unpack.
+
+    :return: The (N, 2) array of cells.
+    """
+    rows = (keys + (1 << 31)) >> 32
+    return np.stack((rows, keys - (rows << 32)), axis=1)
+
+
+class SparseEngine(Engine):
+    """Backend storing only the alive cells of the universe.
+
+    Every boundary policy is supported. With 'infinite' the universe has no edge, so gliders and guns can run forever
+    as long as coordinates fit in 32 bit integers. With 'torus' opposite edges of the rows x cols board are joined,
+    and with 'dead' the board is surrounded by dead cells.
+    """
+
+    BOUNDARIES = ('infinite', 'torus', 'dead')
+    STEPS_EVERY_CELL = False
+
+    def __init__(self, rows=None, cols=None, boundary=None, rule=None):
+        super().__init__(rows, cols, boundary, rule)
+        self._keys = np.empty(0, dtype=np.int64)
+
+    def _contains(self, keys):
+        """Get a mask of the keys which belong to alive cells."""
+        index = np.minimum(np.searchsorted(self._keys, keys), max(len(self._keys) - 1, 0))
+        return self._keys[index] == keys if len(self._keys) else np.zeros(len(keys), dtype=bool)
+
+    def _place(self, cells):
+        """Apply the boundary policy to cells, wrapping them around a torus or dropping the ones outside the board."""
+        if self.boundary == 'torus':
+            return cells % (self.rows, self.cols)
+        if self.boundary == 'dead':
+            return cells[(cells[:, 0] >= 0) & (cells[:, 0] < self.rows) &
+                         (cells[:, 1] >= 0) & (cells[:, 1] < self.cols)]
+        return cells
+
+    def step(self):
+        # Every neighbor of an alive cell is a candidate. Counting how often each candidate appears gives its number
+        # of alive neighbors, so cells with no alive neighbors are never looked at.
+        live = unpack(self._keys)
+        neighbors = self._place((live[:, None, :] + NEIGHBOR_OFFSETS).reshape(-1, 2))
+        candidates, count = np.unique(pack(neighbors), return_counts=True)
+
+        # Apply the rules to the candidates. unique returns them sorted, so they are ready to be stored.
+        alive = self._contains(candidates)
+        keys = candidates[self.rule.next_state(count, alive)]
+
+        # Alive cells with no alive neighbors are not candidates. Under rules where they survive (S0), keep them.
+        if 0 in self.rule.survival:
+            isolated = self._keys[~np.isin(self._keys, candidates, assume_unique=True)]
+            keys = np.union1d(keys, isolated)
+
+        # The inverted cells are the ones alive in exactly one of the two generations.
+        inverse_keys = np.setxor1d(self._keys, keys, assume_unique=True)
+        self._keys = keys
+        self.generation += 1
+        return unpack(inverse_keys)
+
+    def get_cells(self, cells):
+        cells = as_cells(cells)
+        if self.boundary == 'infinite':
+            return self._contains(pack(cells))
+        state = np.zeros(len(cells), dtype=bool)
+        inside = ((cells[:, 0] >= 0) & (cells[:, 0] < self.rows) & (cells[:, 1] >= 0) & (cells[:, 1] < self.cols))
+        state[inside] = self._contains(pack(cells[inside]))
+        return state
+
+    def set_cells(self, cells, state):
+        cells = as_cells(cells)
+        state = np.broadcast_to(np.asarray(state, dtype=bool), (len(cells),))
+        if self.boundary != 'infinite':
+            inside = ((cells[:, 0] >= 0) & (cells[:, 0] < self.rows) &
+                      (cells[:, 1] >= 0) & (cells[:, 1] < self.cols))
+            cells, state = cells[inside], state[inside]
+
+        # Keep only the last edit of each cell, then add and remove keys in one pass each. New keys are merged into the
+        # sorted keys rather than sorting everything again, so loading a pattern in chunks stays linear.
+        keys = pack(cells)[::-1]
+        keys, first = np.unique(keys, return_index=True)
+        state = state[::-1][first]
+        if not state.all():
+            self._keys = self._keys[~np.isin(self._keys, keys[~state], assume_unique=True)]
+        added = keys[state]
+        added = added[~self._contains(added)]
+        self._keys = np.insert(self._keys, np.searchsorted(self._keys, added), added)
+
+    def get_region(self, row, col, rows, cols):
+        region = np.zeros((rows, cols), dtype=bool)
+
+        # Keys are sorted by row, so the cells in the rows of the region are one contiguous run of keys.
+        start, stop = np.searchsorted(self._keys, [(row << 32) - (1 << 31), ((row + rows) << 32) - (1 << 31)])
+        cells = unpack(self._keys[start:stop]) - (row, col)
+        cells = cells[(cells[:, 1] >= 0) & (cells[:, 1] < cols)]
+        region[cells[:, 0], cells[:, 1]] = True
+        return region
+
+    def live_cells(self):
+        return unpack(self._keys)
+
+    def population(self):
+        return len(self._keys)
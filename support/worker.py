@@ -0,0 +1,606 @@
+"""Worker module. Runs the simulation in the background so the display keeps drawing and reading input at full speed.
+
+The engine lives in a worker thread, or in a worker process for backends that hold the GIL while stepping. The game
+loop never touches the engine. It sends commands, such as cell edits, and picks up the frames the worker publishes.
+Commands are only applied between two generations, so an edit never lands in a half-computed generation.
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+import numpy as np
+from .backends import ENGINES
+from .engine import as_cells
+from .checkpoint import Recorder
+from .cycles import CycleDetector
+from .hashlife import jump
+from .history import History
+from .lod import PopulationPyramid
+from .metrics import MetricsRecorder, RingSink, open_sink
+from .patterns import load_pattern, pattern_bounds, save_pattern
+from .scheduler import Scheduler
+from .sparse import pack, unpack
+
+
+class Frame:
+    """A snapshot of the universe published by the worker.
+
+    Frames are never changed once published, so the game loop can read one while the worker builds the next.
+    """
+
+    __slots__ = ('sequence', 'since', 'acknowledged', 'generation', 'viewport', 'level', 'region', 'changed', 'full',
+                 'period', 'stats', 'metrics', 'error')
+
+    def __init__(self, sequence, since, acknowledged, generation, viewport, level, region, changed, full, period=None,
+                 stats=None, metrics=None, error=None):
+        """Create a frame.
+
+        :param: sequence: The number of the frame. Frames are numbered from 1 in the order they are published.
+        :param: since: The number of the frame the changed cells are counted from.
+        :param: acknowledged: The number of commands the worker had handled when the frame was published.
+        :param: generation: The generation of the universe.
+        :param: viewport: The (row, col, rows, cols) region of the universe copied into the frame, in blocks of the level.
+        :param: level: The level of detail of the frame. 0 for single cells, see the lod module.
+        :param: region: The boolean array holding the state of the cells of the viewport, or the uint8 array holding
+        how full its blocks are when the level is above 0.
+        :param: changed: An (N, 2) array of the cells, or blocks, which changed since frame number since.
+        :param: full: Whether any cell may have changed since frame number since, e.g. after a jump.
+        :param: period: The period of the cycle the universe has settled into, or None if none was found, see the cycles
+        module.
+        :param: stats: The (population, generations, inverted, seconds) statistics of the worker, or None if they are
+        not kept, see SimulationWorker.set_stats. All but the population count up from when they were switched on.
+        :param: metrics: The metrics of the recent generations, as a dictionary from each name of NUMBERS in the metrics
+        module to an array of its values, oldest first, or None if they are not kept, see SimulationWorker.set_stats.
+        :param: error: The (count, message) of the last command which failed, counting every failed command so far, or
+        None if none did.
+        """
+        self.sequence = sequence
+        self.since = since
+        self.acknowledged = acknowledged
+        self.generation = generation
+        self.viewport = viewport
+        self.level = level
+        self.region = region
+        self.changed = changed
+        self.full = full
+        self.period = period
+        self.stats = stats
+        self.metrics = metrics
+        self.error = error
+
+    def get_region(self, row, col, rows, cols):
+        """Get the state of a rectangular region of the universe. Cells outside of the viewport of the frame are dead.
+
+        :param: row: The top row of the region.
+        :param: col: The left hand column of the region.
+        :param: rows: The number of rows of the region.
+        :param: cols: The number of columns of the region.
+
+        :return: A boolean array of shape (rows, cols).
+        """
+        return self._crop(row, col, rows, cols)
+
+    def get_density(self, level, row, col, rows, cols):
+        """Get how full the blocks of a rectangular region of the universe are. Only valid at the level of the frame.
+
+        :param: level: The level of the blocks.
+        :param: row: The top row of the region, in blocks.
+        :param: col: The left hand column of the region, in blocks.
+        :param: rows: The number of rows of the region.
+        :param: cols: The number of columns of the region.
+
+        :return: A uint8 array of shape (rows, cols). Blocks outside of the viewport of the frame are empty.
+        """
+        return self._crop(row, col, rows, cols)
+
+    def _crop(self, row, col, rows, cols):
+        """Get a rectangular region of the region of the frame, padded with zeros where it lies outside."""
+        if (row, col, rows, cols) == self.viewport:
+            return self.region
+
+        # Copy the part of the viewport which overlaps the region.
+        region = np.zeros((rows, cols), dtype=self.region.dtype)
+        source_row, source_col, source_rows, source_cols = self.viewport
+        top, left = max(row, source_row), max(col, source_col)
+        bottom, right = min(row + rows, source_row + source_rows), min(col + cols, source_col + source_cols)
+        if top < bottom and left < right:
+            region[top - row:bottom - row, left - col:right - col] = \
+                self.region[top - source_row:bottom - source_row, left - source_col:right - source_col]
+        return region
+
+
+def _simulate(engine, commands, publish, viewport, generations_per_second):
+    """Run the simulation until a close command arrives. Runs in the worker thread or process.
+
+    :param: engine: The simulation engine.
+    :param: commands: The queue the commands arrive on.
+    :param: publish: A function taking each frame to publish.
+    :param: viewport: The (row, col, rows, cols) region of the universe to copy into the frames.
+    :param: generations_per_second: The target number of generations to run per second while running.
+
+    :return: Void.
+    """
+    scheduler = Scheduler(generations_per_second)
+    running = False
+    sequence = acknowledged = 0
+    changed = []
+    full = True
+
+    # The number of commands which failed, and the number and message of the last one.
+    errors = 0
+    error = None
+
+    # The population pyramid for zoomed out frames, built the first time one is asked for, and the recording, the
+    # history, the cycle detector and the statistics of the run, if they were started. The statistics are the
+    # generations stepped, the cells they inverted and the seconds they took. The metrics recorder keeps the
+    # population, and the metrics of each generation while a file or the frames need them.
+    level = 0
+    pyramid = None
+    recorder = None
+    history = None
+    detector = None
+    on_cycle = None
+    stats = None
+    meter = None
+    metrics_file = None
+    ring = None
+
+    def metered():
+        """Start or stop the metrics recorder, writing to the sinks asked for."""
+        sinks = [sink for sink in (metrics_file, ring) if sink is not None]
+        if stats is None and not sinks:
+            return None
+        if meter is None:
+            return MetricsRecorder(engine, sinks)
+        meter.sinks = sinks
+        return meter
+
+    def tracked():
+        """Get whether anything needs to know which cells an edit or a jump inverted."""
+        return (pyramid is not None or recorder is not None or history is not None or detector is not None or
+                meter is not None)
+
+    def inverted(cells, remember=True, stepped=False):
+        """Pass distinct cells which were inverted on to the pyramid, the metrics, the recording and the history."""
+        if pyramid is not None or meter is not None:
+            state = engine.get_cells(cells)
+            if pyramid is not None:
+                pyramid.update(cells, state)
+            if meter is not None and stepped:
+                meter.step(cells, state)
+            elif meter is not None:
+                meter.update(cells, state)
+        if recorder is not None:
+            recorder.record(engine.generation, cells)
+        if history is not None and remember:
+            history.push(cells)
+
+    def edited(cells, remember=True):
+        """Pass distinct cells which were inverted other than by stepping on, telling the cycle detector too."""
+        inverted(cells, remember)
+        if detector is not None:
+            detector.invert(cells)
+
+    def step():
+        """Step the engine, keeping the pyramid and the recording up to date. Returns the period of a new cycle."""
+        start = time.perf_counter()
+        cells, period = detector.step() if detector is not None else (engine.step(), None)
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += len(cells)
+            stats[2] += time.perf_counter() - start
+        changed.append(cells)
+        inverted(cells, stepped=True)
+        return period
+
+    try:
+        while True:
+            # Wait for the next command while paused, or until the next generation is due while running. Do not wait
+            # if there is a frame to publish already.
+            timeout = max(scheduler.time_until_due(), 0) if running else None
+            handled = 0
+            while True:
+                try:
+                    command, argument = commands.get(handled == 0 and not full, timeout)
+                except queue.Empty:
+                    break
+                handled += 1
+
+                # Report a command which fails in the next frame rather than stopping the worker, e.g. saving to a
+                # directory which does not exist.
+                try:
+                    if command == 'close':
+                        return
+                    elif command == 'edit':
+                        cells, state = argument
+                        if not tracked():
+                            engine.set_cells(cells, state)
+                        else:
+                            # Only pass on the cells the edit really inverted, each of them once.
+                            distinct = np.unique(as_cells(cells), axis=0)
+                            before = engine.get_cells(distinct)
+                            engine.set_cells(cells, state)
+                            edited(distinct[before != engine.get_cells(distinct)])
+                        changed.append(as_cells(cells))
+                    elif command == 'run':
+                        if argument and not running:
+                            scheduler.reset()
+                        running = argument
+                    elif command == 'speed':
+                        scheduler.generations_per_second = argument
+                    elif command == 'step':
+                        for _ in range(argument):
+                            step()
+                    elif command in ('jump', 'load'):
+                        # Any cell may change, so compare the alive cells before and after if anything needs to know.
+                        before = engine.live_cells() if tracked() else None
+                        if command == 'jump':
+                            jump(engine, argument)
+                        else:
+                            # Centre the bounding box of the pattern on the given cell.
+                            path, row, col = argument
+                            top, left, rows, cols = pattern_bounds(path)
+                            load_pattern(path, engine, row - top - rows // 2, col - left - cols // 2)
+
+                        if before is not None:
+                            edited(unpack(np.setxor1d(pack(before), pack(engine.live_cells()))))
+                        full = True
+                    elif command == 'rewind':
+                        if history is not None:
+                            cells = history.rewind(argument)
+                            changed.append(cells)
+                            edited(cells, remember=False)
+                    elif command == 'history':
+                        history = History(engine, argument) if argument else None
+                    elif command == 'cycles':
+                        on_cycle = argument
+                        detector = CycleDetector(engine, skip=argument == 'skip') if argument is not None else None
+                    elif command == 'stats':
+                        enabled, generations = argument
+                        stats = [0, 0, 0.0] if enabled else None
+                        ring = RingSink(generations) if enabled and generations else None
+                        meter = metered()
+                    elif command == 'metrics':
+                        if metrics_file is not None:
+                            metrics_file.close()
+                        metrics_file = open_sink(argument) if argument is not None else None
+                        meter = metered()
+                    elif command == 'save':
+                        save_pattern(argument, engine)
+                    elif command == 'record':
+                        if recorder is not None:
+                            recorder.close()
+                        recorder = Recorder(argument, engine) if argument is not None else None
+                    elif command == 'viewport':
+                        viewport, level = argument
+                        if level and pyramid is None:
+                            pyramid = PopulationPyramid()
+                            pyramid.add(engine.live_cells(), 1)
+                        full = True
+                except Exception as exception:
+                    errors += 1
+                    error = (errors, '{} failed: {}'.format(command, exception))
+                    full = True
+            acknowledged += handled
+
+            # Run the generations that are due, going back to the commands as soon as one arrives.
+            stepped = False
+            if running:
+                for _ in range(scheduler.generations_due()):
+                    period = step()
+                    stepped = True
+                    if period is not None and on_cycle == 'pause':
+                        running = False
+                        break
+                    if not commands.empty():
+                        break
+
+            # Publish a frame if anything happened. When zoomed out, it holds blocks rather than cells.
+            if handled or stepped or full:
+                sequence += 1
+                cells = np.concatenate(changed) >> level if changed else np.empty((0, 2), dtype=np.int64)
+                region = pyramid.get_density(level, *viewport) if level else engine.get_region(*viewport)
+                publish(Frame(sequence, sequence - 1, acknowledged, engine.generation, viewport, level, region, cells,
+                              full, detector.period if detector is not None else None,
+                              (meter.population,) + tuple(stats) if stats is not None else None,
+                              ring.snapshot() if ring is not None else None, error))
+                changed.clear()
+                full = False
+    finally:
+        if recorder is not None:
+            recorder.close()
+        if metrics_file is not None:
+            metrics_file.close()
+        engine.close()
+
+
+def _run_process(commands, connection, engine_arguments, viewport, generations_per_second):
+    """Create the engine and run the simulation in a worker process, sending the frames down a pipe.
+
+    :param: commands: The queue the commands arrive on.
+    :param: connection: The end of the pipe the frames are sent through.
+    :param: engine_arguments: The name, rows, columns, boundary policy and options of the engine.
+    :param: viewport: The (row, col, rows, cols) region of the universe to copy into the frames.
+    :param: generations_per_second: The target number of generations to run per second while running.
+
+    :return: Void.
+    """
+    engine_name, rows, cols, boundary, engine_options = engine_arguments
+    engine = ENGINES[engine_name](rows, cols, boundary, **engine_options)
+    _simulate(engine, commands, connection.send, viewport, generations_per_second)
+    connection.close()
+
+
+class SimulationWorker:
+    """Run a simulation engine in a background thread or process.
+
+    Frames go from the worker to the game loop through a single slot in thread mode. The worker replaces the frame in
+    the slot and the game loop reads whichever frame is there, so neither side ever waits for the other. If the game
+    loop misses a frame, the frame it reads next does not continue from the last one it saw, and it redraws everything.
+    In process mode the frames are sent through a pipe and merged on arrival instead.
+
+    Call close when done with the worker to stop it and free the engine.
+    """
+
+    def __init__(self, engine_name, rows, cols, boundary=None, engine_options=None, viewport=(0, 0, 0, 0),
+                 generations_per_second=60, mode=None):
+        """Create an engine and start simulating it in the background. The simulation starts paused.
+
+        :param: engine_name: The name of the simulation backend to use. See ENGINES in the backends module.
+        :param: rows: The number of rows of the universe.
+        :param: cols: The number of columns of the universe.
+        :param: boundary: The boundary policy of the universe. Defaults to the one of the backend.
+        :param: engine_options: Extra keyword arguments for the backend, e.g. the number of workers of the parallel one.
+        :param: viewport: The (row, col, rows, cols) region of the universe to copy into the frames.
+        :param: generations_per_second: The target number of generations to run per second while running.
+        :param: mode: 'thread' or 'process'. Defaults to a thread for backends that release the GIL.
+        """
+        engine_options = engine_options or {}
+        self.mode = mode or ('thread' if ENGINES[engine_name].RELEASES_GIL else 'process')
+        if self.mode not in ('thread', 'process'):
+            raise ValueError('unknown worker mode {!r}, use thread or process'.format(self.mode))
+        self.viewport = tuple(viewport)
+        self.level = 0
+        self._sent = 0
+        self._frame = None
+        self._seen = None
+        self._errors = 0
+
+        if self.mode == 'thread':
+            # Build the engine here so that invalid options raise straight away.
+            engine = ENGINES[engine_name](rows, cols, boundary, **engine_options)
+            self._commands = queue.SimpleQueue()
+            self._runner = threading.Thread(target=_simulate, daemon=True, args=(
+                engine, self._commands, self._publish, self.viewport, generations_per_second))
+        else:
+            # Start the process in a fresh interpreter so it never inherits state such as an open display. It is not
+            # a daemon so that the engine may start processes of its own.
+            context = multiprocessing.get_context('spawn')
+            self._commands = context.Queue()
+            self._connection, connection = context.Pipe(duplex=False)
+            self._runner = context.Process(target=_run_process, args=(
+                self._commands, connection, (engine_name, rows, cols, boundary, engine_options), self.viewport,
+                generations_per_second))
+        self._runner.start()
+
+    def _publish(self, frame):
+        """Put a frame in the slot. Runs in the worker thread."""
+        self._frame = frame
+
+    def _send(self, command, argument=None):
+        """Queue a command for the worker."""
+        self._sent += 1
+        self._commands.put((command, argument))
+
+    def set_cells(self, cells, state):
+        """Set the state of the given cells at the end of the current generation.
+
+        :param: cells: The (row, column) pairs of the cells.
+        :param: state: The new state, either a single boolean or one boolean per cell.
+
+        :return: Void.
+        """
+        self._send('edit', (as_cells(cells), state))
+
+    def set_running(self, running):
+        """Resume or pause the simulation.
+
+        :param: running: True to resume, False to pause.
+
+        :return: Void.
+        """
+        self._send('run', running)
+
+    def set_speed(self, generations_per_second):
+        """Change the target number of generations to run per second.
+
+        :param: generations_per_second: The new rate.
+
+        :return: Void.
+        """
+        self._send('speed', generations_per_second)
+
+    def set_viewport(self, viewport, level=0):
+        """Change the region of the universe copied into the frames.
+
+        :param: viewport: The (row, col, rows, cols) region, in blocks of the level.
+        :param: level: The level of detail. Above 0, the frames hold how full each block is, see the lod module.
+
+        :return: Void.
+        """
+        self.viewport = tuple(viewport)
+        self.level = level
+        self._send('viewport', (self.viewport, level))
+
+    def step(self, generations=1):
+        """Advance the universe by a number of generations, one at a time.
+
+        :param: generations: The number of generations.
+
+        :return: Void.
+        """
+        self._send('step', generations)
+
+    def jump(self, generations):
+        """Advance the universe by a number of generations at once using Hashlife.
+
+        :param: generations: The number of generations.
+
+        :return: Void.
+        """
+        self._send('jump', generations)
+
+    def load(self, path, row=0, col=0):
+        """Add the alive cells of a pattern file to the universe at the end of the current generation.
+
+        :param: path: The path of the file. The format is chosen by its extension, see the patterns module.
+        :param: row: The row to centre the pattern on.
+        :param: col: The column to centre the pattern on.
+
+        :return: Void.
+        """
+        self._send('load', (path, row, col))
+
+    def save(self, path):
+        """Write the universe to a pattern file at the end of the current generation.
+
+        :param: path: The path of the file. The format is chosen by its extension, see the patterns module.
+
+        :return: Void.
+        """
+        self._send('save', path)
+
+    def rewind(self, generations=1):
+        """Take the universe back by a number of generations, as far as its history goes, see set_history.
+
+        :param: generations: The number of generations.
+
+        :return: Void.
+        """
+        self._send('rewind', generations)
+
+    def set_history(self, budget):
+        """Start remembering the changes to the universe from now on so that it can be rewound, forgetting the past.
+
+        :param: budget: The most memory to spend on the history, in bytes. 0 stops remembering.
+
+        :return: Void.
+        """
+        self._send('history', budget)
+
+    def set_cycle_action(self, action):
+        """Start looking for the universe settling into still lifes or oscillators, see the cycles module.
+
+        :param: action: What to do once it has: 'report' to only give the period in the frames, 'pause' to pause the
+        simulation as well, or 'skip' to play the cycle back instead of stepping the engine. None stops looking.
+
+        :return: Void.
+        """
+        self._send('cycles', action)
+
+    def set_stats(self, enabled, generations=0):
+        """Start or stop keeping the statistics of the run in the frames, for a display of how fast it goes.
+
+        The population is kept up to date from the cells each change inverts, so it costs as much as the changes do.
+
+        :param: enabled: True to start, from zero, and False to stop.
+        :param: generations: The number of recent generations to keep the metrics of in the frames as well, for a graph.
+        0 not to keep any.
+
+        :return: Void.
+        """
+        self._send('stats', (enabled, generations))
+
+    def record_metrics(self, path):
+        """Start writing the metrics of every generation to a file, see the metrics module.
+
+        :param: path: The path of a .csv or .jsonl file, or None to stop. Starting a new file stops the last one.
+
+        :return: Void.
+        """
+        self._send('metrics', path)
+
+    def record(self, path):
+        """Start recording the run to a file at the end of the current generation, see the checkpoint module.
+
+        :param: path: The path of the file, or None to stop recording. Starting a new recording stops the last one.
+
+        :return: Void.
+        """
+        self._send('record', path)
+
+    def poll(self):
+        """Get the newest frame if one was published since the last call.
+
+        :return: The frame, or None if there is no new frame. Its changed cells are counted from the frame returned
+        by the previous call, unless full is set.
+        """
+        if self.mode == 'thread':
+            frame = self._frame
+            if frame is None or (self._seen is not None and frame.sequence == self._seen.sequence):
+                if not self._runner.is_alive():
+                    raise RuntimeError('the simulation worker thread stopped unexpectedly')
+                return None
+        else:
+            frames = []
+            try:
+                while self._connection.poll():
+                    frames.append(self._connection.recv())
+            except EOFError:
+                raise RuntimeError('the simulation worker process stopped unexpectedly') from None
+            if not frames:
+                return None
+            frame = frames[-1]
+            if len(frames) > 1:
+                frame = Frame(frame.sequence, frames[0].since, frame.acknowledged, frame.generation, frame.viewport,
+                              frame.level, frame.region, np.concatenate([each.changed for each in frames]),
+                              any(each.full for each in frames), frame.period, frame.stats, frame.metrics,
+                              frame.error)
+
+        # Mark the whole frame as changed if frames were missed in between.
+        if frame.since != (self._seen.sequence if self._seen is not None else 0):
+            frame = Frame(frame.sequence, frame.since, frame.acknowledged, frame.generation, frame.viewport,
+                          frame.level, frame.region, frame.changed, True, frame.period, frame.stats, frame.metrics,
+                          frame.error)
+        self._seen = frame
+        return frame
+
+    def take_error(self):
+        """Get the message of the last command which failed, if any failed since the last call, as of the last frame
+        returned by poll.
+
+        :return: The message, or None.
+        """
+        if self._seen is None or self._seen.error is None or self._seen.error[0] == self._errors:
+            return None
+        self._errors, message = self._seen.error
+        return message
+
+    def busy(self):
+        """Check whether the worker still has commands to handle, as of the last frame returned by poll.
+
+        :return: True if some commands were not handled yet, or no frame was returned yet.
+        """
+        return self._seen is None or self._sent > self._seen.acknowledged
+
+    def close(self):
+        """Stop the worker and free the engine.
+
+        :return: Void.
+        """
+        if not self._runner.is_alive():
+            return
+        self._commands.put(('close', None))
+        if self.mode == 'thread':
+            self._runner.join()
+        else:
+            # Keep draining the pipe so the worker is never stuck sending a frame, until the worker closes its end.
+            try:
+                while self._runner.is_alive():
+                    while self._connection.poll():
+                        self._connection.recv()
+                    self._runner.join(0.05)
+            except EOFError:
+                self._runner.join()
+            self._connection.close()